@@ -0,0 +1,36 @@
+"""
+Argus face recognition attendance system.
+
+The app is built by create_app(); the blueprints live in argus.blueprints and the
+logic they share (faces, users, geocoding, mail, exports) in argus.services.
+"""
+import os
+
+from flask import Flask
+
+from . import cli, deps, metrics
+from .blueprints import register_blueprints
+from .config import ARGUS_ROLE, BASE_DIR, KIOSK_WS_MAX_FRAME_BYTES, KIOSK_WS_PING_SECONDS, UPLOAD_FOLDER
+from .extensions import sock
+
+def create_app(role=ARGUS_ROLE):
+    """Builds the Flask app for a process role: "recognition", "web" or "all"."""
+    app = Flask(__name__, root_path=BASE_DIR) # templates/, static/ and relative paths resolve from the project root
+    # Use a strong, unique secret key from environment variables
+    app.secret_key = os.getenv("SECRET_KEY") # DO NOT USE IN PRODUCTION
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['ARGUS_ROLE'] = role
+    app.config['SOCK_SERVER_OPTIONS'] = {'ping_interval': KIOSK_WS_PING_SECONDS, 'max_message_size': KIOSK_WS_MAX_FRAME_BYTES}
+
+    metrics.init_app(app)
+    sock.init_app(app)
+    register_blueprints(app, role)
+    cli.init_app(app)
+
+    if role != 'web':
+        # Recognition workers pay the model load at startup rather than on their first kiosk frame
+        deps.face_recognition()
+        deps.numpy()
+        deps.requests()
+
+    return app
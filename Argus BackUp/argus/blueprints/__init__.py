@@ -0,0 +1,37 @@
+"""
+Blueprints and the roles that serve them.
+
+Every role registers every blueprint so url_for can build links to pages another role
+serves (the kiosk page links to signup and login, admin pages link home); a role only
+answers requests for its own blueprints and 404s the rest. Route by path at the load
+balancer: "/" and "/auto_signin" to recognition workers, everything else to web workers.
+"""
+from flask import abort, request
+
+from . import admin, auth, employee, exports, kiosk, system
+
+BLUEPRINTS = (system.bp, kiosk.bp, auth.bp, employee.bp, admin.bp, exports.bp)
+
+ROLE_BLUEPRINTS = {
+    'recognition': {'system', 'kiosk', 'auth'}, # auth covers signup, which encodes the new face
+    'web': {'system', 'auth', 'employee', 'admin', 'exports'},
+    'all': None # Everything
+}
+
+def register_blueprints(app, role):
+    """Registers every blueprint on `app` and limits the requests it answers to those `role` serves."""
+    if role not in ROLE_BLUEPRINTS:
+        raise ValueError(f"Unknown ARGUS_ROLE '{role}'. Expected one of: {', '.join(ROLE_BLUEPRINTS)}.")
+
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+    served = ROLE_BLUEPRINTS[role]
+    if served is None:
+        return
+
+    @app.before_request
+    def _reject_other_roles():
+        # request.blueprint is None for app-level routes such as /static
+        if request.blueprint is not None and request.blueprint not in served:
+            abort(404)
@@ -0,0 +1,307 @@
+"""Admin and employee login/logout, employee signup and password reset."""
+import datetime
+import random
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, redirect, render_template, request, session, url_for
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from ..config import MIN_ADMIN_ID_LENGTH, MIN_ADMIN_PASSWORD_LENGTH, MIN_EMPLOYEE_ID_LENGTH
+from ..extensions import mongo
+from ..services.faces import process_and_encode_face
+from ..services.mail import send_email
+from ..services.uploads import image_upload
+from ..services.users import bump_users_version
+from ..services.validation import validate_email_format, validate_password_complexity
+
+bp = Blueprint('auth', __name__)
+
+def admin_required(f):
+    """Decorator to protect admin routes."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get('admin_logged_in'):
+            return redirect(url_for('auth.admin_login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+@bp.route('/admin')
+def admin_login():
+    """Renders the admin login page."""
+    return render_template('admin.html')
+
+@bp.route('/admin/auth', methods=['POST'])
+def admin_authenticate():
+    """Authenticates admin users."""
+    username = request.form.get('adminid')
+    password = request.form.get('adminpass')
+
+    if not username or len(username) < MIN_ADMIN_ID_LENGTH:
+        return render_template('admin.html', error=f'Admin ID must be at least {MIN_ADMIN_ID_LENGTH} characters.')
+    if not password or len(password) < MIN_ADMIN_PASSWORD_LENGTH: # Basic length check
+        return render_template('admin.html', error=f'Password must be at least {MIN_ADMIN_PASSWORD_LENGTH} characters.')
+
+    try:
+        admin = mongo.admins.find_one({'username': username})
+        if admin and check_password_hash(admin['password'], password):
+            session['admin_logged_in'] = True
+            session['admin_username'] = username
+            return redirect(url_for('admin.admin_dashboard'))
+        return render_template('admin.html', error='Invalid credentials.')
+    except Exception as e:
+        current_app.logger.error(f"Admin authentication error: {e}")
+        return render_template('admin.html', error='An internal authentication error occurred. Please try again.')
+
+@bp.route('/admin/logout')
+def admin_logout():
+    """Logs out the admin user."""
+    session.pop('admin_logged_in', None)
+    session.pop('admin_username', None)
+    return redirect(url_for('auth.admin_login'))
+
+@bp.route('/employee_login')
+def employee_login():
+    """Renders the employee login page."""
+    return render_template('employee_login.html')
+
+@bp.route('/employee_login_auth', methods=['POST'])
+def employee_login_auth():
+    """Authenticates employee users via ID and password."""
+    try:
+        data = request.get_json()
+        emp_id = data.get('empId')
+        password = data.get('password')
+
+        if not emp_id or not password:
+            return jsonify({'success': False, 'message': 'Employee ID and password are required.'}), 400
+
+        if len(emp_id) < MIN_EMPLOYEE_ID_LENGTH:
+            return jsonify({'success': False, 'message': f'Employee ID must be at least {MIN_EMPLOYEE_ID_LENGTH} characters long.'}), 400
+
+        user = mongo.users.find_one({"emp_id": emp_id})
+
+        if not user:
+            return jsonify({'success': False, 'message': 'Invalid Employee ID or password.'}), 401 # Use 401 for auth failure
+
+        stored_password_hash = user.get('password')
+        if not stored_password_hash or not check_password_hash(stored_password_hash, password):
+            return jsonify({'success': False, 'message': 'Invalid Employee ID or password.'}), 401
+
+        # Successful login, set session
+        session['user'] = {
+            'username': user.get('full_name', 'Employee'),
+            'emp_id': user.get('emp_id'),
+            'status': 'Logged In', # This status is for session, not attendance
+            'image_path': user.get('image_path'),
+            'email': user.get('email', ''), # Store company email
+            'personal_email': user.get('personal_email', ''), # Store personal email
+            'department': user.get('department', 'Not assigned'),
+            'position': user.get('position', 'Not assigned')
+        }
+        return jsonify({'success': True, 'message': 'Login successful. Redirecting...'}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Employee login error: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred during login. Please try again.'}), 500
+
+@bp.route('/employee_signup', methods=['GET', 'POST'])
+def employee_signup():
+    """Handles employee registration, including face capture."""
+    if request.method == 'POST':
+        try:
+            # Multipart form with the photo as a file part, or JSON with a base64 photo (older clients)
+            photo_bytes, data = image_upload('capturedImage')
+            if not data:
+                return jsonify({"success": False, "message": "Invalid request data."}), 400
+
+            # Server-side validation for all required fields
+            full_name = data.get('fullName')
+            emp_id = data.get('empId')
+            email = data.get('email')
+            personal_email = data.get('personalEmail')
+            password = data.get('password')
+
+            if not all([full_name, emp_id, email, password, photo_bytes]):
+                return jsonify({"success": False, "message": "All required fields (Full Name, Employee ID, Company Email, Password, Photo) must be provided."}), 400
+
+            if len(emp_id) < MIN_EMPLOYEE_ID_LENGTH:
+                return jsonify({"success": False, "message": f"Employee ID must be at least {MIN_EMPLOYEE_ID_LENGTH} characters long."}), 400
+
+            if not validate_email_format(email):
+                return jsonify({"success": False, "message": "Invalid company email format."}), 400
+            if not email.endswith('@innovasolutions.com'):
+                return jsonify({"success": False, "message": "Please use your @innovasolutions.com email address."}), 400
+
+            if personal_email and not validate_email_format(personal_email):
+                return jsonify({"success": False, "message": "Invalid personal email format."}), 400
+
+            is_strong, password_message = validate_password_complexity(password)
+            if not is_strong:
+                return jsonify({"success": False, "message": password_message}), 400
+
+            # Check for existing employee ID or email
+            if mongo.users.find_one({'emp_id': emp_id}):
+                return jsonify({"success": False, "message": "Employee ID already exists. Please choose a different one."}), 400
+            if mongo.users.find_one({'email': email}):
+                return jsonify({"success": False, "message": "Company email already exists. Please use a different one."}), 400
+
+            # Process and encode face
+            try:
+                face_fields, image_path = process_and_encode_face(photo_bytes, emp_id)
+            except ValueError as ve:
+                return jsonify({"success": False, "message": str(ve)}), 400
+            except Exception as e:
+                current_app.logger.error(f"Face processing error during signup: {e}")
+                return jsonify({"success": False, "message": "Failed to process face photo."}), 500
+
+            # Hash password and insert user
+            hashed_password = generate_password_hash(password)
+            mongo.users.insert_one({
+                "emp_id": emp_id,
+                "full_name": full_name,
+                "email": email,
+                "personal_email": personal_email or "",
+                "image_path": image_path,
+                **face_fields,
+                "password": hashed_password,
+                "department": "Not assigned", # Default values
+                "position": "Not assigned"    # Default values
+            })
+            bump_users_version(emp_id)
+
+            return jsonify({"success": True, "message": "Registration successful. You can now log in."}), 200
+
+        except Exception as e:
+            current_app.logger.error(f"Error in employee_signup route: {e}", exc_info=True)
+            return jsonify({"success": False, "message": f"An unexpected error occurred during registration. Please try again later."}), 500
+
+    return render_template('employee_signup.html')
+
+@bp.route('/logout')
+def logout():
+    """Logs out the employee user."""
+    session.pop('user', None)
+    return redirect(url_for('kiosk.home'))
+
+@bp.route('/forgot_password', methods=['POST'])
+def forgot_password():
+    """Initiates password reset by sending an OTP to the user's personal email."""
+    try:
+        data = request.get_json()
+        emp_id = data.get('empId', '').strip()
+        personal_email = data.get('personalEmail', '').strip()
+
+        if not emp_id or not personal_email:
+            return jsonify({'success': False, 'message': 'Employee ID and personal email are required.'}), 400
+
+        if len(emp_id) < MIN_EMPLOYEE_ID_LENGTH:
+             return jsonify({'success': False, 'message': f'Employee ID must be at least {MIN_EMPLOYEE_ID_LENGTH} characters long.'}), 400
+        if not validate_email_format(personal_email):
+            return jsonify({'success': False, 'message': 'Invalid personal email format.'}), 400
+
+        user = mongo.users.find_one({'emp_id': emp_id})
+
+        if not user:
+            return jsonify({'success': False, 'message': 'Employee ID not found.'}), 404
+
+        # Important: Check if the provided personal email matches the one in the database
+        if user.get('personal_email') != personal_email:
+            return jsonify({'success': False, 'message': 'Provided personal email does not match our records for this Employee ID.'}), 400
+
+        # Generate a 6-digit OTP
+        otp = ''.join([str(random.randint(0, 9)) for _ in range(6)])
+        # OTP valid for 5 minutes
+        expiry_time = datetime.datetime.now() + datetime.timedelta(minutes=5)
+
+        # Store OTP in the DB, replacing any existing token for this emp_id
+        mongo.password_reset_tokens.update_one(
+            {'emp_id': emp_id},
+            {'$set': {'token': otp, 'expiry': expiry_time, 'created_at': datetime.datetime.now()}},
+            upsert=True # Create if not exists, update if exists
+        )
+
+        # Send OTP via email using environment variables for credentials
+        try:
+            send_email(
+                personal_email,
+                "ArgusScan Password Reset OTP",
+                f"Your One-Time Password (OTP) for ArgusScan password reset is: {otp}\n\nThis code is valid for 5 minutes. If you did not request this, please ignore this email."
+            )
+
+            return jsonify({'success': True, 'message': 'A verification code has been sent to your personal email.'}), 200
+        except Exception as e:
+            current_app.logger.error(f"Error sending password reset OTP email to {personal_email}: {str(e)}", exc_info=True)
+            return jsonify({'success': False, 'message': 'Failed to send verification code. Please check your email settings or try again later.'}), 500
+
+    except Exception as e:
+        current_app.logger.error(f"Error in forgot_password route: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred. Please try again.'}), 500
+
+@bp.route('/verify_reset_code', methods=['POST'])
+def verify_reset_code():
+    """Verifies the OTP sent for password reset."""
+    try:
+        data = request.get_json()
+        emp_id = data.get('empId', '').strip()
+        code = data.get('code', '').strip()
+
+        if not emp_id or not code:
+            return jsonify({'success': False, 'message': 'Employee ID and verification code are required.'}), 400
+
+        token_entry = mongo.password_reset_tokens.find_one({'emp_id': emp_id})
+
+        if not token_entry:
+            return jsonify({'success': False, 'message': 'No verification code found for this Employee ID. Please request a new one.'}), 400
+
+        expiry = token_entry.get('expiry')
+        stored_token = token_entry.get('token')
+
+        if not expiry or datetime.datetime.now() > expiry:
+            # Delete expired token
+            mongo.password_reset_tokens.delete_one({'emp_id': emp_id})
+            return jsonify({'success': False, 'message': 'The verification code has expired. Please request a new one.'}), 400
+
+        if code == stored_token:
+            return jsonify({'success': True, 'message': 'Verification code successfully verified.'}), 200
+        else:
+            return jsonify({'success': False, 'message': 'Invalid verification code.'}), 400
+
+    except Exception as e:
+        current_app.logger.error(f"Error in verify_reset_code route: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred during code verification. Please try again.'}), 500
+
+@bp.route('/reset_password', methods=['POST'])
+def reset_password():
+    """Resets the user's password after successful OTP verification."""
+    try:
+        data = request.get_json()
+        emp_id = data.get('empId', '').strip()
+        new_password = data.get('newPassword')
+
+        if not emp_id or not new_password:
+            return jsonify({'success': False, 'message': 'Employee ID and new password are required.'}), 400
+
+        is_strong, password_message = validate_password_complexity(new_password)
+        if not is_strong:
+            return jsonify({'success': False, 'message': password_message}), 400
+
+        user = mongo.users.find_one({'emp_id': emp_id})
+        if not user:
+            return jsonify({'success': False, 'message': 'Employee ID not found.'}), 404
+
+        hashed_password = generate_password_hash(new_password)
+
+        # Update password in users collection
+        mongo.users.update_one(
+            {'emp_id': emp_id},
+            {'$set': {'password': hashed_password}}
+        )
+
+        # Remove used OTP token to prevent reuse
+        mongo.password_reset_tokens.delete_one({'emp_id': emp_id})
+
+        return jsonify({'success': True, 'message': 'Your password has been successfully reset.'}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error in reset_password route for employee {emp_id}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred during password reset. Please try again.'}), 500
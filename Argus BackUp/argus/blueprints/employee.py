@@ -0,0 +1,430 @@
+"""Employee dashboard, attendance history, regularization and profile."""
+import datetime
+import os
+
+from flask import Blueprint, current_app, jsonify, redirect, render_template, request, session, url_for
+from pymongo import InsertOne, UpdateMany
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from ..config import UPLOAD_FOLDER
+from ..extensions import mongo
+from ..services.dates import (
+    DISPLAY_DAY_FORMAT, SHORT_TIME_FORMAT, TIME_FORMAT, as_date, as_datetime, day, formatted, local_now, minutes_between, on_days
+)
+from ..services.geocode import reverse_geocode
+from ..services.presence import presence
+from ..services.shifts import record_fields, shift_schedule
+from ..services.validation import validate_email_format, validate_password_complexity
+
+bp = Blueprint('employee', __name__)
+
+@bp.route('/employee')
+def employee():
+    """Renders the employee dashboard."""
+    if 'user' not in session:
+        return redirect(url_for('auth.employee_login'))
+
+    emp_id = session['user']['emp_id']
+    username = session['user']['username']
+
+    try:
+        # Get today's attendance records, with times formatted by the server
+        records = mongo.attendance.aggregate([
+            {"$match": {
+                "emp_id": emp_id,
+                "date": on_days(),
+                "status": {"$ne": "Historical"} # Exclude historical records
+            }},
+            {"$sort": {"punch_in": 1}},
+            {"$project": {
+                "punch_in": formatted("$punch_in", TIME_FORMAT),
+                "punch_out": formatted("$punch_out", TIME_FORMAT),
+                "status": 1,
+                "is_active": 1
+            }}
+        ])
+
+        user_data = mongo.users.find_one({"emp_id": emp_id})
+
+        attendance_records_today = [{
+            'punch_in': record['punch_in'],
+            'punch_out': record['punch_out'],
+            'status': record.get('status') or ('Active' if record.get('is_active') else 'Completed')
+        } for record in records]
+
+        current_status = "Punched In" if presence.is_in(emp_id) else "Punched Out"
+
+        image_path = None
+        if user_data and user_data.get('image_path'):
+            # Ensure the image path is correct for rendering in HTML
+            # Convert the local file path to a URL using url_for
+            if user_data['image_path'].startswith(UPLOAD_FOLDER):
+                image_path = url_for('system.uploaded_file', filename=os.path.basename(user_data['image_path']))
+            else:
+                image_path = user_data['image_path'] # Assume it's already a URL or placeholder
+
+        return render_template('employee.html',
+                               username=username,
+                               status=current_status,
+                               attendance_records=attendance_records_today,
+                               emp_id=emp_id,
+                               user={
+                                   'emp_id': user_data['emp_id'],
+                                   'image_path': image_path,
+                                   'email': user_data.get('email', ''),
+                                   'personal_email': user_data.get('personal_email', ''),
+                                   'department': user_data.get('department', 'Not assigned'),
+                                   'position': user_data.get('position', 'Not assigned')
+                               })
+    except Exception as e:
+        current_app.logger.error(f"Error loading employee dashboard for {emp_id}: {str(e)}", exc_info=True)
+        return render_template('employee.html',
+                               error=f'Failed to load dashboard data: {str(e)}',
+                               username=session.get('user', {}).get('username', 'Employee'),
+                               status='Error',
+                               attendance_records=[],
+                               emp_id=session.get('user', {}).get('emp_id', 'N/A'),
+                               user={'emp_id': 'N/A', 'image_path': None, 'personal_email': '', 'department': 'N/A', 'position': 'N/A'}
+                               )
+
+def _day_address(locations):
+    """The address of a day's latest record that has one (reverse geocoded from its coordinates if needed)."""
+    address = 'Location not recorded'
+    for location in locations:
+        if location.get('address') and location['address'] != 'Location not recorded':
+            address = location['address']
+        elif location.get('latitude') and location.get('longitude'):
+            try:
+                geo_address = reverse_geocode(location['latitude'], location['longitude'])
+                if geo_address and geo_address != 'Location not recorded':
+                    address = geo_address
+            except Exception:
+                pass # Ignore geocoding errors for display purpose
+    return address
+
+@bp.route('/attendance')
+def attendance():
+    """Renders the employee attendance history page."""
+    if 'user' not in session:
+        return redirect(url_for('kiosk.home'))
+
+    emp_id = session['user']['emp_id']
+
+    try:
+        shift = shift_schedule.for_employee(emp_id)
+
+        # One row per day, grouped and formatted by the server; a regularized record overrides the day's punches.
+        # Lateness and worked time were stamped on the records when they were written (see services.shifts).
+        days = mongo.attendance.aggregate([
+            {"$match": {"emp_id": emp_id, "status": {"$ne": "Historical"}}},
+            {"$set": {
+                "date": as_date("$date"),
+                "punch_in": as_date("$punch_in"),
+                "punch_out": as_date("$punch_out"),
+                # Records from before worked_minutes was stamped, until recompute-attendance-shifts runs
+                "worked_minutes": {"$ifNull": ["$worked_minutes", minutes_between("$punch_in", "$punch_out")]}
+            }},
+            {"$sort": {"punch_in": 1}},
+            {"$group": {
+                "_id": "$date",
+                "regularized": {"$push": {"$cond": [
+                    {"$eq": ["$status", "Regularized"]},
+                    {"punch_in": "$punch_in", "punch_out": "$punch_out", "address": "$address",
+                     "is_late": "$is_late", "worked_minutes": "$worked_minutes"},
+                    "$$REMOVE"
+                ]}},
+                "first_punch_in": {"$min": "$punch_in"},
+                "last_punch_out": {"$max": "$punch_out"},
+                "is_late": {"$max": {"$ifNull": ["$is_late", False]}},
+                "worked_minutes": {"$sum": "$worked_minutes"},
+                "locations": {"$push": {"address": "$address", "latitude": "$latitude", "longitude": "$longitude"}}
+            }},
+            {"$set": {"regularized": {"$last": "$regularized"}}},
+            {"$set": {
+                "is_regularized": {"$ne": [{"$type": "$regularized"}, "missing"]},
+                "first_punch_in": {"$cond": [{"$ifNull": ["$regularized", False]}, "$regularized.punch_in", "$first_punch_in"]},
+                "last_punch_out": {"$cond": [{"$ifNull": ["$regularized", False]}, "$regularized.punch_out", "$last_punch_out"]},
+                "is_late": {"$cond": [{"$ifNull": ["$regularized", False]}, {"$ifNull": ["$regularized.is_late", False]}, "$is_late"]},
+                "worked_minutes": {"$cond": [{"$ifNull": ["$regularized", False]}, "$regularized.worked_minutes", "$worked_minutes"]}
+            }},
+            {"$sort": {"_id": -1}}, # Date descending
+            {"$project": {
+                "date": formatted("$_id", DISPLAY_DAY_FORMAT),
+                "actual_in": formatted("$first_punch_in", SHORT_TIME_FORMAT),
+                "actual_out": formatted("$last_punch_out", SHORT_TIME_FORMAT),
+                "worked_minutes": 1,
+                "is_late": 1,
+                "is_regularized": 1,
+                "regularized_address": "$regularized.address",
+                "locations": 1
+            }}
+        ])
+
+        final_attendance_records = []
+        for data in days:
+            if data['is_regularized']:
+                status = 'Regularized'
+                address = data.get('regularized_address') or _day_address(data['locations'])
+            else:
+                if data['actual_in'] != '-' and data['actual_out'] != '-':
+                    status = 'Late' if data['is_late'] else 'Present'
+                elif data['actual_in'] != '-':
+                    status = 'Active'
+                else:
+                    status = 'Absent'
+                address = _day_address(data['locations'])
+
+            # Time actually worked (the sum over the day's closed records), shown once the day has a punch-out
+            worked = data.get('worked_minutes')
+            worked = int(worked) if worked is not None and data['actual_in'] != '-' and data['actual_out'] != '-' else None
+            final_attendance_records.append({
+                'date': data['date'],
+                'shift_in': shift.start,
+                'shift_out': shift.end,
+                'actual_in': data['actual_in'],
+                'actual_out': data['actual_out'],
+                'work_hours': f"{worked // 60:02d}:{worked % 60:02d}" if worked is not None else '-',
+                'status': status,
+                'address': address
+            })
+
+        return render_template('attendance.html',
+                               attendance_records=final_attendance_records,
+                               user=session['user'])
+    except Exception as e:
+        current_app.logger.error(f"Error loading attendance records for {emp_id}: {str(e)}", exc_info=True)
+        return render_template('attendance.html',
+                               error=f'Failed to load attendance history: {str(e)}',
+                               user=session['user'],
+                               attendance_records=[])
+
+def _time_on(punch_day, time_str):
+    """An HH:MM time on a day as a datetime, or None when no time was given. Raises ValueError if malformed."""
+    if not time_str:
+        return None
+    return datetime.datetime.combine(punch_day.date(), datetime.time.fromisoformat(time_str))
+
+@bp.route('/regularize_attendance', methods=['POST'])
+def regularize_attendance():
+    """Handles employee requests to regularize attendance records."""
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Not authenticated.'}), 401
+
+    try:
+        data = request.get_json()
+        if not data or 'records' not in data:
+            return jsonify({'success': False, "message": 'Invalid request data format. "records" key is missing.'}), 400
+
+        emp_id = session['user']['emp_id']
+
+        # Validate every submitted day up front so nothing is written for a partially invalid request
+        submissions = []
+        for record_data in data['records']:
+            date_display_str = record_data.get('date')
+            modified_in_time_str = record_data.get('modified_in')
+            modified_out_time_str = record_data.get('modified_out')
+            reason = record_data.get('reason', '').strip()
+            comments = record_data.get('comments', '').strip()
+
+            if not date_display_str:
+                return jsonify({'success': False, 'message': 'Date is required for regularization.'}), 400
+            if not reason:
+                return jsonify({'success': False, 'message': 'Reason is required for all regularization requests.'}), 400
+
+            try:
+                punch_day = day(datetime.datetime.strptime(date_display_str, DISPLAY_DAY_FORMAT))
+            except ValueError:
+                return jsonify({'success': False, 'message': f'Invalid date format for {date_display_str}. Expected "DD Mon YYYY".'}), 400
+            try:
+                # Full timestamps on that day for the modified times, if provided
+                modified_in = _time_on(punch_day, modified_in_time_str)
+                modified_out = _time_on(punch_day, modified_out_time_str)
+            except ValueError:
+                return jsonify({'success': False, 'message': f'Invalid time for {date_display_str}. Expected "HH:MM".'}), 400
+
+            submissions.append({
+                'day': punch_day,
+                'modified_in': modified_in,
+                'modified_out': modified_out,
+                'reason': reason,
+                'comments': comments
+            })
+
+        if not submissions:
+            return jsonify({'success': False, 'message': 'No valid records were submitted for regularization or no changes were detected.'}), 400
+
+        # Prefetch the current (non-historical) records for every affected day in a single query
+        existing_by_date = {}
+        for rec in mongo.attendance.find(
+            {"emp_id": emp_id, "date": on_days(*{sub['day'] for sub in submissions}), "status": {"$ne": "Historical"}}
+        ).sort("punch_in", 1): # Sort to get the earliest punch-in as 'original'
+            # Records not yet migrated hold ISO strings
+            rec['punch_in'], rec['punch_out'] = as_datetime(rec.get('punch_in')), as_datetime(rec.get('punch_out'))
+            existing_by_date.setdefault(day(rec['date']), []).append(rec)
+
+        operations = []
+        updated_records_for_response = []
+        regularized_at = local_now()
+        shift = shift_schedule.for_employee(emp_id)
+
+        for sub in submissions:
+            punch_day = sub['day']
+            existing_records = existing_by_date.get(punch_day, [])
+
+            original_punch_in = None
+            original_punch_out = None
+            original_latitude = None
+            original_longitude = None
+            original_address = None
+
+            if existing_records:
+                # For historical tracking, take the earliest punch-in and latest punch-out from existing records
+                original_punch_in = min([r['punch_in'] for r in existing_records if r['punch_in']], default=None)
+                original_punch_out = max([r['punch_out'] for r in existing_records if r['punch_out']], default=None)
+
+                # Get original location from the record that had the first punch_in
+                for rec in existing_records:
+                    if rec['punch_in'] == original_punch_in:
+                        original_latitude = rec.get('latitude')
+                        original_longitude = rec.get('longitude')
+                        original_address = rec.get('address')
+                        break
+
+                # Mark all relevant existing records as 'Historical'
+                operations.append(UpdateMany(
+                    {"emp_id": emp_id, "date": on_days(punch_day), "status": {"$ne": "Historical"}},
+                    {"$set": {"status": "Historical", "updated_at": regularized_at}, "$unset": {"is_active": ""}} # Superseded records are never the open punch-in
+                ))
+
+            new_record = {
+                "emp_id": emp_id,
+                "date": punch_day,
+                "punch_in": sub['modified_in'] or original_punch_in, # Use modified or original if not provided
+                "punch_out": sub['modified_out'] or original_punch_out, # Use modified or original if not provided
+                "latitude": original_latitude, # Retain original lat/lon if not modified
+                "longitude": original_longitude,
+                "address": original_address, # Retain original address
+                "original_punch_in": original_punch_in, # Pre-joined so readers need no lookup of the Historical rows
+                "original_punch_out": original_punch_out,
+                "status": "Regularized",
+                "regularized_reason": sub['reason'],
+                "regularized_comments": sub['comments'],
+                "regularized_by": session['user']['username'], # Record who regularized it
+                "regularized_at": regularized_at,
+                "updated_at": regularized_at
+            }
+            # The day's only record from now on, so its punch-in is the day's first
+            new_record.update(record_fields(shift, new_record['punch_in'], new_record['punch_out']))
+            if new_record['punch_out'] is None and new_record['punch_in']:
+                new_record['is_active'] = True # Still open: the next kiosk punch-out closes it
+            operations.append(InsertOne(new_record))
+
+            # A later submission for the same day supersedes this one, exactly as a serial write would
+            existing_by_date[punch_day] = [new_record]
+
+            # Build the response from the in-memory record; no read-back is needed
+            punch_in_display = new_record['punch_in'].strftime(SHORT_TIME_FORMAT) if new_record['punch_in'] else '-'
+            punch_out_display = new_record['punch_out'].strftime(SHORT_TIME_FORMAT) if new_record['punch_out'] else '-'
+            updated_records_for_response.append({
+                'date': punch_day.strftime(DISPLAY_DAY_FORMAT),
+                'actual_in': punch_in_display,
+                'actual_out': punch_out_display,
+                'status': 'Regularized',
+                'modified_in': punch_in_display,
+                'modified_out': punch_out_display
+            })
+
+        if mongo.supports_transactions:
+            # Apply every day's changes atomically: either all days are converted or none are
+            with mongo.client.start_session() as mongo_session:
+                mongo_session.with_transaction(
+                    lambda txn_session: mongo.attendance.bulk_write(operations, ordered=True, session=txn_session)
+                )
+        else:
+            # A standalone server has no transactions; ordered writes stop at the first failure,
+            # leaving the days before it converted and the rest untouched
+            mongo.attendance.bulk_write(operations, ordered=True)
+        presence.invalidate(emp_id) # Other workers pick the change up from updated_at
+
+        return jsonify({
+            'success': True,
+            'message': 'Attendance regularized successfully!',
+            'updated_records': updated_records_for_response
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error regularizing attendance for employee {emp_id}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'An unexpected error occurred during regularization: {str(e)}'}), 500
+
+@bp.route('/update_password', methods=['POST'])
+def update_password():
+    """Allows an authenticated employee to change their password."""
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Authentication required.'}), 401
+
+    try:
+        data = request.get_json()
+        current_password = data.get('current_password')
+        new_password = data.get('new_password')
+        confirm_password = data.get('confirm_password')
+
+        if not all([current_password, new_password, confirm_password]):
+            return jsonify({'success': False, 'message': 'All password fields are required.'}), 400
+
+        if new_password != confirm_password:
+            return jsonify({'success': False, 'message': 'New password and confirm password do not match.'}), 400
+
+        is_strong, password_message = validate_password_complexity(new_password)
+        if not is_strong:
+            return jsonify({'success': False, 'message': password_message}), 400
+
+        emp_id = session['user']['emp_id']
+        user = mongo.users.find_one({'emp_id': emp_id})
+
+        if not user or not check_password_hash(user['password'], current_password):
+            return jsonify({'success': False, 'message': 'Current password is incorrect.'}), 401
+
+        hashed_password = generate_password_hash(new_password)
+        mongo.users.update_one({'emp_id': emp_id}, {'$set': {'password': hashed_password}})
+
+        return jsonify({'success': True, 'message': 'Password updated successfully.'}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error updating password for employee {session['user'].get('emp_id', 'N/A')}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred while updating your password. Please try again.'}), 500
+
+@bp.route('/employee/api/profile', methods=['PUT'])
+def update_employee_profile():
+    """Allows an authenticated employee to update their profile (e.g., personal email)."""
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Authentication required.'}), 401
+
+    try:
+        data = request.get_json()
+        personal_email = data.get('personal_email')
+        emp_id = session['user']['emp_id']
+
+        # Ensure personal_email is either None (if clearing) or a valid format
+        if personal_email:
+            personal_email = personal_email.strip() # Clean whitespace
+            if not validate_email_format(personal_email):
+                return jsonify({'success': False, 'message': 'Invalid personal email format.'}), 400
+        else:
+            personal_email = "" # Store as empty string if user clears it
+
+        update_result = mongo.users.update_one(
+            {'emp_id': emp_id},
+            {'$set': {'personal_email': personal_email}}
+        )
+
+        if update_result.matched_count == 0:
+            return jsonify({'success': False, 'message': 'Employee not found or no changes were made.'}), 404
+
+        # Update session data immediately to reflect changes in UI
+        session['user']['personal_email'] = personal_email
+
+        return jsonify({'success': True, 'message': 'Profile updated successfully!'}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error updating employee profile for {session['user'].get('emp_id', 'N/A')}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'An unexpected error occurred while updating your profile: {str(e)}'}), 500
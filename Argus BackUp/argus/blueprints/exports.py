@@ -0,0 +1,190 @@
+"""CSV / XLSX downloads of employees, attendance and regularizations."""
+from flask import Blueprint, current_app, redirect, request, url_for
+
+from ..extensions import mongo
+from ..services.dates import DAY_FORMAT, TIME_FORMAT, between_days, formatted
+from ..services.exports import export_data
+from ..services.users import attach_full_names, resolve_employee_search
+from .auth import admin_required
+
+bp = Blueprint('exports', __name__)
+
+@bp.route('/admin/export_employees')
+@admin_required
+def export_employees():
+    """Exports employee data based on filters."""
+    try:
+        search = request.args.get('search', '').strip()
+        department = request.args.get('department', '').strip()
+        format_type = request.args.get('format', 'csv').lower()
+
+        query = {}
+        if search:
+            regex = {'$regex': search, '$options': 'i'}
+            query['$or'] = [
+                {'full_name': regex},
+                {'emp_id': regex},
+                {'email': regex},
+                {'personal_email': regex}
+            ]
+        if department:
+            query['department'] = department
+
+        employees = list(mongo.report_users.find(query))
+
+        headers = ["Employee ID", "Full Name", "Company Email", "Personal Email", "Department", "Position"]
+        data = []
+
+        for emp in employees:
+            data.append([
+                emp.get('emp_id', '-'),
+                emp.get('full_name', '-'),
+                emp.get('email', '-'),
+                emp.get('personal_email', '-') or '-', # Handle None
+                emp.get('department', 'Not assigned') or 'Not assigned', # Handle None
+                emp.get('position', 'Not assigned') or 'Not assigned' # Handle None
+            ])
+
+        return export_data(data, headers, "employees", format_type)
+
+    except Exception as e:
+        current_app.logger.error(f"Error exporting employees: {str(e)}", exc_info=True)
+        return redirect(url_for('admin.admin_emp_manage', error=f'Failed to export employee data: {str(e)}'))
+
+@bp.route('/admin/export_attendance')
+@admin_required
+def export_attendance():
+    """Exports attendance data based on filters."""
+    try:
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        emp_id_filter = request.args.get('emp_id', '').strip()
+        status_filter = request.args.get('status', '').strip()
+        format_type = request.args.get('format', 'csv').lower()
+
+        query = {"status": {"$ne": "Historical"}} # Exclude historical records by default
+        query.update(between_days(start_date, end_date))
+
+        name_join_stages = []
+        if emp_id_filter:
+            # Search by full_name (case-insensitive) via the name index, or exact emp_id
+            emp_id_condition, name_join_stages = resolve_employee_search(emp_id_filter)
+            if emp_id_condition is not None:
+                query["emp_id"] = emp_id_condition
+
+        if status_filter:
+            query['status'] = status_filter
+
+        # Join attendance with user full name
+        pipeline = [
+            {'$match': query},
+            *name_join_stages,
+            {'$sort': {'date': -1, 'punch_in': 1}}, # Sort by date descending, then punch_in ascending
+            {
+                '$project': {
+                    'emp_id': 1,
+                    'date': formatted('$date', DAY_FORMAT), # Formatted by the server, not per row here
+                    'punch_in': formatted('$punch_in', TIME_FORMAT),
+                    'punch_out': formatted('$punch_out', TIME_FORMAT),
+                    'punch_in_address': '$address',
+                    'punch_out_address': '$punch_out_address',
+                    'status': 1
+                }
+            }
+        ]
+
+        # Names come from the in-process profile cache instead of a $lookup per row
+        records = attach_full_names(list(mongo.report_attendance.aggregate(pipeline)))
+
+        headers = ["Employee Name", "Employee ID", "Date", "Punch In", "Punch Out",
+                   "Punch In Location", "Punch Out Location", "Status"]
+        data = []
+
+        for rec in records:
+            data.append([
+                rec.get('full_name', '-'),
+                rec.get('emp_id', '-'),
+                rec['date'],
+                rec['punch_in'],
+                rec['punch_out'],
+                rec.get('punch_in_address', '-') or '-',
+                rec.get('punch_out_address', '-') or '-',
+                rec.get('status', '-') or '-'
+            ])
+
+        return export_data(data, headers, "attendance_records", format_type)
+
+    except Exception as e:
+        current_app.logger.error(f"Error exporting attendance: {str(e)}", exc_info=True)
+        return redirect(url_for('admin.admin_dashboard', error=f'Failed to export attendance data: {str(e)}'))
+
+@bp.route('/admin/export_regularization')
+@admin_required
+def export_regularization():
+    """Exports regularization records based on filters."""
+    try:
+        employee_filter = request.args.get('employee', '').strip()
+        start_date = request.args.get('start_date', '').strip()
+        end_date = request.args.get('end_date', '').strip()
+        format_type = request.args.get('format', 'csv').lower()
+
+        # Match filter for regularized records
+        match_stage = {
+            'status': 'Regularized'
+        }
+        name_join_stages = []
+        if employee_filter:
+            # Search by full_name (case-insensitive) via the name index, or exact emp_id
+            emp_id_condition, name_join_stages = resolve_employee_search(employee_filter)
+            if emp_id_condition is not None:
+                match_stage["emp_id"] = emp_id_condition
+
+        match_stage.update(between_days(start_date, end_date))
+
+        # Original times are stored on the regularized record itself, so this is a plain indexed scan
+        pipeline = [
+            {'$match': match_stage},
+            *name_join_stages,
+            {'$sort': {'date': -1, 'regularized_at': -1}}, # Sort by date and then by regularization time
+            {
+                '$project': {
+                    'emp_id': 1,
+                    'date': formatted('$date', DAY_FORMAT),
+                    'original_punch_in': formatted('$original_punch_in', TIME_FORMAT), # '-' if nothing was recorded
+                    'original_punch_out': formatted('$original_punch_out', TIME_FORMAT),
+                    'modified_punch_in': formatted('$punch_in', TIME_FORMAT),
+                    'modified_punch_out': formatted('$punch_out', TIME_FORMAT),
+                    'regularized_reason': 1,
+                    'status': 1,
+                    'regularized_comments': 1
+                }
+            }
+        ]
+
+        records_to_export = attach_full_names(list(mongo.report_attendance.aggregate(pipeline)))
+
+        headers = ["Employee Name", "Employee ID", "Date",
+                   "Original Punch In", "Original Punch Out",
+                   "Modified Punch In", "Modified Punch Out",
+                   "Reason", "Status", "Comments"]
+        data = []
+
+        for r in records_to_export:
+            data.append([
+                r.get('full_name', '-'),
+                r.get('emp_id', '-'),
+                r['date'],
+                r['original_punch_in'],
+                r['original_punch_out'],
+                r['modified_punch_in'],
+                r['modified_punch_out'],
+                r.get('regularized_reason', '-') or '-',
+                r.get('status', '-') or '-',
+                r.get('regularized_comments', '-') or '-'
+            ])
+
+        return export_data(data, headers, "regularization_records", format_type)
+
+    except Exception as e:
+        current_app.logger.error(f"Error exporting regularization records: {str(e)}", exc_info=True)
+        return redirect(url_for('admin.admin_regularization', error=f'Failed to export regularization data: {str(e)}'))
@@ -0,0 +1,132 @@
+"""Kiosk page and face recognition punch-in/punch-out (the CPU-heavy path)."""
+import json
+
+from flask import Blueprint, current_app, jsonify, render_template, request
+
+from ..config import (
+    KIOSK_ANALYSIS_INTERVAL_MS, KIOSK_CROP_MARGIN, KIOSK_GROUP_MAX_FACES, KIOSK_GROUP_MODE, KIOSK_GROUP_UPLOAD_MAX_SIDE,
+    KIOSK_MIN_FACE_FRACTION, KIOSK_STABLE_SAMPLES, KIOSK_UPLOAD_INTERVAL_MS, KIOSK_UPLOAD_JPEG_QUALITY, KIOSK_UPLOAD_MAX_SIDE
+)
+from ..extensions import sock
+from ..metrics import KIOSK_CONNECTIONS, KIOSK_FRAMES_DROPPED, RECOGNITION_OUTCOMES
+from ..services.recognition import (
+    KioskChannel, kiosk_memos, recognize_and_punch, recognize_group_and_punch, record_skipped_frames
+)
+from ..services.sites import kiosk_registry
+from ..services.uploads import image_upload
+
+bp = Blueprint('kiosk', __name__)
+
+@bp.route('/')
+def home():
+    """Renders the main home/kiosk page for punch-in/punch-out."""
+    kiosk_settings = {
+        'uploadMaxSide': KIOSK_UPLOAD_MAX_SIDE,
+        'jpegQuality': KIOSK_UPLOAD_JPEG_QUALITY,
+        'uploadIntervalMs': KIOSK_UPLOAD_INTERVAL_MS,
+        'analysisIntervalMs': KIOSK_ANALYSIS_INTERVAL_MS,
+        'minFaceFraction': KIOSK_MIN_FACE_FRACTION,
+        'cropMargin': KIOSK_CROP_MARGIN,
+        'stableSamples': KIOSK_STABLE_SAMPLES,
+        'groupMode': KIOSK_GROUP_MODE,
+        'groupMaxFaces': KIOSK_GROUP_MAX_FACES,
+        'groupUploadMaxSide': KIOSK_GROUP_UPLOAD_MAX_SIDE
+    }
+    return render_template('home.html', kiosk_settings=kiosk_settings)
+
+@bp.route('/kiosk/frame_stats', methods=['POST'])
+def kiosk_frame_stats():
+    """Records how many upload slots the kiosk pre-filter skipped since its last report."""
+    data = request.get_json(silent=True) or {}
+    if not record_skipped_frames(data.get('skipped')):
+        return jsonify({'success': False, 'message': 'Expected a "skipped" object.'}), 400
+    return jsonify({'success': True}), 200
+
+@sock.route('/kiosk/ws', bp=bp)
+def kiosk_socket(ws):
+    """
+    Long-lived recognition channel for one kiosk. Binary messages are JPEG frames, text
+    messages are JSON controls (mode, location, stats); replies are JSON result, rate and
+    error messages. When frames arrive faster than they are processed, only the newest
+    one waiting is recognized and the rest are dropped.
+    """
+    channel = KioskChannel(_kiosk_id(request.args))
+    KIOSK_CONNECTIONS.inc()
+    try:
+        ws.send(json.dumps(channel.rate_message(force=True)))
+        while True:
+            message = ws.receive()
+            frame, dropped = None, 0
+            while message is not None:
+                if isinstance(message, (bytes, bytearray)):
+                    dropped += frame is not None # Superseded before we got to it
+                    frame = message
+                else:
+                    for reply in channel.handle_control(message):
+                        ws.send(json.dumps(reply))
+                message = ws.receive(timeout=0) # Drain whatever queued up while we were busy
+
+            replies = []
+            if dropped:
+                KIOSK_FRAMES_DROPPED.inc(dropped)
+                replies += channel.fell_behind()
+            if frame is not None:
+                try:
+                    replies += channel.handle_frame(bytes(frame))
+                except Exception as e:
+                    RECOGNITION_OUTCOMES.labels(outcome='error').inc()
+                    current_app.logger.error(f"Kiosk socket recognition error: {str(e)}", exc_info=True)
+                    replies.append({'type': 'result', 'status': 500, 'success': False, 'confidence': 0.0,
+                                    'message': f"An internal server error occurred during recognition: {str(e)}"})
+            for reply in replies:
+                ws.send(json.dumps(reply))
+    finally:
+        KIOSK_CONNECTIONS.dec()
+
+def _kiosk_id(fields):
+    """The kiosk's self-assigned id (kept in its localStorage), or its address for clients that don't send one."""
+    return str(fields.get('kiosk_id') or request.remote_addr)[:64]
+
+def _coordinate(value):
+    """Latitude/longitude from JSON (a number) or a form/query string; None when missing or invalid."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _flag(value):
+    """A boolean from JSON (true) or a form/query string ("1", "true")."""
+    return value is True or str(value).lower() in ('1', 'true', 't')
+
+@bp.route('/auto_signin', methods=['POST'])
+def auto_signin():
+    """
+    Handles automatic punch-in/punch-out via face recognition. The frame arrives as a raw
+    image/jpeg body (fields in the query string), a multipart part named capturedPhoto, or
+    base64 under capturedPhoto in JSON (older kiosks). With group set, everyone in the frame
+    is punched and the response lists a result per person.
+    """
+    try:
+        image_bytes, fields = image_upload('capturedPhoto')
+        action = fields.get('action', 'punchin')
+        latitude = _coordinate(fields.get('latitude'))
+        longitude = _coordinate(fields.get('longitude'))
+
+        if not image_bytes:
+            RECOGNITION_OUTCOMES.labels(outcome='no_image').inc()
+            return jsonify({'success': False, 'message': 'No image received for recognition.'}), 400
+
+        kiosk_id = _kiosk_id(fields)
+        recognize = recognize_group_and_punch if _flag(fields.get('group')) else recognize_and_punch
+        body, status = recognize(
+            image_bytes, action, latitude, longitude,
+            memo=kiosk_memos.for_kiosk(kiosk_id), site_id=kiosk_registry.site_for(kiosk_id), kiosk_id=kiosk_id
+        )
+        return jsonify(body), status
+
+    except Exception as e:
+        RECOGNITION_OUTCOMES.labels(outcome='error').inc()
+        current_app.logger.error(f"Auto sign-in error: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f"An internal server error occurred during recognition: {str(e)}", 'confidence': 0.0}), 500
@@ -0,0 +1,50 @@
+"""Health, readiness and metrics probes plus static assets every role serves."""
+import os
+
+from flask import Blueprint, Response, current_app, jsonify, send_from_directory
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from ..config import UPLOAD_FOLDER
+from ..services import faces
+
+bp = Blueprint('system', __name__)
+
+@bp.route('/service-worker.js')
+def service_worker():
+    """Serves the service worker file."""
+    return send_from_directory('static/js', 'service-worker.js', mimetype='application/javascript')
+
+@bp.route('/manifest.json')
+def manifest():
+    """Serves the PWA manifest file."""
+    return send_from_directory('static', 'manifest.json', mimetype='application/manifest+json')
+
+@bp.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({'status': 'ok'}), 200
+
+@bp.route('/readyz')
+def readyz():
+    """Readiness probe: only ready once the face models and gallery are warm."""
+    if not faces.is_ready(current_app.config['ARGUS_ROLE']):
+        return jsonify({'status': 'warming', 'models': faces.models_warm, 'gallery': faces.face_gallery.is_loaded}), 503
+    return jsonify({'status': 'ready', 'gallery_size': len(faces.face_gallery)}), 200
+
+@bp.route('/metrics')
+def metrics():
+    """Exposes request, stage, recognition and MongoDB metrics in Prometheus text format."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Aggregate the samples written by every worker process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+@bp.route('/static/uploads/faces/<filename>')
+def uploaded_file(filename):
+    """Serves uploaded face images (should be secured in production)."""
+    # In a production environment, this endpoint should be secured with proper
+    # authentication and authorization checks, or images should be served via
+    # pre-signed URLs from object storage.
+    return send_from_directory(os.path.join(UPLOAD_FOLDER, 'faces'), filename)
@@ -0,0 +1,52 @@
+"""Maintenance commands, run with `flask --app app <command>`."""
+import click
+
+from .services import faces, maintenance
+
+@click.command('backfill-regularization-originals')
+def backfill_regularization_originals():
+    """One-off migration: stores original punch times on existing regularized records."""
+    updated = maintenance.backfill_regularization_originals()
+    print(f"Backfilled original punch times on {updated} regularized records.")
+
+@click.command('backfill-active-punches')
+def backfill_active_punches():
+    """Flags open punch-ins from before the active punch index. Startup (bootstrap) runs this too."""
+    updated = maintenance.backfill_active_punches()
+    print(f"Flagged {updated} open punch-ins as active.")
+
+@click.command('migrate-attendance-dates')
+def migrate_attendance_dates():
+    """Converts attendance dates and punch times stored as ISO strings to native dates. Safe to run online."""
+    migrated, skipped = maintenance.migrate_attendance_dates()
+    print(f"Migrated {migrated} attendance records to native dates; skipped {skipped}.")
+
+@click.command('recompute-attendance-shifts')
+@click.option('--start', default=None, help='First day to restamp (YYYY-MM-DD); default: the earliest.')
+@click.option('--end', default=None, help='Last day to restamp (YYYY-MM-DD); default: the latest.')
+@click.option('--emp-id', default=None, help='Restamp one employee only.')
+def recompute_attendance_shifts(start, end, emp_id):
+    """Restamps lateness and worked time on attendance after shift definitions or assignments change."""
+    updated = maintenance.recompute_attendance_shifts(start, end, emp_id)
+    print(f"Restamped lateness and worked time on {updated} attendance records.")
+
+@click.command('migrate-face-encodings')
+def migrate_face_encodings():
+    """Converts stored face encodings to packed float32 Binary (schema version 2)."""
+    migrated, skipped = maintenance.migrate_face_encodings()
+    print(f"Migrated {migrated} face encodings; skipped {skipped} malformed ones.")
+
+@click.command('compact-face-gallery')
+def compact_face_gallery():
+    """Writes a fresh on-disk face gallery snapshot for this host's workers to map."""
+    manifest = faces.compact_face_gallery()
+    print(f"Face gallery snapshot is at users version {manifest['version']}.")
+
+def init_app(app):
+    """Registers the maintenance commands on `app`."""
+    app.cli.add_command(backfill_regularization_originals)
+    app.cli.add_command(backfill_active_punches)
+    app.cli.add_command(migrate_attendance_dates)
+    app.cli.add_command(recompute_attendance_shifts)
+    app.cli.add_command(migrate_face_encodings)
+    app.cli.add_command(compact_face_gallery)
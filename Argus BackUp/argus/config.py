@@ -0,0 +1,91 @@
+"""Settings read from the environment (.env) plus fixed tuning and validation constants."""
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Process role: "recognition" serves the kiosk, "web" serves admin/employee pages and never
+# loads the face models, "all" (the default) serves everything. See blueprints.ROLE_BLUEPRINTS.
+ARGUS_ROLE = os.getenv("ARGUS_ROLE", "all").lower()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Holds templates/ and static/
+UPLOAD_FOLDER = 'static/uploads'
+
+# MongoDB Configuration
+MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = "face_recognition_data"
+# Pool limits are per worker process: size them to the worker's threads, not the whole server
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "10"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "1")) # Keep one warm connection per worker
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")) # Fail fast when the pool is exhausted
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")) # Long enough for a full export
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib") # Negotiated with the server in this order
+# Admin dashboards and exports read from secondaries no more than this far behind (minimum 90)
+MONGO_REPORT_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_REPORT_MAX_STALENESS_SECONDS", "120"))
+
+# --- Constants for Configuration and Validation ---
+MIN_PASSWORD_LENGTH = 8
+MIN_EMPLOYEE_ID_LENGTH = 3
+MIN_ADMIN_ID_LENGTH = 3
+MIN_ADMIN_PASSWORD_LENGTH = 8
+FACE_RECOGNITION_TOLERANCE = 0.5 # Lower means stricter face match
+BEST_MATCH_SCORE_THRESHOLD = 0.6 # Minimum confidence for auto-signin
+FACE_ENCODING_DIMENSIONS = 128 # Length of a face_recognition (dlib) face descriptor
+FACE_ENCODING_VERSION = 2 # users.face_encoding format: 1 = BSON array of doubles, 2 = packed little-endian float32 Binary
+MAX_FACE_ENCODINGS_PER_EMPLOYEE = 5 # Enrollment encoding plus up to 4 learned from kiosk punches
+# Learning extra encodings from confident kiosk punches (off unless FACE_LEARNING_ENABLED is set)
+FACE_LEARNING_ENABLED = os.getenv("FACE_LEARNING_ENABLED", "False").lower() in ("true", "1", "t")
+FACE_LEARNING_MIN_SCORE = 0.7 # Stricter than BEST_MATCH_SCORE_THRESHOLD so borderline matches never teach
+FACE_LEARNING_MIN_MARGIN = 0.1 # Runner-up employee must be at least this much further away
+FACE_LEARNING_MIN_NOVELTY = 0.08 # Skip probes nearly identical to an encoding already stored
+FACE_LEARNING_INTERVAL_HOURS = 24 # At most one learned encoding per employee per interval
+USERS_VERSION_CHECK_SECONDS = 5 # How often a worker checks whether the users collection changed
+USERS_CHANGE_LOG_SIZE = 1000 # emp_ids of the latest users version bumps kept in app_meta for incremental refreshes
+# On-disk face gallery snapshot, memory-mapped read-only by every worker on the host
+FACE_GALLERY_DIR = os.getenv("FACE_GALLERY_DIR", os.path.join(BASE_DIR, 'instance', 'face_gallery'))
+FACE_GALLERY_COMPACT_AFTER = 200 # Employees changed since the snapshot before a new one is built in the background
+EMPLOYEE_PROFILE_CACHE_SIZE = 10000 # Max employee profiles held per worker (LRU eviction)
+MIGRATION_BATCH_SIZE = 500 # Documents per bulk_write in maintenance commands
+GEOCODE_CACHE_SIZE = 1024 # Resolved addresses kept per worker
+GEOCODE_CACHE_PRECISION = 4 # Decimal places of lat/lon in the cache key (~11 m)
+NAME_SEARCH_MAX_IN_IDS = 500 # Above this many name matches, filter with a join instead of a huge $in
+# Kiosk client pre-filter: frames are checked on the device and only uploaded with a stable face in view
+KIOSK_UPLOAD_MAX_SIDE = int(os.getenv("KIOSK_UPLOAD_MAX_SIDE", "480")) # Longest side (px) of the cropped upload
+KIOSK_UPLOAD_JPEG_QUALITY = 0.85
+KIOSK_UPLOAD_INTERVAL_MS = 1500 # At most one upload per interval, the previous fixed cadence
+KIOSK_ANALYSIS_INTERVAL_MS = 250 # How often the client samples the camera for presence and stability
+KIOSK_MIN_FACE_FRACTION = 0.12 # Face width relative to the frame; smaller faces are too far away to match
+KIOSK_CROP_MARGIN = 0.5 # Face box grows by this fraction of its size on every side before cropping
+KIOSK_STABLE_SAMPLES = 2 # Consecutive samples the face (or scene) must hold still before an upload
+KIOSK_SKIPPED_REPORT_MAX = 10000 # Upper bound on one client report, per reason
+# Group mode: kiosks upload whole frames and everyone in view is recognized and punched together
+KIOSK_GROUP_MODE = os.getenv("KIOSK_GROUP_MODE", "False").lower() in ("true", "1", "t") # Default for kiosks that don't ask
+KIOSK_GROUP_MAX_FACES = 6 # Largest faces per frame that are encoded; anyone else waits for the next frame
+KIOSK_GROUP_UPLOAD_MAX_SIDE = 960 # Whole-frame uploads need more pixels per face than a face crop
+# Kiosk WebSocket channel (/kiosk/ws): one long-lived connection per kiosk carrying binary frames
+KIOSK_WS_MIN_INTERVAL_MS = 500 # Fastest frame rate the server asks a kiosk for
+KIOSK_WS_MAX_INTERVAL_MS = 4000 # Slowest, reached when frames are dropped or processing is slow
+KIOSK_WS_MAX_FRAME_BYTES = 2 * 1024 * 1024 # Larger messages close the connection
+KIOSK_WS_PING_SECONDS = 25 # Keeps idle kiosk connections open through proxies
+# Per-kiosk recognition memo: recent confident matches reused for near-identical consecutive frames
+KIOSK_MEMO_TTL_SECONDS = 5 # A memo entry is trusted this long after its full gallery match
+KIOSK_MEMO_SIZE = 8 # Most recent people remembered per kiosk
+KIOSK_MEMO_DISTANCE = 0.3 # Max face distance to a memo entry; well inside FACE_RECOGNITION_TOLERANCE
+MAX_TRACKED_KIOSKS = 512 # Kiosks whose memo or site lookup a worker keeps (LRU eviction)
+# Live presence table (who is punched in now), held per worker process
+PRESENCE_SYNC_SECONDS = 5 # How often a worker picks up punches recorded by other workers
+PRESENCE_SYNC_OVERLAP_SECONDS = 30 # Each sync re-reads this much before the last one (clock skew, slow writes)
+PRESENCE_REBUILD_SECONDS = 600 # Full rebuild from today's attendance, catching changes a sync can't see (deletions)
+# Sites: employees carry users.site_ids, kiosks are registered to one site in the kiosks collection
+KIOSK_SITE_CACHE_SECONDS = 60 # How long a worker trusts its kiosk -> site lookup
+MAX_SITE_ID_LENGTH = 64
+# Shifts: the shifts collection defines them per department, users.shift_id assigns one to an employee
+DEFAULT_SHIFT_START = os.getenv("DEFAULT_SHIFT_START", "09:00") # For employees no shift covers
+DEFAULT_SHIFT_END = os.getenv("DEFAULT_SHIFT_END", "17:00")
+SHIFT_CACHE_SECONDS = 60 # How long a worker trusts its copy of the shift definitions
+MAX_SHIFT_ID_LENGTH = 64
@@ -0,0 +1,22 @@
+"""
+Lazily imported dependencies.
+
+face_recognition (dlib models), numpy, pandas and requests dominate startup time and
+memory, so they are imported on first use through these accessors.
+"""
+
+def face_recognition():
+    import face_recognition as module
+    return module
+
+def numpy():
+    import numpy as module
+    return module
+
+def pandas():
+    import pandas as module
+    return module
+
+def requests():
+    import requests as module
+    return module
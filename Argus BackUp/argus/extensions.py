@@ -0,0 +1,137 @@
+"""Process-wide handles shared by the blueprints and services."""
+import os
+import threading
+
+from flask_sock import Sock
+from pymongo import MongoClient
+from pymongo.read_preferences import SecondaryPreferred
+from pymongo.server_type import SERVER_TYPE
+
+from .config import (
+    ARGUS_ROLE, MONGO_COMPRESSORS, MONGO_CONNECT_TIMEOUT_MS, MONGO_DB_NAME, MONGO_MAX_IDLE_TIME_MS, MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE, MONGO_REPORT_MAX_STALENESS_SECONDS, MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_URI, MONGO_WAIT_QUEUE_TIMEOUT_MS
+)
+from .metrics import MongoCommandMetrics, MongoPoolMetrics
+
+# Read-only admin and report queries tolerate slightly stale data; a replica set serves them from a
+# secondary (or the primary when none is available), a standalone server ignores the preference
+REPORT_READ_PREFERENCE = SecondaryPreferred(max_staleness=MONGO_REPORT_MAX_STALENESS_SECONDS)
+
+def client_options():
+    """Keyword arguments for MongoClient: pool sizing, timeouts, compression and monitoring."""
+    return {
+        'appname': f"argus-{ARGUS_ROLE}", # Shows up in server logs and currentOp
+        'maxPoolSize': MONGO_MAX_POOL_SIZE,
+        'minPoolSize': MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': MONGO_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': MONGO_SOCKET_TIMEOUT_MS,
+        'compressors': MONGO_COMPRESSORS,
+        'event_listeners': [MongoCommandMetrics(), MongoPoolMetrics()]
+    }
+
+class Mongo:
+    """
+    The MongoClient and the collections the app uses. The client is created on first use,
+    so importing the package or building the app never opens a connection, and it is
+    discarded in every forked child so each worker builds its own pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._db = None
+        self._bound_db = None # Set by use_database()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._forget_client)
+
+    def _forget_client(self):
+        # A client copied across fork shares sockets with the parent and must not be used or closed
+        # here; drop the reference (and a lock another thread may have held) and connect afresh
+        self._lock = threading.Lock()
+        self._client = None
+        self._db = None
+
+    @property
+    def client(self):
+        if self._bound_db is not None:
+            return self._bound_db.client # Sessions must come from the client holding the bound database
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = MongoClient(MONGO_URI, **client_options())
+        return self._client
+
+    @property
+    def db(self):
+        if self._bound_db is not None:
+            return self._bound_db
+        if self._db is None:
+            self._db = self.client[MONGO_DB_NAME]
+        return self._db
+
+    @property
+    def supports_transactions(self):
+        """
+        False when connected to a standalone mongod, which can't run multi-document transactions.
+        Servers not yet discovered count as capable, so check after the request's first query.
+        """
+        servers = self.client.topology_description.server_descriptions().values()
+        return not any(server.server_type == SERVER_TYPE.Standalone for server in servers)
+
+    def use_database(self, database):
+        """Points every collection, and client, at an existing database object (benchmarks and tests); None unbinds."""
+        self._bound_db = database
+
+    def close(self):
+        """Closes pooled connections; the next use connects again. Call before forking workers."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+            self._db = None
+
+    @property
+    def users(self):
+        return self.db["users"]
+
+    @property
+    def attendance(self):
+        return self.db["attendance"]
+
+    @property
+    def admins(self):
+        return self.db["admins"]
+
+    @property
+    def password_reset_tokens(self):
+        return self.db["password_reset_tokens"]
+
+    @property
+    def kiosks(self):
+        return self.db["kiosks"] # Registered kiosks and the site each serves
+
+    @property
+    def shifts(self):
+        return self.db["shifts"] # Shift definitions, by department or assigned through users.shift_id
+
+    @property
+    def app_meta(self):
+        return self.db["app_meta"] # Small bookkeeping documents (e.g. cache versions)
+
+    @property
+    def report_users(self):
+        """users for read-only admin listings and exports, served by a secondary when possible."""
+        return self.users.with_options(read_preference=REPORT_READ_PREFERENCE)
+
+    @property
+    def report_attendance(self):
+        """attendance for dashboards, reports and exports, served by a secondary when possible."""
+        return self.attendance.with_options(read_preference=REPORT_READ_PREFERENCE)
+
+mongo = Mongo()
+
+sock = Sock() # WebSocket routes (the kiosk recognition channel)
@@ -0,0 +1,157 @@
+"""
+Prometheus metrics and the hooks that record them.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR so every worker writes
+its samples to a shared directory and /metrics aggregates them.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+REQUEST_LATENCY = Histogram(
+    'argus_request_duration_seconds', 'HTTP request latency by route.',
+    ['route', 'method', 'status']
+)
+STAGE_LATENCY = Histogram(
+    'argus_stage_duration_seconds', 'Latency of named processing stages within a route.',
+    ['route', 'stage'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+RECOGNITION_OUTCOMES = Counter(
+    'argus_recognition_outcomes_total', 'Face recognition results on the kiosk path.',
+    ['outcome']
+)
+FACE_ENCODINGS_LEARNED = Counter(
+    'argus_face_encodings_learned_total', 'Encodings added to employees\' sets from confident kiosk punches.'
+)
+FACE_GALLERY_COMPACTIONS = Counter(
+    'argus_face_gallery_compactions_total', 'Face gallery snapshots written to disk, by what triggered them.',
+    ['trigger'] # missing, unlogged_changes, delta, command
+)
+KIOSK_FRAMES_SKIPPED = Counter(
+    'argus_kiosk_frames_skipped_total', 'Kiosk upload slots the client pre-filter skipped instead of sending a frame.',
+    ['reason'] # no_face, face_too_small, unstable
+)
+KIOSK_FRAMES_DROPPED = Counter(
+    'argus_kiosk_frames_dropped_total', 'WebSocket kiosk frames discarded unprocessed because a newer frame had arrived.'
+)
+KIOSK_CONNECTIONS = Gauge(
+    'argus_kiosk_connections', 'Open kiosk WebSocket connections.',
+    multiprocess_mode='livesum'
+)
+KIOSK_MEMO_LOOKUPS = Counter(
+    'argus_kiosk_memo_lookups_total', 'Per-kiosk recognition memo lookups (a hit skips the gallery scan).',
+    ['result'] # hit, miss
+)
+GALLERY_LOOKUPS = Counter(
+    'argus_gallery_lookups_total', 'Kiosk gallery searches by scope (site partition or global gallery).',
+    ['scope', 'result'] # scope: site, global; result: match, no_match
+)
+GEOCODE_CACHE_RESULTS = Counter(
+    'argus_geocode_cache_total', 'Reverse geocoding cache lookups.',
+    ['result']
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    'argus_mongo_command_duration_seconds', 'MongoDB command round-trip time.',
+    ['command', 'outcome'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    'argus_mongo_pool_checkout_seconds', 'Time spent waiting for a pooled MongoDB connection.',
+    ['outcome'], # "success" or the pymongo failure reason (timeout, connectionError, poolClosed)
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+@contextmanager
+def stage_timer(stage):
+    """Times a block of work and records it under the current route and the given stage name."""
+    route = request.endpoint if has_request_context() and request.endpoint else 'none'
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(route=route, stage=stage).observe(time.perf_counter() - started)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records the duration of every MongoDB command, labelled by command name and outcome."""
+
+    def started(self, event):
+        pass # Durations are reported on completion
+
+    def succeeded(self, event):
+        MONGO_COMMAND_LATENCY.labels(command=event.command_name, outcome='success').observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_LATENCY.labels(command=event.command_name, outcome='failure').observe(event.duration_micros / 1e6)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Records how long each connection checkout waited. Checkout events are published on the
+    thread doing the checkout, so the start time is kept per thread and per server.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _started_at(self):
+        started = getattr(self._local, 'started', None)
+        if started is None:
+            started = self._local.started = {}
+        return started
+
+    def connection_check_out_started(self, event):
+        self._started_at()[event.address] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = self._started_at().pop(event.address, None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(outcome='success').observe(time.perf_counter() - started)
+
+    def connection_check_out_failed(self, event):
+        started = self._started_at().pop(event.address, None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(outcome=event.reason).observe(time.perf_counter() - started)
+
+    # Only checkout timing is recorded; the remaining pool events are ignored
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+def _record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched' # Route templates keep label cardinality bounded
+        REQUEST_LATENCY.labels(route=route, method=request.method, status=response.status_code).observe(time.perf_counter() - started)
+    return response
+
+def init_app(app):
+    """Records the latency of every request served by `app`."""
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request_latency)
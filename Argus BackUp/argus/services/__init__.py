@@ -0,0 +1 @@
+"""Shared service layer: face, user, geocoding, mail and export logic used by the blueprints."""
@@ -0,0 +1,90 @@
+"""
+Attendance dates and times as native BSON dates.
+
+attendance.date holds the day's midnight; punch_in, punch_out, original_punch_in/out,
+regularized_at and updated_at hold the moment. Like the ISO strings they replace, they are the
+server's local wall-clock time without a zone, so server-side formatting (which works in UTC)
+gives back the same wall-clock values.
+
+Records written before the change hold ISO strings until `flask migrate-attendance-dates`
+converts them; meanwhile the day filters below match both forms and the aggregation
+expressions coerce strings.
+"""
+import datetime
+
+DAY_FORMAT = '%Y-%m-%d'
+TIME_FORMAT = '%H:%M:%S'
+SHORT_TIME_FORMAT = '%H:%M'
+DISPLAY_DAY_FORMAT = '%d %b %Y'
+
+ATTENDANCE_TIME_FIELDS = ('date', 'punch_in', 'punch_out', 'original_punch_in', 'original_punch_out', 'regularized_at', 'updated_at')
+
+def local_now():
+    """The current local time, at the millisecond precision a BSON date keeps."""
+    now = datetime.datetime.now()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def day(value=None):
+    """
+    A day as stored in attendance.date: the midnight of a date, datetime or ISO string (today
+    by default). Raises ValueError for a malformed string.
+    """
+    if value is None:
+        value = datetime.date.today()
+    elif isinstance(value, datetime.datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = datetime.date.fromisoformat(value[:10])
+    return datetime.datetime.combine(value, datetime.time())
+
+def as_datetime(value):
+    """A stored time as a datetime, native or a legacy ISO string; None when missing or unreadable."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+def on_days(*days):
+    """An attendance.date condition matching any of the days, in either stored form."""
+    days = [day(value) for value in days]
+    return {"$in": days + [value.date().isoformat() for value in days]}
+
+def between_days(start=None, end=None):
+    """
+    A query fragment (merge it with update()) for records dated from start to end, ISO days
+    that are inclusive and may each be empty, in either stored form. Raises ValueError for a
+    malformed day.
+    """
+    native, legacy = {}, {}
+    for operator, value in (('$gte', start), ('$lte', end)):
+        if value:
+            native[operator] = day(value)
+            legacy[operator] = native[operator].date().isoformat()
+    if not native:
+        return {}
+    return {"$or": [{"date": native}, {"date": legacy}]}
+
+def as_date(expression):
+    """Aggregation expression: a stored time as a date (legacy strings parsed to the second), null if missing."""
+    return {"$switch": {
+        "branches": [
+            {"case": {"$eq": [{"$type": expression}, "date"]}, "then": expression},
+            {"case": {"$eq": [{"$type": expression}, "string"]},
+             "then": {"$dateFromString": {"dateString": {"$substrCP": [expression, 0, 19]}, "onError": None}}}
+        ],
+        "default": None
+    }}
+
+def formatted(expression, date_format, missing='-'):
+    """Aggregation expression: a stored time formatted with $dateToString, or missing when there is none."""
+    return {"$dateToString": {"format": date_format, "date": as_date(expression), "onNull": missing}}
+
+def minutes_between(start, end):
+    """Aggregation expression: whole minutes from one stored time to another, null if either is missing."""
+    # Counted in seconds: $dateDiff in minutes counts minute boundaries crossed, not minutes elapsed
+    seconds = {"$dateDiff": {"startDate": as_date(start), "endDate": as_date(end), "unit": "second"}}
+    return {"$trunc": {"$divide": [seconds, 60]}}
@@ -0,0 +1,45 @@
+"""CSV / XLSX download responses for the admin exports."""
+import csv
+import io
+
+from flask import Response
+
+from .. import deps
+
+def export_data(data, headers, filename, format_type='csv'):
+    """Exports data to CSV or XLSX format."""
+    if format_type == 'csv':
+        si = io.StringIO()
+        cw = csv.writer(si)
+        cw.writerow(headers)
+        cw.writerows(data)
+        output = si.getvalue()
+        mimetype = "text/csv"
+        filename = f"{filename}.csv"
+    elif format_type in ['xlsx', 'excel']:
+        pd = deps.pandas()
+        output = io.BytesIO()
+        df = pd.DataFrame(data, columns=headers)
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            df.to_excel(writer, index=False, sheet_name='Sheet1')
+            worksheet = writer.sheets['Sheet1']
+
+            # Auto-adjust column width
+            for idx, col in enumerate(df.columns):
+                max_len = 0
+                if df[col].astype(str).any(): # Check if Series is not empty
+                    max_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
+                else: # Handle case of empty column
+                    max_len = len(col) + 2
+                worksheet.set_column(idx, idx, max_len)
+        output.seek(0)
+        mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        filename = f"{filename}.xlsx"
+    else:
+        raise ValueError("Invalid export format specified. Must be 'csv' or 'xlsx'.")
+
+    return Response(
+        output,
+        mimetype=mimetype,
+        headers={"Content-disposition": f"attachment; filename={filename}"}
+    )
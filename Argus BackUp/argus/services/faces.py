@@ -0,0 +1,551 @@
+"""Face image handling, the face gallery and model warm-up."""
+import datetime
+import io
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from bson import Binary
+
+from .. import deps
+from ..config import (
+    ARGUS_ROLE, FACE_ENCODING_DIMENSIONS, FACE_ENCODING_VERSION, FACE_LEARNING_ENABLED, FACE_LEARNING_INTERVAL_HOURS,
+    FACE_LEARNING_MIN_MARGIN, FACE_LEARNING_MIN_NOVELTY, FACE_LEARNING_MIN_SCORE, FACE_RECOGNITION_TOLERANCE,
+    FACE_GALLERY_COMPACT_AFTER, MAX_FACE_ENCODINGS_PER_EMPLOYEE, UPLOAD_FOLDER, USERS_VERSION_CHECK_SECONDS
+)
+from ..extensions import mongo
+from ..metrics import FACE_ENCODINGS_LEARNED, FACE_GALLERY_COMPACTIONS, stage_timer
+from . import gallery_snapshots
+from .users import bump_users_version, get_users_changes, get_users_version, register_users_view
+
+logger = logging.getLogger(__name__)
+
+models_warm = False # Set once the face models have run in this process (or its preloading parent)
+
+FACE_ENCODING_DTYPE = '<f4' # Explicit little-endian so stored bytes decode the same on any host
+FACE_ENCODING_BYTES = FACE_ENCODING_DIMENSIONS * 4
+
+def pack_face_encoding(encoding):
+    """Packs a face encoding into the 512-byte float32 Binary stored in users.face_encoding."""
+    np = deps.numpy()
+    return Binary(np.asarray(encoding, dtype=FACE_ENCODING_DTYPE).tobytes())
+
+def unpack_face_encoding(stored):
+    """
+    Returns a stored encoding as a float32 vector: a zero-copy view over packed bytes, or a
+    conversion of a legacy (version 1) array that hasn't been migrated yet.
+    """
+    np = deps.numpy()
+    if isinstance(stored, (bytes, bytearray, memoryview)):
+        return np.frombuffer(stored, dtype=FACE_ENCODING_DTYPE)
+    return np.asarray(stored, dtype=np.float32)
+
+def face_encoding_fields(encoding):
+    """The users document fields that store a freshly computed encoding."""
+    return {"face_encoding": pack_face_encoding(encoding), "face_encoding_version": FACE_ENCODING_VERSION}
+
+def save_image(image_bytes, filename):
+    """Saves uploaded image bytes under the faces upload folder. Returns the path, or None on failure."""
+    try:
+        filepath = os.path.join(UPLOAD_FOLDER, 'faces', filename)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True) # Ensure directory exists
+
+        with stage_timer('disk_write'):
+            with open(filepath, 'wb') as f:
+                f.write(image_bytes)
+        return filepath
+    except Exception as e:
+        logger.error(f"Error saving image {filename}: {e}")
+        return None
+
+def load_image(image_bytes):
+    """Decodes uploaded image bytes into an RGB array in memory, without a temporary file."""
+    with stage_timer('load_image'):
+        return deps.face_recognition().load_image_file(io.BytesIO(image_bytes))
+
+class DuplicateFaceError(ValueError):
+    """Raised when an enrollment photo matches faces already registered; emp_ids lists them all, closest first."""
+
+    def __init__(self, emp_ids):
+        self.emp_ids = list(emp_ids)
+        super().__init__(f"This face is already registered with employee ID(s): {', '.join(self.emp_ids)}")
+
+def process_and_encode_face(image_bytes, emp_id, pending_encodings=None):
+    """
+    Handles saving the uploaded image bytes, detecting and encoding face, and checking for duplicates.
+    pending_encodings maps emp_id -> encoding for faces enrolled earlier in the same batch
+    that the gallery hasn't loaded yet (bulk import).
+    Returns the users fields holding the encoding (dict) and image_path (str) on success.
+    Raises ValueError for errors like no face detected, DuplicateFaceError for duplicate faces.
+    """
+    if not image_bytes:
+        raise ValueError("No photo data received.")
+
+    face_recognition = deps.face_recognition()
+
+    filename = f"{emp_id}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
+    image_path = save_image(image_bytes, filename) # Kept as the employee's profile photo
+
+    if not image_path:
+        raise ValueError("Failed to save image.")
+
+    try:
+        image = load_image(image_bytes) # Decoded from memory rather than read back from disk
+        with stage_timer('encode'):
+            encodings = face_recognition.face_encodings(image)
+
+        if not encodings:
+            raise ValueError("No face detected in the captured photo. Please try again.")
+
+        new_encoding = encodings[0]
+
+        # One distance computation against every enrolled employee, plus the not-yet-loaded batch
+        with stage_timer('duplicate_check'):
+            conflicts = face_gallery.find_duplicates(new_encoding, exclude_emp_id=emp_id)
+            if pending_encodings:
+                np = deps.numpy()
+                pending_ids = [pid for pid in pending_encodings if pid != emp_id]
+                if pending_ids:
+                    pending = np.stack([pending_encodings[pid] for pid in pending_ids]).astype(np.float32)
+                    distances = np.linalg.norm(pending - np.asarray(new_encoding, dtype=np.float32), axis=1)
+                    conflicts += [pending_ids[i] for i in np.flatnonzero(distances <= FACE_RECOGNITION_TOLERANCE)]
+        if conflicts:
+            raise DuplicateFaceError(conflicts)
+
+        return face_encoding_fields(new_encoding), image_path
+
+    except Exception as e:
+        # Ensure cleanup if an error occurs during processing
+        if os.path.exists(image_path):
+            os.remove(image_path)
+        raise e # Re-raise the exception after cleanup
+
+class FaceMatch(namedtuple('FaceMatch', ['user', 'score', 'margin', 'nearest_stored_distance'])):
+    """
+    Result of FaceGallery.best_match. score is 1 - distance to the best employee; margin is how
+    much further away the runner-up employee is; nearest_stored_distance is the distance to the
+    closest individual stored encoding of the best employee (ignoring its centroid).
+    """
+    __slots__ = ()
+
+NO_MATCH = FaceMatch(None, 0.0, 0.0, 0.0)
+
+def _packed_or_none(stored):
+    """Returns a stored encoding as packed float32 bytes, or None if it is malformed."""
+    if isinstance(stored, bytes):
+        return stored if len(stored) == FACE_ENCODING_BYTES else None
+    if stored and len(stored) == FACE_ENCODING_DIMENSIONS:
+        return pack_face_encoding(stored) # Legacy array awaiting migrate-face-encodings
+    return None
+
+# One segment of the gallery. users: [{'emp_id', 'full_name', 'image_path', 'site_ids', 'rows'}];
+# encodings: every row, float32, grouped by employee in users order; offsets: each employee's first
+# row; centroids: one row per employee; site_members: site_id -> indices into users;
+# partitions: site_id -> the segment restricted to that site, built on first use
+_GallerySnapshot = namedtuple('_GallerySnapshot', ['users', 'encodings', 'offsets', 'centroids', 'site_members', 'partitions'])
+
+# What a lookup searches, swapped as a whole so readers never mix two loads: base is the mapped
+# on-disk snapshot, overlay the employees changed since it was written, shadowed marks base
+# employees the overlay replaces or removes (None when there are none), size counts live employees
+_GalleryView = namedtuple('_GalleryView', ['base', 'overlay', 'shadowed', 'size', 'partitions'])
+
+def _empty_snapshot():
+    return _GallerySnapshot([], None, None, None, {}, {})
+
+_EMPTY_VIEW = _GalleryView(_empty_snapshot(), _empty_snapshot(), None, 0, {})
+
+def _load_gallery_users(query):
+    """Reads the users matching query that have encodings. Returns (users, packed_rows)."""
+    users, packed_rows = [], []
+    for user in mongo.users.find(
+        {**query, "face_encoding": {"$ne": []}}, # Only users with stored encodings
+        {"emp_id": 1, "full_name": 1, "image_path": 1, "face_encoding": 1, "learned_face_encodings": 1, "site_ids": 1}
+    ):
+        primary = _packed_or_none(user.get('face_encoding'))
+        if primary is None:
+            logger.error(f"Skipping malformed face encoding for user {user.get('emp_id', 'N/A')}")
+            continue
+        learned = [p for p in map(_packed_or_none, user.get('learned_face_encodings') or []) if p is not None]
+        users.append({
+            'emp_id': user['emp_id'], 'full_name': user.get('full_name'), 'image_path': user.get('image_path'),
+            'site_ids': sorted(set(user.get('site_ids') or [])), 'rows': 1 + len(learned)
+        })
+        packed_rows.append(primary)
+        packed_rows.extend(learned)
+    return users, packed_rows
+
+def _segment(users, encodings, centroids=None):
+    """Builds a segment over users and their encoding rows, computing centroids unless given."""
+    np = deps.numpy()
+    counts = np.array([user['rows'] for user in users], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1])) if len(counts) else counts
+    if centroids is None:
+        if len(counts):
+            centroids = (np.add.reduceat(encodings, offsets, axis=0) / counts[:, None]).astype(np.float32)
+        else:
+            centroids = encodings.copy()
+    site_members = {}
+    for index, user in enumerate(users):
+        for site_id in user['site_ids']:
+            site_members.setdefault(site_id, []).append(index)
+    site_members = {site_id: np.array(members, dtype=np.int64) for site_id, members in site_members.items()}
+    return _GallerySnapshot(users, encodings, offsets, centroids, site_members, {})
+
+def _segment_from_rows(users, packed_rows):
+    np = deps.numpy()
+    # One buffer for every encoding, viewed as an R x 128 float32 matrix without per-element objects
+    encodings = np.frombuffer(b''.join(packed_rows), dtype=FACE_ENCODING_DTYPE).reshape(-1, FACE_ENCODING_DIMENSIONS)
+    return _segment(users, encodings)
+
+def compact_face_gallery(blocking=True, trigger='command'):
+    """
+    Writes a snapshot of every enrolled face at the current users version and makes it the one
+    workers map. Only one process on the host compacts at a time: with blocking=False this returns
+    None at once if another is busy. Returns the manifest now current.
+    """
+    with gallery_snapshots.compaction_lock(blocking) as acquired:
+        if not acquired:
+            return None
+        manifest = gallery_snapshots.read_manifest()
+        version = get_users_version() # Read before the scan: later writes reach workers through their overlays
+        if manifest and manifest['version'] == version:
+            return manifest # Another process wrote it while we waited for the lock
+        with stage_timer('gallery_compaction'):
+            snapshot = _segment_from_rows(*_load_gallery_users({}))
+            gallery_snapshots.write_snapshot(version, snapshot.users, snapshot.encodings, snapshot.centroids)
+        FACE_GALLERY_COMPACTIONS.labels(trigger=trigger).inc()
+        logger.info(f"Wrote face gallery snapshot for users version {version} ({len(snapshot.users)} employees)")
+        return gallery_snapshots.read_manifest()
+
+class FaceGallery:
+    """
+    Matrices of every enrolled face encoding, so recognition is a single vectorized distance
+    computation instead of a per-user loop over Mongo documents.
+
+    Each employee has a small set of encodings (the enrollment photo plus any learned from
+    confident punches), stored as one contiguous block of rows, and a precomputed centroid.
+    An employee's distance is the minimum over its centroid and every encoding in its set.
+
+    The bulk of the gallery is an on-disk snapshot (see gallery_snapshots) that every worker
+    maps read-only, so workers share one copy through the page cache and start without a full
+    scan of users. Employees changed since the snapshot (known from the users change log) are
+    loaded into a small in-memory overlay that shadows their snapshot rows. Once the overlay
+    reaches FACE_GALLERY_COMPACT_AFTER employees, one process writes the next snapshot in the
+    background and the others remap it on their next check.
+
+    Employees assigned to sites (users.site_ids) also appear in per-site partitions holding only
+    that site's rows, so a kiosk's lookup costs its site's headcount rather than the company's.
+    The view is refreshed when the users version or the snapshot changes, checked at most every
+    USERS_VERSION_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None # Users version the view is consistent with
+        self._manifest = None # Snapshot the base is mapped from
+        self._checked_at = 0.0
+        self._view = _EMPTY_VIEW
+        self._compacting = False
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._forget_compaction)
+
+    def _forget_compaction(self):
+        self._compacting = False # A compaction thread running at fork only exists in the parent
+
+    @property
+    def is_loaded(self):
+        return self._version is not None
+
+    def __len__(self):
+        return self._view.size
+
+    def invalidate(self, emp_id=None):
+        """Forces a version check on the next lookup."""
+        self._checked_at = 0.0
+
+    def refresh(self):
+        """Brings the view up to date if the users version or the current snapshot changed."""
+        if self._version is not None and time.monotonic() - self._checked_at < USERS_VERSION_CHECK_SECONDS:
+            return
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < USERS_VERSION_CHECK_SECONDS:
+                return # Another thread refreshed while we waited for the lock
+            version = get_users_version()
+            manifest = gallery_snapshots.read_manifest()
+            self._checked_at = time.monotonic()
+            if version == self._version and manifest == self._manifest:
+                return
+            self._load(manifest)
+
+    def _load(self, manifest):
+        if manifest is None:
+            return self._load_in_memory(manifest, 'missing') # No snapshot on this host yet
+        version, changed = get_users_changes(manifest['version'])
+        if changed is None:
+            # The change log can't say who changed since the snapshot (a bulk change, or it is too old)
+            return self._load_in_memory(manifest, 'unlogged_changes')
+
+        base = self._view.base
+        if manifest != self._manifest:
+            try:
+                id_table, encodings, centroids = gallery_snapshots.map_snapshot(manifest)
+            except FileNotFoundError:
+                # Superseded twice between reading the manifest and mapping it; the current one is kept
+                return self._load(gallery_snapshots.read_manifest())
+            base = _segment(id_table['users'], encodings, centroids) if id_table['users'] else _empty_snapshot()
+
+        np = deps.numpy()
+        overlay = _segment_from_rows(*_load_gallery_users({"emp_id": {"$in": sorted(changed)}})) if changed else _empty_snapshot()
+        shadowed = None
+        if changed and base.users:
+            shadowed = np.fromiter((user['emp_id'] in changed for user in base.users), dtype=bool, count=len(base.users))
+            if not shadowed.any():
+                shadowed = None
+        size = len(base.users) - (int(shadowed.sum()) if shadowed is not None else 0) + len(overlay.users)
+        self._view = _GalleryView(base, overlay, shadowed, size, {})
+        self._manifest, self._version = manifest, version
+
+        if len(changed) >= FACE_GALLERY_COMPACT_AFTER:
+            self._compact_in_background('delta')
+
+    def _load_in_memory(self, manifest, trigger):
+        """
+        Reads every enrolled face from users into this process when no snapshot can serve the
+        current version, and has a snapshot written in the background; the next refresh after
+        it lands maps it instead. Keeps compaction (and its host-wide lock) off the request path.
+        """
+        version = get_users_version() # Read before the scan: later writes are caught by the next refresh
+        base = _segment_from_rows(*_load_gallery_users({}))
+        self._view = _GalleryView(base, _empty_snapshot(), None, len(base.users), {})
+        self._manifest, self._version = manifest, version # Unchanged manifest and version need no reload
+        self._compact_in_background(trigger)
+
+    def _compact_in_background(self, trigger):
+        if self._compacting:
+            return
+        self._compacting = True
+
+        def compact():
+            try:
+                if compact_face_gallery(blocking=False, trigger=trigger):
+                    self.invalidate() # Remap on the next lookup rather than after the check interval
+            except Exception:
+                logger.exception("Face gallery compaction failed")
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=compact, name='face-gallery-compaction', daemon=True).start()
+
+    @staticmethod
+    def _partition(snapshot, site_id):
+        """A segment restricted to one site's employees, copied out of the full one on first use."""
+        partition = snapshot.partitions.get(site_id)
+        if partition is not None:
+            return partition
+        members = snapshot.site_members.get(site_id)
+        if members is None:
+            partition = _empty_snapshot()
+        else:
+            np = deps.numpy()
+            counts = np.diff(np.append(snapshot.offsets, len(snapshot.encodings)))[members]
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            # Each member's block of rows, in member order: its first row plus 0..count-1
+            rows = np.repeat(snapshot.offsets[members] - offsets, counts) + np.arange(int(counts.sum()))
+            partition = _GallerySnapshot(
+                [snapshot.users[i] for i in members], snapshot.encodings[rows], offsets, snapshot.centroids[members], {}, {}
+            )
+        snapshot.partitions[site_id] = partition # Lives and dies with this load
+        return partition
+
+    def _site_view(self, view, site_id):
+        """The view restricted to one site's employees, built on first use."""
+        site_view = view.partitions.get(site_id)
+        if site_view is None:
+            base, overlay = self._partition(view.base, site_id), self._partition(view.overlay, site_id)
+            shadowed = None
+            if view.shadowed is not None and base.users:
+                shadowed = view.shadowed[view.base.site_members[site_id]]
+            size = len(base.users) - (int(shadowed.sum()) if shadowed is not None else 0) + len(overlay.users)
+            site_view = view.partitions[site_id] = _GalleryView(base, overlay, shadowed, size, {})
+        return site_view
+
+    def site_size(self, site_id):
+        """Number of employees with encodings assigned to a site."""
+        self.refresh()
+        return self._site_view(self._view, site_id).size
+
+    @staticmethod
+    def _distances(view, encoding):
+        """
+        Returns (distances, nearest_stored) for the base's employees followed by the overlay's:
+        per employee, the distance to the closest of its centroid and stored encodings, and to
+        the closest stored encoding alone. Shadowed base employees are infinitely far away.
+        """
+        np = deps.numpy()
+        probe = np.asarray(encoding, dtype=np.float32) # Matching dtypes avoid upcasting the matrices
+        distances, nearest_stored = [], []
+        for segment in (view.base, view.overlay):
+            if not segment.users:
+                continue
+            # Same metric as face_recognition.face_distance, for every stored row and every centroid
+            row_distances = np.linalg.norm(segment.encodings - probe, axis=1)
+            nearest = np.minimum.reduceat(row_distances, segment.offsets)
+            distances.append(np.minimum(nearest, np.linalg.norm(segment.centroids - probe, axis=1)))
+            nearest_stored.append(nearest)
+        distances, nearest_stored = np.concatenate(distances), np.concatenate(nearest_stored)
+        if view.shadowed is not None:
+            distances[:len(view.shadowed)][view.shadowed] = np.inf
+        return distances, nearest_stored
+
+    @staticmethod
+    def _distances_many(view, encodings):
+        """
+        _distances for several probes at once, as probes x employees matrices. Each segment
+        costs one matrix product (|a - b|^2 = |a|^2 + |b|^2 - 2 a.b) instead of a pass per probe.
+        """
+        np = deps.numpy()
+        probes = np.asarray(encodings, dtype=np.float32).reshape(-1, FACE_ENCODING_DIMENSIONS)
+        probe_norms = np.einsum('ij,ij->i', probes, probes)[:, None]
+
+        def pairwise(matrix):
+            squared = probe_norms + np.einsum('ij,ij->i', matrix, matrix) - 2 * (probes @ matrix.T)
+            return np.sqrt(np.maximum(squared, 0)) # Rounding can leave tiny negatives
+
+        distances, nearest_stored = [], []
+        for segment in (view.base, view.overlay):
+            if not segment.users:
+                continue
+            nearest = np.minimum.reduceat(pairwise(segment.encodings), segment.offsets, axis=1)
+            distances.append(np.minimum(nearest, pairwise(segment.centroids)))
+            nearest_stored.append(nearest)
+        distances, nearest_stored = np.concatenate(distances, axis=1), np.concatenate(nearest_stored, axis=1)
+        if view.shadowed is not None:
+            distances[:, :len(view.shadowed)][:, view.shadowed] = np.inf
+        return distances, nearest_stored
+
+    @staticmethod
+    def _user(view, index):
+        base_users = view.base.users
+        return base_users[index] if index < len(base_users) else view.overlay.users[index - len(base_users)]
+
+    def _match(self, view, distances, nearest_stored):
+        """The FaceMatch for one probe's per-employee distances."""
+        np = deps.numpy()
+        if len(distances) > 1:
+            best_index, runner_up_index = np.argpartition(distances, 1)[:2]
+            margin = float(distances[runner_up_index] - distances[best_index])
+        else:
+            best_index, margin = 0, float('inf')
+        best_index = int(best_index)
+        return FaceMatch(self._user(view, best_index), 1 - float(distances[best_index]), margin, float(nearest_stored[best_index]))
+
+    def _searched_view(self, site_id):
+        self.refresh()
+        view = self._view
+        if site_id is not None and view.size:
+            view = self._site_view(view, site_id)
+        return view
+
+    def best_match(self, encoding, site_id=None):
+        """
+        Returns a FaceMatch for the closest enrolled employee, where score is 1 - face distance.
+        With site_id, only that site's employees are searched (margin is then within the site).
+        FaceMatch.user is None when the gallery (or site) is empty.
+        """
+        view = self._searched_view(site_id)
+        if not view.size:
+            return NO_MATCH
+        return self._match(view, *self._distances(view, encoding))
+
+    def best_matches(self, encodings, site_id=None):
+        """best_match for every face found in one frame, all matched in a single pass. Returns a list of FaceMatch."""
+        view = self._searched_view(site_id)
+        if not view.size or not len(encodings):
+            return [NO_MATCH] * len(encodings)
+        distances, nearest_stored = self._distances_many(view, encodings)
+        return [self._match(view, d, n) for d, n in zip(distances, nearest_stored)]
+
+    def find_duplicates(self, encoding, tolerance=FACE_RECOGNITION_TOLERANCE, exclude_emp_id=None):
+        """
+        Returns the emp_ids of every enrolled employee within tolerance of the encoding, closest
+        first. Always checks the users version first, since enrollment must not miss a face
+        registered moments ago by another worker.
+        """
+        self.invalidate()
+        self.refresh()
+        view = self._view
+        if not view.size:
+            return []
+        np = deps.numpy()
+        distances, _ = self._distances(view, encoding)
+        conflicts = np.flatnonzero(distances <= tolerance)
+        conflicts = conflicts[np.argsort(distances[conflicts], kind='stable')]
+        emp_ids = [self._user(view, i)['emp_id'] for i in conflicts]
+        return [emp_id for emp_id in emp_ids if emp_id != exclude_emp_id]
+
+face_gallery = register_users_view(FaceGallery())
+
+def learn_face_encoding(match, encoding):
+    """
+    Adds a kiosk encoding to the matched employee's set when the match was confident, clearly
+    ahead of every other employee, and different enough from what is already stored. The set
+    keeps the enrollment encoding plus the most recent learned ones, and an employee learns at
+    most once per FACE_LEARNING_INTERVAL_HOURS. Returns True if the encoding was stored.
+    """
+    if not FACE_LEARNING_ENABLED or match.user is None:
+        return False
+    if (match.score < FACE_LEARNING_MIN_SCORE or match.margin < FACE_LEARNING_MIN_MARGIN
+            or match.nearest_stored_distance < FACE_LEARNING_MIN_NOVELTY):
+        return False
+
+    now = datetime.datetime.now()
+    result = mongo.users.update_one(
+        {
+            "emp_id": match.user['emp_id'],
+            "$or": [
+                {"face_learned_at": {"$exists": False}},
+                {"face_learned_at": {"$lt": now - datetime.timedelta(hours=FACE_LEARNING_INTERVAL_HOURS)}}
+            ]
+        },
+        {
+            "$push": {"learned_face_encodings": {
+                "$each": [pack_face_encoding(encoding)],
+                "$slice": -(MAX_FACE_ENCODINGS_PER_EMPLOYEE - 1) # Oldest learned encodings drop out first
+            }},
+            "$set": {"face_learned_at": now}
+        }
+    )
+    if not result.modified_count:
+        return False
+    FACE_ENCODINGS_LEARNED.inc()
+    bump_users_version(match.user['emp_id'])
+    return True
+
+def warm_up(role=ARGUS_ROLE):
+    """
+    Runs the face models once and maps the face gallery snapshot (writing it first if the host
+    has none) so the first kiosk request doesn't pay for it. Under a preloading server this runs
+    in the master process and forked workers inherit the warm state through copy-on-write.
+    """
+    global models_warm
+    if role == 'web':
+        return # Web-only processes never recognize faces
+    face_recognition, np = deps.face_recognition(), deps.numpy()
+    if not models_warm:
+        blank = np.zeros((160, 160, 3), dtype=np.uint8)
+        face_recognition.face_locations(blank)
+        face_recognition.face_encodings(blank, known_face_locations=[(10, 150, 150, 10)])
+        models_warm = True
+    # Compact here rather than in the background from a lookup, so forked workers inherit a mapped snapshot
+    manifest = gallery_snapshots.read_manifest()
+    if manifest is None:
+        compact_face_gallery(trigger='missing') # First start on this host
+    elif get_users_changes(manifest['version'])[1] is None:
+        compact_face_gallery(trigger='unlogged_changes')
+    face_gallery.refresh()
+
+def is_ready(role=ARGUS_ROLE):
+    """True once the face models have run and the face gallery is loaded (always true for web-only processes)."""
+    return role == 'web' or (models_warm and face_gallery.is_loaded)
@@ -0,0 +1,114 @@
+"""
+On-disk face gallery snapshots: a raw float32 matrix plus an id table, mapped read-only by
+every worker so the page cache holds one copy per host.
+
+A snapshot for users version V is two files in FACE_GALLERY_DIR:
+
+    gallery-V.f32    every employee's encodings (grouped by employee), then one centroid per employee
+    gallery-V.json   the id table: users version, row count and, per employee, its profile fields,
+                     site_ids and number of encoding rows, in matrix order
+
+current.json names the snapshot in use. Files are written under temporary names and renamed
+into place, so readers only ever see complete snapshots.
+"""
+import contextlib
+import json
+import logging
+import os
+
+from .. import deps
+from ..config import FACE_ENCODING_DIMENSIONS, FACE_GALLERY_DIR
+
+try:
+    import fcntl
+except ImportError: # Not on Windows; compactions there are not coordinated across processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MATRIX_DTYPE = '<f4'
+MANIFEST = 'current.json'
+
+def _replace_file(path, data):
+    """Writes data to path atomically: a temporary file, flushed to disk, renamed over path."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_manifest(directory=FACE_GALLERY_DIR):
+    """Returns the current snapshot's manifest, or None before the first snapshot is written."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.error(f"Ignoring unreadable face gallery manifest: {e}")
+        return None
+
+def write_snapshot(version, users, encodings, centroids, directory=FACE_GALLERY_DIR):
+    """
+    Writes the snapshot for a users version and makes it current. users holds one dict per
+    employee (emp_id, full_name, image_path, site_ids, rows) in the order of the matrix rows.
+    The snapshot it replaces is kept, since a worker may have read the manifest naming it and not
+    yet mapped it; older ones are removed, and workers still mapping them keep their pages until
+    they remap.
+    """
+    np = deps.numpy()
+    os.makedirs(directory, exist_ok=True)
+    name = f"gallery-{version}"
+    previous = read_manifest(directory)
+    kept = {name} | ({previous['name']} if previous else set())
+    matrix = np.concatenate((encodings, centroids)).astype(MATRIX_DTYPE, copy=False)
+    _replace_file(os.path.join(directory, f"{name}.f32"), matrix.tobytes())
+    id_table = {'version': version, 'dimensions': FACE_ENCODING_DIMENSIONS, 'rows': len(encodings), 'users': users}
+    _replace_file(os.path.join(directory, f"{name}.json"), json.dumps(id_table).encode())
+    _replace_file(os.path.join(directory, MANIFEST), json.dumps({'version': version, 'name': name}).encode())
+
+    for entry in os.listdir(directory):
+        if entry.startswith('gallery-') and entry.rsplit('.', 1)[0] not in kept and not entry.endswith('.tmp'):
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(directory, entry))
+
+def map_snapshot(manifest, directory=FACE_GALLERY_DIR):
+    """
+    Opens the snapshot a manifest names. Returns (id_table, encodings, centroids), the matrices
+    being read-only views of one shared memory map (None for an empty gallery).
+    """
+    np = deps.numpy()
+    with open(os.path.join(directory, f"{manifest['name']}.json")) as f:
+        id_table = json.load(f)
+    if id_table['dimensions'] != FACE_ENCODING_DIMENSIONS:
+        raise ValueError(f"Face gallery snapshot has {id_table['dimensions']}-dimension encodings")
+    rows, employees = id_table['rows'], len(id_table['users'])
+    if not employees:
+        return id_table, None, None # mmap can't map an empty file
+    matrix = np.memmap(
+        os.path.join(directory, f"{manifest['name']}.f32"), dtype=MATRIX_DTYPE, mode='r',
+        shape=(rows + employees, FACE_ENCODING_DIMENSIONS)
+    )
+    return id_table, matrix[:rows], matrix[rows:]
+
+@contextlib.contextmanager
+def compaction_lock(blocking=True, directory=FACE_GALLERY_DIR):
+    """
+    Holds the host-wide lock on building snapshots. Yields True if it was acquired; with
+    blocking=False it yields False at once while another process is compacting.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'compaction.lock'), 'a') as lock_file:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
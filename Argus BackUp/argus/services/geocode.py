@@ -0,0 +1,92 @@
+"""Reverse geocoding of punch coordinates, with a per-process LRU cache."""
+import logging
+import threading
+from collections import OrderedDict
+
+from .. import deps
+from ..config import GEOCODE_CACHE_PRECISION, GEOCODE_CACHE_SIZE
+from ..metrics import GEOCODE_CACHE_RESULTS
+
+logger = logging.getLogger(__name__)
+
+_geocode_cache = OrderedDict()
+_geocode_cache_lock = threading.Lock()
+
+def _cached_address(cache_key):
+    """Returns a previously resolved address for the rounded coordinates, or None."""
+    with _geocode_cache_lock:
+        address = _geocode_cache.get(cache_key)
+        if address is not None:
+            _geocode_cache.move_to_end(cache_key)
+    GEOCODE_CACHE_RESULTS.labels(result='hit' if address is not None else 'miss').inc()
+    return address
+
+def _remember_address(cache_key, address):
+    """Stores a successfully resolved address, evicting the least recently used entry."""
+    with _geocode_cache_lock:
+        _geocode_cache[cache_key] = address
+        while len(_geocode_cache) > GEOCODE_CACHE_SIZE:
+            _geocode_cache.popitem(last=False)
+
+def reverse_geocode(lat, lon):
+    """Performs reverse geocoding to get a human-readable address."""
+    requests = deps.requests()
+    try:
+        if not lat or not lon:
+            return "Location not recorded"
+
+        # Kiosks sit still, so nearby coordinates resolve to the same address; only successes are cached
+        cache_key = (round(float(lat), GEOCODE_CACHE_PRECISION), round(float(lon), GEOCODE_CACHE_PRECISION))
+        cached = _cached_address(cache_key)
+        if cached is not None:
+            return cached
+
+        url = "https://nominatim.openstreetmap.org/reverse"
+        params = {
+            'lat': lat,
+            'lon': lon,
+            'format': 'json',
+            'zoom': 18,
+            'addressdetails': 1
+        }
+        headers = {
+            'User-Agent': 'FaceRecognitionAttendanceSystem/1.0 (contact@innovasolutions.com)', # More specific User-Agent
+            'Accept-Language': 'en-US,en;q=0.9'
+        }
+        response = requests.get(url, params=params, headers=headers, timeout=5) # Add timeout
+        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+
+        data = response.json()
+        address_parts = []
+        address = data.get('address', {})
+
+        # Prioritize more specific address components
+        if 'house_number' in address: address_parts.append(address['house_number'])
+        if 'road' in address: address_parts.append(address['road'])
+        if 'suburb' in address: address_parts.append(address['suburb'])
+        if 'city_district' in address: address_parts.append(address['city_district'])
+        if 'city' in address: address_parts.append(address['city'])
+        elif 'town' in address: address_parts.append(address['town'])
+        elif 'village' in address: address_parts.append(address['village'])
+
+        if 'state' in address: address_parts.append(address['state'])
+        if 'postcode' in address: address_parts.append(address['postcode'])
+        if 'country' in address: address_parts.append(address['country'])
+
+        if not address_parts:
+            resolved = f"Location at {lat:.6f}, {lon:.6f}"
+        else:
+            resolved = ', '.join(filter(None, address_parts))
+
+        _remember_address(cache_key, resolved)
+        return resolved
+
+    except requests.exceptions.Timeout:
+        logger.error(f"Geocoding request timed out for {lat}, {lon}")
+        return f"Location at {lat:.6f}, {lon:.6f} (Timeout)"
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Geocoding request failed for {lat}, {lon}: {e}")
+        return f"Location at {lat:.6f}, {lon:.6f} (Network Error)"
+    except Exception as e:
+        logger.error(f"Geocoding parsing error for {lat}, {lon}: {e}")
+        return f"Location at {lat:.6f}, {lon:.6f} (Processing Error)"
@@ -0,0 +1,18 @@
+"""Outgoing email through the configured Gmail SMTP account."""
+import os
+import smtplib
+from email.message import EmailMessage
+
+def send_email(to, subject, body, subtype='plain'):
+    """Sends one message; subtype='html' sends the body as HTML. Raises on SMTP errors."""
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = os.getenv("GMAIL_USER")
+    msg['To'] = to
+    msg.set_content(body, subtype=subtype)
+
+    # Use with statement for SMTP for proper closing
+    with smtplib.SMTP('smtp.gmail.com', 587) as server:
+        server.starttls()
+        server.login(os.getenv("GMAIL_USER"), os.getenv("GMAIL_PASSWORD"))
+        server.send_message(msg)
@@ -0,0 +1,230 @@
+"""Deployment-time setup and data migrations, run outside of request handling."""
+import datetime
+import os
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from werkzeug.security import generate_password_hash
+
+from ..config import FACE_ENCODING_DIMENSIONS, FACE_ENCODING_VERSION, MIGRATION_BATCH_SIZE, UPLOAD_FOLDER
+from ..extensions import mongo
+from .dates import ATTENDANCE_TIME_FIELDS, as_datetime, between_days, day
+from .faces import pack_face_encoding
+from .punches import ACTIVE_PUNCH_INDEX
+from .shifts import record_fields, shift_schedule
+
+def init_db():
+    """Initializes the admin user if one does not already exist."""
+    admin_username = os.getenv("ADMIN_USERNAME")
+    admin_password = os.getenv("ADMIN_PASSWORD")
+
+    if not admin_username or not admin_password:
+        raise ValueError(
+            "ADMIN_USERNAME and ADMIN_PASSWORD must be set in your .env file."
+            " Without them, the admin user cannot be initialized securely."
+        )
+
+    # Check if admin user already exists to prevent re-creation and password overwrite
+    if mongo.admins.find_one({"username": admin_username}):
+        print("Admin user already exists. Skipping initialization.")
+    else:
+        # Check if any admin exists. If not, create the default.
+        # This is a safer approach than deleting all admins.
+        if mongo.admins.count_documents({}) == 0:
+            mongo.admins.insert_one({
+                "username": admin_username,
+                "password": generate_password_hash(admin_password)
+            })
+            print("Default admin user initialized successfully.")
+
+def ensure_indexes():
+    """Creates the indexes the attendance and user queries rely on (no-op if they exist)."""
+    mongo.users.create_index("emp_id")
+    mongo.users.create_index("site_ids")
+    mongo.kiosks.create_index("kiosk_id", unique=True)
+    mongo.attendance.create_index([("emp_id", 1), ("date", -1), ("status", 1)])
+    mongo.attendance.create_index([("status", 1), ("date", -1), ("regularized_at", -1)])
+    mongo.attendance.create_index([("date", 1), ("updated_at", 1)]) # Presence tables sync the day's changes
+    # Late arrivals are a small fraction of records: the dashboard counts them from a partial index
+    mongo.attendance.create_index([("is_late", 1), ("date", -1)], partialFilterExpression={"is_late": True})
+    mongo.shifts.create_index("shift_id", unique=True)
+    # At most one open punch-in per employee and day; punches upsert against it (see services.punches)
+    mongo.attendance.create_index(
+        [("emp_id", 1), ("date", 1)], name=ACTIVE_PUNCH_INDEX, unique=True, partialFilterExpression={"is_active": True}
+    )
+
+def bootstrap():
+    """One-time startup work: admin user, indexes and open punch-ins. Run once per deployment, not per worker."""
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(os.path.join(UPLOAD_FOLDER, 'faces'), exist_ok=True)
+    init_db()
+    ensure_indexes()
+    # Punches only see open records flagged is_active and dated natively; flag first, since the
+    # date migration selects open records by the flag
+    backfill_active_punches()
+    migrate_attendance_dates(open_only=True)
+
+def backfill_regularization_originals():
+    """One-off migration: stores original punch times on existing regularized records. Returns the count."""
+    pending = mongo.attendance.find(
+        {"status": "Regularized", "original_punch_in": {"$exists": False}},
+        {"emp_id": 1, "date": 1}
+    )
+    updates = []
+    updated = 0
+    for record in pending:
+        # Same rule as regularize_attendance: earliest punch-in and latest punch-out of the replaced rows
+        historical = list(mongo.attendance.find(
+            {"emp_id": record['emp_id'], "date": record['date'], "status": "Historical"},
+            {"punch_in": 1, "punch_out": 1}
+        ))
+        updates.append(UpdateOne(
+            {"_id": record['_id']},
+            {"$set": {
+                "original_punch_in": min([r['punch_in'] for r in historical if r.get('punch_in')], default=None),
+                "original_punch_out": max([r['punch_out'] for r in historical if r.get('punch_out')], default=None)
+            }}
+        ))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            updated += mongo.attendance.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        updated += mongo.attendance.bulk_write(updates, ordered=False).modified_count
+    return updated
+
+def backfill_active_punches():
+    """
+    Flags open punch-ins recorded before is_active existed, so punch-out finds them; run by
+    bootstrap, and a no-op once none are left. Only the latest open record per employee and day is flagged; if duplicates were
+    left by concurrent punches, the older ones stay open but are no longer the active one.
+    Returns the count.
+    """
+    latest_open = mongo.attendance.aggregate([
+        {"$match": {"punch_out": None, "status": {"$ne": "Historical"}, "is_active": {"$exists": False}}},
+        {"$sort": {"punch_in": -1}},
+        {"$group": {"_id": {"emp_id": "$emp_id", "date": "$date"}, "record_id": {"$first": "$_id"}}}
+    ], allowDiskUse=True)
+    updates = []
+    updated = 0
+    for group in latest_open:
+        updates.append(UpdateOne({"_id": group['record_id']}, {"$set": {"is_active": True}}))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            updated += _flag_active(updates)
+            updates = []
+    if updates:
+        updated += _flag_active(updates)
+    return updated
+
+def _flag_active(updates):
+    try:
+        return mongo.attendance.bulk_write(updates, ordered=False).modified_count
+    except BulkWriteError as e:
+        # A record punched in since the deploy is already the active one for that day
+        return e.details.get('nModified', 0)
+
+def migrate_attendance_dates(open_only=False):
+    """
+    Rewrites attendance dates and times stored as ISO strings as native dates (see services.dates).
+    Safe to run while the app serves traffic: readers accept both forms, and each update only
+    applies while the record still holds the strings it was computed from. With open_only, just
+    open punch-ins are converted. Returns (migrated, skipped), skipped counting malformed values
+    and open records an employee has since replaced by punching in again.
+    """
+    query = {"$or": [{field: {"$type": "string"}} for field in ATTENDANCE_TIME_FIELDS]}
+    if open_only:
+        query["is_active"] = True
+    updates = []
+    migrated = 0
+    skipped = 0
+    for record in mongo.attendance.find(query, {field: 1 for field in ATTENDANCE_TIME_FIELDS}):
+        legacy = {field: record[field] for field in ATTENDANCE_TIME_FIELDS if isinstance(record.get(field), str)}
+        try:
+            converted = {
+                field: day(value) if field == 'date' else datetime.datetime.fromisoformat(value)
+                for field, value in legacy.items()
+            }
+        except ValueError:
+            skipped += 1
+            continue
+        updates.append(UpdateOne({"_id": record['_id'], **legacy}, {"$set": converted}))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            migrated, skipped = _convert_dates(updates, migrated, skipped)
+            updates = []
+    if updates:
+        migrated, skipped = _convert_dates(updates, migrated, skipped)
+    return migrated, skipped
+
+def _convert_dates(updates, migrated, skipped):
+    try:
+        return migrated + mongo.attendance.bulk_write(updates, ordered=False).modified_count, skipped
+    except BulkWriteError as e:
+        # An open record whose employee punched in again on the native date would duplicate the active punch
+        return migrated + e.details.get('nModified', 0), skipped + len(e.details.get('writeErrors', []))
+
+def recompute_attendance_shifts(start=None, end=None, emp_id=None):
+    """
+    Restamps is_late, late_minutes and worked_minutes (see services.shifts) on attendance dated
+    start to end (ISO days, inclusive, open-ended when empty), for one employee or everyone,
+    against the shifts as defined now. Run after a shift definition or assignment changes, and
+    once to stamp records written before the fields existed. Returns the count of records changed.
+    """
+    query = {"status": {"$ne": "Historical"}}
+    query.update(between_days(start, end))
+    if emp_id:
+        query["emp_id"] = emp_id
+    shift_schedule.invalidate()
+    fields = ("shift_id", "is_late", "late_minutes", "worked_minutes")
+    updates = []
+    updated = 0
+    for employee in mongo.attendance.distinct("emp_id", query):
+        shift = shift_schedule.for_employee(employee)
+        records = list(mongo.attendance.find(
+            {**query, "emp_id": employee}, {"date": 1, "punch_in": 1, "punch_out": 1, **{field: 1 for field in fields}}
+        ))
+        for record in records:
+            record['punch_in'], record['punch_out'] = as_datetime(record.get('punch_in')), as_datetime(record.get('punch_out'))
+        # Only each day's first punch-in can be late
+        records.sort(key=lambda r: (day(r['date']), r['punch_in'] is None, r['punch_in'] or datetime.datetime.min))
+        days_seen = set()
+        for record in records:
+            record_day = day(record['date'])
+            stamps = record_fields(shift, record['punch_in'], record['punch_out'], first_of_day=record_day not in days_seen)
+            if record['punch_in'] is not None:
+                days_seen.add(record_day)
+            if any(record.get(field) != stamps[field] for field in fields):
+                updates.append(UpdateOne({"_id": record['_id']}, {"$set": stamps}))
+            if len(updates) >= MIGRATION_BATCH_SIZE:
+                updated += mongo.attendance.bulk_write(updates, ordered=False).modified_count
+                updates = []
+    if updates:
+        updated += mongo.attendance.bulk_write(updates, ordered=False).modified_count
+    return updated
+
+def migrate_face_encodings():
+    """
+    Rewrites legacy face encodings (BSON arrays of doubles) as packed float32 Binary.
+    Safe to run while the app serves traffic: readers accept both formats, and a user
+    re-enrolled meanwhile already has the new format and is left alone.
+    Returns (migrated, skipped_malformed).
+    """
+    pending = mongo.users.find({"face_encoding.0": {"$exists": True}}, {"face_encoding": 1}) # Non-empty arrays only
+    updates = []
+    migrated = 0
+    skipped = 0
+    for user in pending:
+        if len(user['face_encoding']) != FACE_ENCODING_DIMENSIONS:
+            skipped += 1
+            continue
+        updates.append(UpdateOne(
+            {"_id": user['_id'], "face_encoding.0": {"$exists": True}},
+            {"$set": {
+                "face_encoding": pack_face_encoding(user['face_encoding']),
+                "face_encoding_version": FACE_ENCODING_VERSION
+            }}
+        ))
+        if len(updates) >= MIGRATION_BATCH_SIZE:
+            migrated += mongo.users.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        migrated += mongo.users.bulk_write(updates, ordered=False).modified_count
+    return migrated, skipped
@@ -0,0 +1,118 @@
+"""Live presence: who is punched in right now, held in memory by every worker process."""
+import datetime
+import threading
+import time
+from collections import namedtuple
+
+from ..config import PRESENCE_REBUILD_SECONDS, PRESENCE_SYNC_OVERLAP_SECONDS, PRESENCE_SYNC_SECONDS
+from ..extensions import mongo
+from .dates import as_datetime, day, local_now, on_days
+from .users import register_users_view
+
+# state is 'in' or 'out'; since is the time of the punch that set it; kiosk_id is where it happened
+PresenceEntry = namedtuple('PresenceEntry', ['state', 'since', 'kiosk_id'])
+
+PRESENCE_FIELDS = {"emp_id": 1, "punch_in": 1, "punch_out": 1, "is_active": 1, "kiosk_id": 1, "punch_out_kiosk_id": 1}
+
+def _derive(records):
+    """
+    Presence per employee from their (non-historical) records of the day, sorted by punch_in:
+    in since the open record's punch-in if one is open, otherwise out since the last punch-out.
+    """
+    entries = {}
+    for record in records:
+        punch_in, punch_out = as_datetime(record.get('punch_in')), as_datetime(record.get('punch_out'))
+        if punch_in is None:
+            continue # Not a punch (e.g. a regularization that left the day empty)
+        emp_id, current = record['emp_id'], entries.get(record['emp_id'])
+        if record.get('is_active'):
+            entries[emp_id] = PresenceEntry('in', punch_in, record.get('kiosk_id'))
+        elif current is None or (current.state == 'out' and (punch_out or punch_in) > current.since):
+            entries[emp_id] = PresenceEntry('out', punch_out or punch_in, record.get('punch_out_kiosk_id'))
+    return entries
+
+class PresenceTable:
+    """
+    emp_id -> PresenceEntry for every employee with attendance today; anyone else is out.
+
+    Built from today's attendance on first use, on a new day and every PRESENCE_REBUILD_SECONDS.
+    In between, punches recorded by this process apply at once, and a sync at most every
+    PRESENCE_SYNC_SECONDS re-derives just the employees whose records changed since the last
+    one (attendance.updated_at), picking up other workers' punches and regularizations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._day = None
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._sync_from = None # Wall-clock time the last sync started
+        self._stale = set() # emp_ids to re-derive on the next sync
+
+    def invalidate(self, emp_id=None):
+        """Re-derives one employee on the next sync, or rebuilds the table (emp_id None)."""
+        if emp_id is None:
+            self._built_at = 0.0
+        else:
+            self._stale.add(emp_id)
+        self._synced_at = 0.0
+
+    def refresh(self):
+        """Syncs or rebuilds the table if it is due."""
+        today = day()
+        if self._day == today and time.monotonic() - self._synced_at < PRESENCE_SYNC_SECONDS:
+            return
+        with self._lock:
+            if self._day == today and time.monotonic() - self._synced_at < PRESENCE_SYNC_SECONDS:
+                return # Another thread synced while we waited for the lock
+            started = local_now()
+            if self._day != today or time.monotonic() - self._built_at >= PRESENCE_REBUILD_SECONDS:
+                self._entries = _derive(mongo.attendance.find(
+                    {"date": on_days(today), "status": {"$ne": "Historical"}}, PRESENCE_FIELDS
+                ).sort("punch_in", 1))
+                self._day, self._built_at = today, time.monotonic()
+                self._stale = set()
+            else:
+                since = self._sync_from - datetime.timedelta(seconds=PRESENCE_SYNC_OVERLAP_SECONDS)
+                changed = self._stale | {record['emp_id'] for record in mongo.attendance.find(
+                    {"date": today, "updated_at": {"$gte": since}}, {"emp_id": 1}
+                )}
+                self._stale = set()
+                if changed:
+                    derived = _derive(mongo.attendance.find(
+                        {"date": on_days(today), "emp_id": {"$in": sorted(changed)}, "status": {"$ne": "Historical"}}, PRESENCE_FIELDS
+                    ).sort("punch_in", 1))
+                    for emp_id in changed:
+                        # One assignment or pop per employee, so readers never see a half-applied sync
+                        if emp_id in derived:
+                            self._entries[emp_id] = derived[emp_id]
+                        else:
+                            self._entries.pop(emp_id, None)
+            self._sync_from, self._synced_at = started, time.monotonic()
+
+    def record(self, emp_id, state, since, kiosk_id=None):
+        """Applies a punch this process just wrote."""
+        if self._day == day(since): # A table still on yesterday rebuilds on its next use anyway
+            self._entries[emp_id] = PresenceEntry(state, since, kiosk_id)
+
+    def get(self, emp_id):
+        """The employee's PresenceEntry, or None if they have no attendance today."""
+        self.refresh()
+        return self._entries.get(emp_id)
+
+    def is_in(self, emp_id):
+        entry = self.get(emp_id)
+        return entry is not None and entry.state == 'in'
+
+    def present_count(self):
+        """Employees who punched in at any point today."""
+        self.refresh()
+        return len(self._entries)
+
+    def punched_in(self):
+        """[(emp_id, PresenceEntry)] for everyone in now."""
+        self.refresh()
+        return [(emp_id, entry) for emp_id, entry in list(self._entries.items()) if entry.state == 'in']
+
+presence = register_users_view(PresenceTable()) # A deleted employee's attendance goes with them
@@ -0,0 +1,99 @@
+"""
+Punch state transitions on attendance records.
+
+An employee's open punch-in for a day carries is_active: true, and a unique partial index on
+(emp_id, date) over those records (see maintenance.ensure_indexes) guarantees at most one.
+Punching in is an upsert on that record and punching out a find_one_and_update that clears
+the flag, so each is one atomic round trip and concurrent kiosks can't open a second record.
+Anything else that closes or supersedes a record (regularization) must unset is_active too.
+
+Both stamp the shift fields (see services.shifts): lateness on the day's first punch-in (told
+from the database by attended(), not from a worker's presence table), and worked_minutes on
+punch-out, which is an update pipeline so it can be computed from the record's own punch_in.
+"""
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from ..extensions import mongo
+from .dates import on_days
+from .shifts import worked_minutes_expression
+
+ACTIVE_PUNCH_INDEX = 'active_punch'
+
+def active_punch_filter(emp_id, day):
+    """Matches an employee's open punch-in for a day."""
+    return {"emp_id": emp_id, "date": day, "is_active": True}
+
+def attended(emp_ids, day):
+    """
+    The employees among emp_ids with any attendance record for the day, read just before their
+    punch-ins are written: only a day's first punch-in is stamped late (see shifts.arrival_fields).
+    """
+    return set(mongo.attendance.distinct("emp_id", {"emp_id": {"$in": list(emp_ids)}, "date": on_days(day)}))
+
+def punch_in_document(emp_id, day, now, latitude, longitude, address, kiosk_id=None, arrival=None):
+    """
+    A new open attendance record; day and now are native dates (see services.dates) and arrival
+    the shift fields from shifts.arrival_fields.
+    """
+    return {
+        **(arrival or {}),
+        "emp_id": emp_id,
+        "date": day,
+        "punch_in": now,
+        "punch_out": None,
+        "latitude": latitude,
+        "longitude": longitude,
+        "address": address,
+        "punch_out_latitude": None,
+        "punch_out_longitude": None,
+        "punch_out_address": None,
+        "status": "Present", # Initial status for punch-in
+        "is_active": True,
+        "kiosk_id": kiosk_id,
+        "updated_at": now # Lets other workers' presence tables find the change
+    }
+
+def punch_out_update(now, latitude, longitude, address, kiosk_id=None):
+    """The update pipeline that closes an open record."""
+    return [
+        {"$set": {
+            # Values are $literal: a pipeline would read a string starting with $ as a field path
+            "punch_out": {"$literal": now},
+            "punch_out_latitude": {"$literal": latitude},
+            "punch_out_longitude": {"$literal": longitude},
+            "punch_out_address": {"$literal": address},
+            "punch_out_kiosk_id": {"$literal": kiosk_id},
+            # Mark as completed after punch-out; a regularized day left open stays Regularized so
+            # it remains in the regularization views and exports
+            "status": {"$cond": [{"$eq": ["$status", "Regularized"]}, "$status", "Completed"]},
+            "worked_minutes": worked_minutes_expression(now),
+            "updated_at": {"$literal": now}
+        }},
+        {"$unset": "is_active"}
+    ]
+
+def _punch_in_upsert(document):
+    query = active_punch_filter(document['emp_id'], document['date'])
+    # Fields in the query are copied into an inserted document; $setOnInsert supplies the rest
+    return query, {"$setOnInsert": {k: v for k, v in document.items() if k not in query}}
+
+def punch_in_operation(document):
+    """An upsert inserting document unless its employee already has an open record that day."""
+    return UpdateOne(*_punch_in_upsert(document), upsert=True)
+
+def punch_out_operation(emp_id, day, update):
+    return UpdateOne(active_punch_filter(emp_id, day), update)
+
+def punch_in(document):
+    """Opens a record unless one is already open. Returns False if the employee was already punched in."""
+    try:
+        result = mongo.attendance.update_one(*_punch_in_upsert(document), upsert=True)
+    except DuplicateKeyError:
+        return False # A concurrent punch-in from another kiosk won
+    return result.upserted_id is not None
+
+def punch_out(emp_id, day, update):
+    """Closes the open record for the day. Returns its _id, or None if the employee wasn't punched in."""
+    record = mongo.attendance.find_one_and_update(active_punch_filter(emp_id, day), update, projection={"_id": 1})
+    return record['_id'] if record else None
@@ -0,0 +1,564 @@
+"""Kiosk face recognition and the attendance punch it records, shared by the HTTP and WebSocket paths."""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import url_for
+from pymongo.errors import BulkWriteError
+
+from .. import deps
+from ..config import (
+    BEST_MATCH_SCORE_THRESHOLD, GEOCODE_CACHE_PRECISION, KIOSK_GROUP_MAX_FACES, KIOSK_GROUP_MODE, KIOSK_MEMO_DISTANCE,
+    KIOSK_MEMO_SIZE, KIOSK_MEMO_TTL_SECONDS, KIOSK_SKIPPED_REPORT_MAX, KIOSK_UPLOAD_INTERVAL_MS, KIOSK_WS_MAX_INTERVAL_MS,
+    KIOSK_WS_MIN_INTERVAL_MS, MAX_TRACKED_KIOSKS
+)
+from ..extensions import mongo
+from ..metrics import GALLERY_LOOKUPS, KIOSK_FRAMES_SKIPPED, KIOSK_MEMO_LOOKUPS, RECOGNITION_OUTCOMES, stage_timer
+from .dates import day, local_now
+from .faces import face_gallery, learn_face_encoding, load_image
+from .geocode import reverse_geocode
+from .presence import presence
+from .punches import (
+    attended, punch_in, punch_in_document, punch_in_operation, punch_out, punch_out_operation, punch_out_update
+)
+from .shifts import arrival_fields, shift_schedule
+from .sites import kiosk_registry
+from .users import register_users_view
+
+logger = logging.getLogger(__name__)
+
+SKIPPED_FRAME_REASONS = ('no_face', 'face_too_small', 'unstable')
+PUNCH_ACTIONS = ('punchin', 'punchout')
+ALREADY_PUNCHED_IN = 'You are already punched in. Please punch out first.'
+NO_ACTIVE_PUNCH_IN = 'No active punch in found for today. Please punch in first.'
+
+def record_skipped_frames(skipped):
+    """Adds a kiosk's report of pre-filtered upload slots ({reason: count}) to the metrics. Returns False if malformed."""
+    if not isinstance(skipped, dict):
+        return False
+    for reason in SKIPPED_FRAME_REASONS:
+        count = skipped.get(reason)
+        if isinstance(count, int) and not isinstance(count, bool) and count > 0:
+            KIOSK_FRAMES_SKIPPED.labels(reason=reason).inc(min(count, KIOSK_SKIPPED_REPORT_MAX))
+    return True
+
+def resolve_address(latitude, longitude):
+    """The address recorded with a punch at these coordinates."""
+    with stage_timer('geocode'):
+        return reverse_geocode(latitude, longitude) if latitude and longitude else 'Location not recorded'
+
+def encode_faces(image_bytes, max_faces=1):
+    """
+    Finds the faces in a kiosk frame and encodes the max_faces largest (closest) in one batch
+    call. Returns (encodings, failure), where failure is the (body, status) response when no
+    face was found and None otherwise.
+    """
+    face_recognition = deps.face_recognition()
+
+    temp_image = load_image(image_bytes)
+    with stage_timer('detect'):
+        face_locations = face_recognition.face_locations(temp_image)
+    # Locations are (top, right, bottom, left)
+    face_locations = sorted(face_locations, key=lambda l: (l[2] - l[0]) * (l[1] - l[3]), reverse=True)[:max_faces]
+    with stage_timer('encode'):
+        temp_encodings = face_recognition.face_encodings(temp_image, known_face_locations=face_locations) if face_locations else []
+
+    if not temp_encodings:
+        RECOGNITION_OUTCOMES.labels(outcome='no_face').inc()
+        return [], ({'success': False, 'message': 'No face detected in the captured photo.'}, 400)
+    return temp_encodings, None
+
+def encode_frame(image_bytes):
+    """encode_faces for the one face a kiosk frame is cropped to. Returns (encoding, failure)."""
+    encodings, failure = encode_faces(image_bytes)
+    return (encodings[0] if encodings else None), failure
+
+def _is_confident(match):
+    return bool(match.user) and match.score >= BEST_MATCH_SCORE_THRESHOLD
+
+def identify(encoding, site_id=None):
+    """
+    Matches an encoding against the face gallery. Returns (match, failure), where failure is the
+    (body, status) response when nobody matched confidently and None otherwise.
+    With the kiosk's site_id, that site's employees are searched first and the whole gallery
+    only when none of them matches (visitors from other offices).
+    """
+    with stage_timer('gallery_scan'):
+        match = None
+        if site_id is not None:
+            match = face_gallery.best_match(encoding, site_id)
+            matched = _is_confident(match)
+            GALLERY_LOOKUPS.labels(scope='site', result='match' if matched else 'no_match').inc()
+            if not matched:
+                match = None
+        if match is None:
+            match = face_gallery.best_match(encoding)
+            matched = _is_confident(match)
+            GALLERY_LOOKUPS.labels(scope='global', result='match' if matched else 'no_match').inc()
+
+    if not matched:
+        # If no user matched with sufficient confidence
+        RECOGNITION_OUTCOMES.labels(outcome='unrecognized').inc()
+        return match, ({'success': False, 'message': 'User not recognized. Please try again.', 'confidence': 0.0}, 404)
+
+    RECOGNITION_OUTCOMES.labels(outcome='recognized').inc()
+    return match, None
+
+def identify_faces(encodings, site_id=None):
+    """
+    identify() for every face of a group frame: each gallery scope (site, then global for the
+    faces still unmatched) is searched once for all of them. Returns a FaceMatch per encoding,
+    or None where nobody matched confidently.
+    """
+    matches = [None] * len(encodings)
+    pending = list(range(len(encodings)))
+    with stage_timer('gallery_scan'):
+        for scope, scope_site_id in (('site', site_id), ('global', None)):
+            if not pending or (scope == 'site' and site_id is None):
+                continue
+            for index, match in zip(pending, face_gallery.best_matches([encodings[i] for i in pending], scope_site_id)):
+                matched = _is_confident(match)
+                GALLERY_LOOKUPS.labels(scope=scope, result='match' if matched else 'no_match').inc()
+                if matched:
+                    matches[index] = match
+            pending = [i for i in pending if matches[i] is None]
+    return matches
+
+def _one_face_per_employee(matches):
+    """Keeps only the closest of several faces matched to the same employee (a lookalike or a photo)."""
+    closest = {}
+    for index, match in enumerate(matches):
+        if match is None:
+            continue
+        other = closest.get(match.user['emp_id'])
+        if other is None or match.score > matches[other].score:
+            if other is not None:
+                matches[other] = None
+            closest[match.user['emp_id']] = index
+        else:
+            matches[index] = None
+    return matches
+
+def _learn(match, encoding):
+    # A confident, unambiguous punch can teach the gallery how this employee looks today
+    try:
+        with stage_timer('learn'):
+            learn_face_encoding(match, encoding)
+    except Exception as e:
+        logger.warning(f"Could not learn a face encoding for {match.user['emp_id']}: {e}") # The punch itself succeeded
+
+def _punched_body(match, action, status_message, address, now):
+    """The response body for a recorded punch."""
+    matched_user = match.user
+    # Construct the URL for the user's image from its stored path
+    user_image_url = url_for('system.uploaded_file', filename=os.path.basename(matched_user['image_path']))
+    return {
+        'success': True,
+        'full_name': matched_user['full_name'],
+        'emp_id': matched_user['emp_id'],
+        'status': status_message,
+        'image_path': user_image_url, # Ensure this is a URL for the frontend
+        'confidence': round(match.score, 2),
+        'action': action,
+        'location': address,
+        'timestamp': now.isoformat()
+    }
+
+def record_punch(match, encoding, action, latitude, longitude, address=None, kiosk_id=None):
+    """
+    Records the punch-in or punch-out for a confident match from identify(), as one atomic
+    Mongo operation. Returns (body, status): the JSON body the kiosk expects and its HTTP status code.
+    address skips reverse geocoding when the caller has already resolved it.
+    """
+    emp_id, best_match_score = match.user['emp_id'], match.score
+    today, now = day(), local_now()
+
+    # Resolve location address
+    if address is None:
+        address = resolve_address(latitude, longitude)
+
+    status_message = ""
+    if action == 'punchin':
+        # Lateness is stamped on the day's first punch-in only; the upsert decides who is already in
+        with stage_timer('mongo_read'):
+            first_of_day = emp_id not in attended([emp_id], today)
+        arrival = arrival_fields(shift_schedule.for_employee(emp_id), now, first_of_day=first_of_day)
+        with stage_timer('mongo_write'):
+            inserted = punch_in(punch_in_document(emp_id, today, now, latitude, longitude, address, kiosk_id, arrival))
+        if not inserted:
+            presence.invalidate(emp_id) # Punched in elsewhere since the last sync
+            return {'success': False, 'message': ALREADY_PUNCHED_IN, 'confidence': round(best_match_score, 2)}, 400
+        status_message = "Punched In Successfully"
+    elif action == 'punchout':
+        # Closes today's open punch-in, if there is one
+        with stage_timer('mongo_write'):
+            closed = punch_out(emp_id, today, punch_out_update(now, latitude, longitude, address, kiosk_id))
+        if closed is None:
+            presence.invalidate(emp_id)
+            return {'success': False, 'message': NO_ACTIVE_PUNCH_IN, 'confidence': round(best_match_score, 2)}, 400
+        status_message = "Punched Out Successfully"
+    else:
+        return {'success': False, 'message': 'Invalid action specified.', 'confidence': round(best_match_score, 2)}, 400
+
+    presence.record(emp_id, 'in' if action == 'punchin' else 'out', now, kiosk_id)
+    _learn(match, encoding)
+    return _punched_body(match, action, status_message, address, now), 200
+
+def _refused_body(match, message):
+    """A per-person group result for a punch that was not recorded."""
+    return {'success': False, 'full_name': match.user['full_name'], 'emp_id': match.user['emp_id'],
+            'message': message, 'confidence': round(match.score, 2)}
+
+def record_group_punches(matches, encodings, action, latitude, longitude, address=None, kiosk_id=None):
+    """
+    record_punch for several employees recognized in one frame, as a single unordered
+    bulk_write of the same atomic operations. Returns a (body, status) per match.
+    """
+    if action not in PUNCH_ACTIONS:
+        return [({'success': False, 'message': 'Invalid action specified.', 'confidence': round(m.score, 2)}, 400) for m in matches]
+    today, now = day(), local_now()
+    refused_message = ALREADY_PUNCHED_IN if action == 'punchin' else NO_ACTIVE_PUNCH_IN
+
+    if address is None:
+        address = resolve_address(latitude, longitude)
+
+    # One operation per match, in match order; the writes themselves refuse anyone already in (or not in)
+    emp_ids = [match.user['emp_id'] for match in matches]
+    if action == 'punchin':
+        shifts = shift_schedule.for_employees(emp_ids)
+        with stage_timer('mongo_read'):
+            returning = attended(emp_ids, today)
+        operations = [
+            punch_in_operation(punch_in_document(
+                emp_id, today, now, latitude, longitude, address, kiosk_id,
+                arrival_fields(shifts[emp_id], now, first_of_day=emp_id not in returning)
+            ))
+            for emp_id in emp_ids
+        ]
+    else:
+        update = punch_out_update(now, latitude, longitude, address, kiosk_id)
+        operations = [punch_out_operation(emp_id, today, update) for emp_id in emp_ids]
+
+    write_errors = {}
+    with stage_timer('mongo_write'):
+        try:
+            result = mongo.attendance.bulk_write(operations, ordered=False)
+            bulk_result = result.bulk_api_result
+        except BulkWriteError as e:
+            bulk_result = e.details
+            write_errors = {error['index']: error for error in bulk_result.get('writeErrors', [])}
+
+    if action == 'punchin':
+        # Upserts that matched an open record (or lost a race on the unique index) found the employee already in
+        written = {upsert['index'] for upsert in bulk_result.get('upserted', [])}
+        refused = {position for position, error in write_errors.items() if error.get('code') == 11000}
+    elif bulk_result.get('nModified', 0) == len(operations):
+        written, refused = set(range(len(operations))), set()
+    else:
+        # Some employees had nothing open; the records stamped with this punch-out tell which
+        with stage_timer('mongo_read'):
+            closed = {record['emp_id'] for record in mongo.attendance.find(
+                {"emp_id": {"$in": emp_ids}, "date": today, "punch_out": now}, {"emp_id": 1}
+            )}
+        written = {position for position, emp_id in enumerate(emp_ids) if emp_id in closed}
+        refused = set()
+
+    failed = set(write_errors) - refused
+    if failed:
+        logger.error(f"Group punch: {len(failed)} of {len(operations)} writes failed: {[write_errors[i] for i in failed]}")
+
+    status_message = "Punched In Successfully" if action == 'punchin' else "Punched Out Successfully"
+    results = []
+    for index, match in enumerate(matches):
+        if index in written:
+            presence.record(emp_ids[index], 'in' if action == 'punchin' else 'out', now, kiosk_id)
+            _learn(match, encodings[index])
+            results.append((_punched_body(match, action, status_message, address, now), 200))
+        elif index in failed:
+            results.append((_refused_body(match, 'Could not record the punch. Please try again.'), 500))
+        else:
+            presence.invalidate(emp_ids[index])
+            results.append((_refused_body(match, refused_message), 400))
+    return results
+
+def recognize_and_punch(image_bytes, action, latitude, longitude, address=None, memo=None, site_id=None, kiosk_id=None):
+    """
+    Recognizes the face in a kiosk frame and records the punch. Returns (body, status).
+    With the kiosk's RecognitionMemo, a face close to a recent entry skips the gallery scan, and
+    a punch the entry shows was already made (or refused) is rejected without querying Mongo.
+    site_id is the site the kiosk is registered to, whose employees are searched first;
+    kiosk_id is recorded with the punch.
+    """
+    encoding, failure = encode_frame(image_bytes)
+    if failure:
+        return failure
+
+    entry = memo.lookup(encoding) if memo is not None else None
+    if entry is None:
+        match, failure = identify(encoding, site_id)
+        if failure:
+            return failure
+        if memo is not None:
+            entry = memo.remember(encoding, match)
+    else:
+        match = entry.match
+        RECOGNITION_OUTCOMES.labels(outcome='recognized').inc()
+        if entry.repeats(action):
+            message = ALREADY_PUNCHED_IN if entry.punched_in else NO_ACTIVE_PUNCH_IN
+            return {'success': False, 'message': message, 'confidence': round(match.score, 2)}, 400
+
+    body, status = record_punch(match, encoding, action, latitude, longitude, address, kiosk_id)
+    if entry is not None:
+        entry.punch_recorded(action, status)
+    return body, status
+
+def recognize_group_and_punch(image_bytes, action, latitude, longitude, address=None, memo=None, site_id=None, kiosk_id=None):
+    """
+    Group mode: recognizes up to KIOSK_GROUP_MAX_FACES faces in a frame and records all their
+    punches together. Returns (body, status), where body['results'] holds one punch result per
+    recognized person; status is 200 if anyone was punched, 400 if every recognized person was
+    refused and 404 if nobody was recognized.
+    """
+    encodings, failure = encode_faces(image_bytes, KIOSK_GROUP_MAX_FACES)
+    if failure:
+        return failure
+
+    entries = [memo.lookup(encoding) if memo is not None else None for encoding in encodings]
+    matches = [entry.match if entry else None for entry in entries]
+    misses = [i for i, entry in enumerate(entries) if entry is None]
+    for index, match in zip(misses, identify_faces([encodings[i] for i in misses], site_id)):
+        matches[index] = match
+    matches = _one_face_per_employee(matches)
+    for index, match in enumerate(matches):
+        RECOGNITION_OUTCOMES.labels(outcome='recognized' if match else 'unrecognized').inc()
+        if match and entries[index] is None and memo is not None:
+            entries[index] = memo.remember(encodings[index], match)
+
+    results, to_record = [None] * len(matches), []
+    for index, match in enumerate(matches):
+        entry = entries[index]
+        if match is None:
+            continue
+        if entry is not None and entry.repeats(action):
+            results[index] = (_refused_body(match, ALREADY_PUNCHED_IN if entry.punched_in else NO_ACTIVE_PUNCH_IN), 400)
+        else:
+            to_record.append(index)
+    if to_record:
+        recorded = record_group_punches(
+            [matches[i] for i in to_record], [encodings[i] for i in to_record], action, latitude, longitude, address, kiosk_id
+        )
+        for index, result in zip(to_record, recorded):
+            results[index] = result
+            if entries[index] is not None:
+                entries[index].punch_recorded(action, result[1])
+
+    results = [result for result in results if result is not None]
+    punched = [body for body, status in results if status == 200]
+    if not results:
+        return {'success': False, 'group': True, 'results': [], 'message': 'User not recognized. Please try again.', 'confidence': 0.0}, 404
+    if punched:
+        message = f"{len(punched)} of {len(encodings)} people punched {'in' if action == 'punchin' else 'out'}."
+    else:
+        message = "; ".join(f"{body['full_name']}: {body['message']}" for body, _ in results)
+    return {
+        'success': bool(punched),
+        'group': True,
+        'action': action,
+        'results': [body for body, _ in results],
+        'unrecognized': len(encodings) - len(results),
+        'message': message
+    }, 200 if punched else 400
+
+class _MemoEntry:
+    __slots__ = ('encoding', 'match', 'matched_at', 'punched_in')
+
+    def __init__(self, encoding, match, matched_at):
+        self.encoding = encoding
+        self.match = match
+        self.matched_at = matched_at
+        self.punched_in = None # Unknown until a punch for this person is recorded or refused
+
+    def repeats(self, action):
+        """True if this person's last punch (recorded or refused) already left them in the state action asks for."""
+        return self.punched_in is not None and action in PUNCH_ACTIONS and self.punched_in == (action == 'punchin')
+
+    def punch_recorded(self, action, status):
+        if action in PUNCH_ACTIONS and status in (200, 400):
+            self.punched_in = action == 'punchin' # Punched just now, or refused because already in that state
+
+class RecognitionMemo:
+    """
+    The last few people one kiosk recognized through a full gallery scan. Each entry keeps the
+    encoding that matched and what its punch did, and expires KIOSK_MEMO_TTL_SECONDS after the
+    scan; the oldest entry is evicted beyond KIOSK_MEMO_SIZE.
+    """
+
+    def __init__(self, ttl=KIOSK_MEMO_TTL_SECONDS, size=KIOSK_MEMO_SIZE, distance=KIOSK_MEMO_DISTANCE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # emp_id -> _MemoEntry, most recently matched last
+        self._ttl = ttl
+        self._size = size
+        self._distance = distance
+
+    def lookup(self, encoding):
+        """Returns the live entry within the memo distance of the encoding (the closest), or None."""
+        np = deps.numpy()
+        probe = np.asarray(encoding, dtype=np.float32)
+        with self._lock:
+            expired_before = time.monotonic() - self._ttl
+            for emp_id in [e for e, entry in self._entries.items() if entry.matched_at < expired_before]:
+                del self._entries[emp_id]
+            best, best_distance = None, self._distance
+            for entry in self._entries.values():
+                distance = float(np.linalg.norm(entry.encoding - probe))
+                if distance <= best_distance:
+                    best, best_distance = entry, distance
+        KIOSK_MEMO_LOOKUPS.labels(result='hit' if best else 'miss').inc()
+        return best
+
+    def remember(self, encoding, match):
+        """Records a gallery match, replacing any earlier entry for the same employee. Returns the entry."""
+        np = deps.numpy()
+        entry = _MemoEntry(np.asarray(encoding, dtype=np.float32), match, time.monotonic())
+        with self._lock:
+            self._entries.pop(match.user['emp_id'], None)
+            self._entries[match.user['emp_id']] = entry
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def forget(self, emp_id=None):
+        """Drops one employee's entry, or every entry."""
+        with self._lock:
+            if emp_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(emp_id, None)
+
+class KioskMemos:
+    """Per-kiosk RecognitionMemos in this process, least recently used kiosks evicted beyond MAX_TRACKED_KIOSKS."""
+
+    def __init__(self, max_kiosks=MAX_TRACKED_KIOSKS):
+        self._lock = threading.Lock()
+        self._memos = OrderedDict() # kiosk_id -> RecognitionMemo
+        self._max_kiosks = max_kiosks
+
+    def for_kiosk(self, kiosk_id):
+        with self._lock:
+            memo = self._memos.get(kiosk_id)
+            if memo is None:
+                memo = self._memos[kiosk_id] = RecognitionMemo()
+                while len(self._memos) > self._max_kiosks:
+                    self._memos.popitem(last=False)
+            else:
+                self._memos.move_to_end(kiosk_id)
+            return memo
+
+    def invalidate(self, emp_id=None):
+        """Forgets memoized matches when employees change in this process (others age out within the TTL)."""
+        with self._lock:
+            memos = list(self._memos.values())
+        for memo in memos:
+            memo.forget(emp_id)
+
+kiosk_memos = register_users_view(KioskMemos())
+
+class KioskChannel:
+    """
+    Per-connection state of a kiosk WebSocket: the selected action (punch-in or punch-out tab)
+    and whether group mode is on, the kiosk's location with its address resolved once, the
+    kiosk's recognition memo (recent identities and their punches), and the frame interval the
+    kiosk is asked to keep, adapted to how long frames take to process.
+
+    The socket loop feeds it control messages (JSON text) and frames (JPEG bytes); each
+    handler returns the messages to send back.
+    """
+
+    def __init__(self, kiosk_id):
+        self.kiosk_id = kiosk_id
+        self.action = 'punchin'
+        self.group = KIOSK_GROUP_MODE # Every face in a frame is punched together
+        self.memo = kiosk_memos.for_kiosk(kiosk_id) # Shared with this kiosk's HTTP fallback requests
+        self.site_id = kiosk_registry.site_for(kiosk_id) # Looked up once per connection
+        self.latitude = None
+        self.longitude = None
+        self._location_key = None
+        self._address = None # Resolved on the first punch, again only after the kiosk moves
+        self._processing_ms = None # Moving average of the time spent per frame
+        self.interval_ms = KIOSK_UPLOAD_INTERVAL_MS
+        self._announced_interval_ms = None
+
+    def handle_control(self, message):
+        """Applies a JSON control message (mode, location or stats). Returns a list of replies."""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return [{'type': 'error', 'message': 'Control messages must be JSON objects.'}]
+
+        kind = data.get('type')
+        if kind == 'mode':
+            if data.get('action') not in ('punchin', 'punchout'):
+                return [{'type': 'error', 'message': 'Invalid action specified.'}]
+            self.action = data['action']
+            if 'group' in data:
+                self.group = bool(data['group'])
+        elif kind == 'location':
+            self.set_location(data.get('latitude'), data.get('longitude'))
+        elif kind == 'stats':
+            if not record_skipped_frames(data.get('skipped')):
+                return [{'type': 'error', 'message': 'Expected a "skipped" object.'}]
+        else:
+            return [{'type': 'error', 'message': f"Unknown message type: {kind}"}]
+        return []
+
+    def set_location(self, latitude, longitude):
+        """Updates the kiosk position; the address is looked up again only if it moved past the geocode cache precision."""
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            latitude = longitude = None
+        key = (round(latitude, GEOCODE_CACHE_PRECISION), round(longitude, GEOCODE_CACHE_PRECISION)) if latitude is not None else None
+        if key != self._location_key:
+            self._location_key, self._address = key, None
+        self.latitude, self.longitude = latitude, longitude
+
+    def handle_frame(self, image_bytes):
+        """Recognizes a frame and records the punch. Returns the result message plus any rate change."""
+        started = time.perf_counter()
+        if self._address is None:
+            self._address = resolve_address(self.latitude, self.longitude)
+        recognize = recognize_group_and_punch if self.group else recognize_and_punch
+        body, status = recognize(
+            image_bytes, self.action, self.latitude, self.longitude, self._address, self.memo, self.site_id, self.kiosk_id
+        )
+
+        self._observe((time.perf_counter() - started) * 1000)
+        messages = [{'type': 'result', 'status': status, **body}]
+        rate = self.rate_message()
+        if rate:
+            messages.append(rate)
+        return messages
+
+    def fell_behind(self):
+        """Slows the kiosk down after frames had to be dropped unprocessed."""
+        self.interval_ms = min(KIOSK_WS_MAX_INTERVAL_MS, int(self.interval_ms * 1.5))
+        return [message for message in [self.rate_message()] if message]
+
+    def _observe(self, elapsed_ms):
+        # Aim for one frame per two processing times, approached gradually so a back-off isn't undone by one fast frame
+        self._processing_ms = elapsed_ms if self._processing_ms is None else 0.8 * self._processing_ms + 0.2 * elapsed_ms
+        target = min(KIOSK_WS_MAX_INTERVAL_MS, max(KIOSK_WS_MIN_INTERVAL_MS, 2 * self._processing_ms))
+        self.interval_ms = int(max(target, 0.9 * self.interval_ms) if target < self.interval_ms else target)
+
+    def rate_message(self, force=False):
+        """A rate message when the interval moved 20% or more from the one last sent, else None."""
+        announced = self._announced_interval_ms
+        if not force and announced is not None and abs(self.interval_ms - announced) < 0.2 * announced:
+            return None
+        self._announced_interval_ms = self.interval_ms
+        return {'type': 'rate', 'interval_ms': self.interval_ms}
@@ -0,0 +1,152 @@
+"""
+Shift schedules and the lateness and worked time stamped onto attendance records.
+
+A shift (shifts collection) has a start and a later end time of day (shifts don't run past
+midnight), minutes of grace before an arrival counts as late, and the departments it covers. An employee's users.shift_id takes precedence
+over their department's shift; anyone else works DEFAULT_SHIFT_START to DEFAULT_SHIFT_END.
+
+Punches and regularizations stamp is_late, late_minutes and worked_minutes as they write, so
+readers count and sum instead of recomputing. Only a day's first punch-in can be late. After a
+shift definition changes, `flask recompute-attendance-shifts` restamps existing records.
+"""
+import datetime
+import threading
+import time
+from collections import namedtuple
+
+from ..config import DEFAULT_SHIFT_END, DEFAULT_SHIFT_START, MAX_SHIFT_ID_LENGTH, SHIFT_CACHE_SECONDS
+from ..extensions import mongo
+from .dates import minutes_between
+from .users import employee_profile_cache
+
+# start and end are HH:MM strings; shift_id is None for the default shift
+Shift = namedtuple('Shift', ['shift_id', 'name', 'start', 'end', 'grace_minutes'])
+
+DEFAULT_SHIFT = Shift(None, 'Default', DEFAULT_SHIFT_START, DEFAULT_SHIFT_END, 0)
+
+def _time_of_day(value, label):
+    """Normalizes an HH:MM value; raises ValueError otherwise."""
+    try:
+        return datetime.time.fromisoformat(str(value).strip()).strftime('%H:%M')
+    except ValueError:
+        raise ValueError(f"{label} must be a time of day (HH:MM).") from None
+
+def parse_shift(data):
+    """
+    Validates a shift definition from the admin API (shiftId, name, start, end, graceMinutes,
+    departments). Returns the shifts document; raises ValueError for invalid fields, including
+    an end that isn't after the start (overnight shifts aren't supported).
+    """
+    shift_id = str(data.get('shiftId', '')).strip()
+    if not shift_id or len(shift_id) > MAX_SHIFT_ID_LENGTH:
+        raise ValueError(f"Shift ID is required (max {MAX_SHIFT_ID_LENGTH} characters).")
+    try:
+        grace_minutes = int(data.get('graceMinutes') or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Grace minutes must be a whole number.") from None
+    if grace_minutes < 0:
+        raise ValueError("Grace minutes can't be negative.")
+    departments = data.get('departments') or []
+    if isinstance(departments, str):
+        departments = departments.split(',')
+    if not isinstance(departments, list) or not all(isinstance(d, str) for d in departments):
+        raise ValueError("Departments must be a list or a comma-separated string.")
+    start, end = _time_of_day(data.get('start'), 'Start'), _time_of_day(data.get('end'), 'End')
+    if end <= start: # Zero-padded HH:MM strings compare in time order
+        raise ValueError("End must be after start; overnight shifts aren't supported.")
+    return {
+        'shift_id': shift_id,
+        'name': str(data.get('name', '')).strip() or shift_id,
+        'start': start,
+        'end': end,
+        'grace_minutes': grace_minutes,
+        'departments': sorted({d.strip() for d in departments if d.strip()})
+    }
+
+class ShiftSchedule:
+    """
+    Per-process copy of the shifts collection (small enough to hold whole), reloaded every
+    SHIFT_CACHE_SECONDS, so a changed definition reaches other workers within that time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._by_department = {}
+        self._loaded_at = None
+
+    def invalidate(self):
+        """Reloads on the next lookup after this process changed a shift."""
+        self._loaded_at = None
+
+    def _refresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < SHIFT_CACHE_SECONDS:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < SHIFT_CACHE_SECONDS:
+                return # Another thread reloaded while we waited for the lock
+            by_id, by_department = {}, {}
+            for doc in mongo.shifts.find({}, {'_id': 0}).sort('shift_id', 1):
+                shift = Shift(doc['shift_id'], doc.get('name') or doc['shift_id'], doc['start'], doc['end'], doc.get('grace_minutes', 0))
+                by_id[shift.shift_id] = shift
+                for department in doc.get('departments', []):
+                    by_department.setdefault(department, shift) # First by shift_id wins a department claimed twice
+            self._by_id, self._by_department, self._loaded_at = by_id, by_department, time.monotonic()
+
+    def for_profile(self, profile):
+        """The shift for an employee profile (see users.employee_profile_cache); None gets the default."""
+        self._refresh()
+        if profile:
+            shift = self._by_id.get(profile.get('shift_id')) or self._by_department.get(profile.get('department'))
+            if shift:
+                return shift
+        return DEFAULT_SHIFT
+
+    def for_employees(self, emp_ids):
+        """{emp_id: Shift} for the given employees."""
+        emp_ids = list(emp_ids)
+        profiles = employee_profile_cache.get_many(emp_ids)
+        return {emp_id: self.for_profile(profiles.get(emp_id)) for emp_id in emp_ids}
+
+    def for_employee(self, emp_id):
+        return self.for_employees([emp_id])[emp_id]
+
+    def get(self, shift_id):
+        """A shift by id, or None."""
+        self._refresh()
+        return self._by_id.get(shift_id)
+
+shift_schedule = ShiftSchedule()
+
+def arrival_fields(shift, punch_in, first_of_day=True):
+    """
+    The shift_id, is_late and late_minutes to store with a punch-in: late by the whole minutes
+    after the shift start, if past its grace, and never for a later punch-in the same day.
+    """
+    late_minutes = 0
+    if first_of_day and punch_in is not None:
+        start = datetime.datetime.combine(punch_in.date(), datetime.time.fromisoformat(shift.start))
+        minutes = int((punch_in - start).total_seconds() // 60)
+        if minutes > shift.grace_minutes:
+            late_minutes = minutes
+    return {'shift_id': shift.shift_id, 'is_late': late_minutes > 0, 'late_minutes': late_minutes}
+
+def worked_minutes(punch_in, punch_out):
+    """Whole minutes between a punch-in and its punch-out, or None while the record is open."""
+    if punch_in is None or punch_out is None:
+        return None
+    return max(0, int((punch_out - punch_in).total_seconds() // 60))
+
+def worked_minutes_expression(punch_out):
+    """
+    Update pipeline expression for worked_minutes when a record's punch-out is set to punch_out:
+    like worked_minutes(), null when there is no readable punch-in.
+    """
+    return {"$let": {
+        "vars": {"minutes": minutes_between("$punch_in", {"$literal": punch_out})},
+        "in": {"$cond": [{"$eq": ["$$minutes", None]}, None, {"$max": [0, "$$minutes"]}]}
+    }}
+
+def record_fields(shift, punch_in, punch_out, first_of_day=True):
+    """arrival_fields plus worked_minutes, for records written or restamped whole."""
+    return {**arrival_fields(shift, punch_in, first_of_day), 'worked_minutes': worked_minutes(punch_in, punch_out)}
@@ -0,0 +1,65 @@
+"""Sites: which offices employees belong to and which site each kiosk serves."""
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import KIOSK_SITE_CACHE_SECONDS, MAX_SITE_ID_LENGTH, MAX_TRACKED_KIOSKS
+from ..extensions import mongo
+
+def parse_site_ids(value):
+    """
+    Normalizes site ids from a form or JSON value (a list or a comma-separated string) into a
+    sorted list of unique ids. Raises ValueError for ids that are too long or not strings.
+    """
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("Site IDs must be a list or a comma-separated string.")
+    site_ids = set()
+    for site_id in value:
+        if not isinstance(site_id, str):
+            raise ValueError("Site IDs must be strings.")
+        site_id = site_id.strip()
+        if len(site_id) > MAX_SITE_ID_LENGTH:
+            raise ValueError(f"Site ID '{site_id[:20]}...' is too long (max {MAX_SITE_ID_LENGTH} characters).")
+        if site_id:
+            site_ids.add(site_id)
+    return sorted(site_ids)
+
+class KioskRegistry:
+    """
+    Per-process cache of kiosk_id -> site_id from the kiosks collection. Entries are trusted for
+    KIOSK_SITE_CACHE_SECONDS, so re-registering a kiosk reaches other workers within that time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites = OrderedDict() # kiosk_id -> (site_id or None, looked up at), least recently looked up first
+
+    def site_for(self, kiosk_id):
+        """The site a kiosk is registered to, or None for unregistered kiosks (global gallery only)."""
+        if not kiosk_id:
+            return None
+        cached = self._sites.get(kiosk_id)
+        if cached and time.monotonic() - cached[1] < KIOSK_SITE_CACHE_SECONDS:
+            return cached[0]
+        kiosk = mongo.kiosks.find_one({"kiosk_id": kiosk_id}, {"site_id": 1})
+        site_id = kiosk.get('site_id') if kiosk else None
+        with self._lock:
+            self._sites.pop(kiosk_id, None)
+            self._sites[kiosk_id] = (site_id, time.monotonic())
+            while len(self._sites) > MAX_TRACKED_KIOSKS:
+                self._sites.popitem(last=False)
+        return site_id
+
+    def invalidate(self, kiosk_id=None):
+        """Drops cached lookups after this process changed a kiosk's registration."""
+        with self._lock:
+            if kiosk_id is None:
+                self._sites.clear()
+            else:
+                self._sites.pop(kiosk_id, None)
+
+kiosk_registry = KioskRegistry()
@@ -0,0 +1,38 @@
+"""Reading uploaded images from a request: multipart parts, raw image bodies or base64 JSON."""
+import base64
+import binascii
+
+from flask import request
+
+from ..metrics import stage_timer
+
+RAW_IMAGE_MIMETYPES = ('image/jpeg', 'image/png', 'application/octet-stream')
+
+def decode_base64_image(data):
+    """Decodes a base64 image string, with or without a data URI prefix."""
+    with stage_timer('base64_decode'):
+        if 'base64,' in data:
+            data = data.split('base64,', 1)[1]
+        return base64.b64decode(data)
+
+def image_upload(field):
+    """
+    Returns (image_bytes, fields) for the current request. The image is read from the multipart
+    file part named field, from a raw image body, or from the base64 string under field in a JSON
+    body (older clients). fields holds the other values: the form, the query string (raw bodies)
+    or the JSON object. image_bytes is None when no image was sent.
+    """
+    with stage_timer('read_upload'):
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get(field)
+            return (upload.read() or None) if upload else None, request.form
+        if request.mimetype in RAW_IMAGE_MIMETYPES:
+            return request.get_data(cache=False) or None, request.args
+        data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, {}
+    photo_data = data.get(field)
+    try:
+        return (decode_base64_image(photo_data) if photo_data else None), data
+    except (binascii.Error, TypeError):
+        return None, data # Treated like a missing photo
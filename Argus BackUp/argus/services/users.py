@@ -0,0 +1,241 @@
+"""
+Per-process views of the users collection (name search index, profile cache) and the
+users version document that keeps them consistent across worker processes.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import EMPLOYEE_PROFILE_CACHE_SIZE, NAME_SEARCH_MAX_IN_IDS, USERS_CHANGE_LOG_SIZE, USERS_VERSION_CHECK_SECONDS
+from ..extensions import mongo
+
+# In-memory views of users (name index, profile cache, face gallery) invalidated on every bump
+_users_views = []
+
+def register_users_view(view):
+    """Registers a view whose invalidate(emp_id) runs whenever this process bumps the users version."""
+    _users_views.append(view)
+    return view
+
+def get_users_version():
+    """Returns the current users collection version (bumped on every profile write)."""
+    doc = mongo.app_meta.find_one({"_id": "users_version"})
+    return doc.get("value", 0) if doc else 0
+
+def get_users_changes(since):
+    """
+    Returns (version, emp_ids): the current users version and the set of employees changed
+    after version `since`, or None for emp_ids when that can't be told (the change log no longer
+    reaches back that far, or a bump changed unspecified employees).
+    """
+    doc = mongo.app_meta.find_one({"_id": "users_version"}) or {}
+    version = doc.get("value", 0)
+    changed = doc.get("changed", [])
+    count = version - since
+    if count < 0 or count > len(changed):
+        return version, None
+    recent = changed[len(changed) - count:]
+    if None in recent:
+        return version, None
+    return version, set(recent)
+
+def bump_users_version(emp_id=None):
+    """
+    Marks the users collection as changed so every worker refreshes its in-memory views.
+    emp_id (None for bulk changes) is logged with the bump, one entry per version.
+    """
+    mongo.app_meta.update_one(
+        {"_id": "users_version"},
+        {"$inc": {"value": 1}, "$push": {"changed": {"$each": [emp_id], "$slice": -USERS_CHANGE_LOG_SIZE}}},
+        upsert=True
+    )
+    for view in _users_views:
+        view.invalidate(emp_id)
+
+def _name_trigrams(text):
+    """Returns the set of 3-character substrings of a lowercased name."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class EmployeeNameIndex:
+    """
+    In-memory trigram index mapping employee full names to emp_ids.
+    The index is rebuilt only when the users version in app_meta changes, and the
+    version itself is checked at most every USERS_VERSION_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._names = {}     # emp_id -> lowercased full name
+        self._trigrams = {}  # trigram -> set of emp_ids
+
+    def invalidate(self, emp_id=None):
+        """Forces a version check on the next search."""
+        self._checked_at = 0.0
+
+    def _refresh_if_stale(self):
+        if self._version is not None and time.monotonic() - self._checked_at < USERS_VERSION_CHECK_SECONDS:
+            return
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < USERS_VERSION_CHECK_SECONDS:
+                return # Another thread refreshed while we waited for the lock
+            version = get_users_version()
+            self._checked_at = time.monotonic()
+            if version == self._version:
+                return
+
+            names = {}
+            trigrams = {}
+            for user in mongo.users.find({}, {"emp_id": 1, "full_name": 1}):
+                emp_id = user.get('emp_id')
+                if not emp_id:
+                    continue
+                name = (user.get('full_name') or '').lower()
+                names[emp_id] = name
+                for gram in _name_trigrams(name):
+                    trigrams.setdefault(gram, set()).add(emp_id)
+
+            # Swap in the new structures atomically; readers keep whatever they already hold
+            self._names, self._trigrams, self._version = names, trigrams, version
+
+    def search(self, text):
+        """Returns the emp_ids whose full name contains `text` (case-insensitive)."""
+        self._refresh_if_stale()
+        needle = text.lower()
+        names, trigrams = self._names, self._trigrams
+
+        if len(needle) < 3:
+            # Too short for trigrams; a scan over the in-memory names is still cheap
+            return [emp_id for emp_id, name in names.items() if needle in name]
+
+        postings = []
+        for gram in _name_trigrams(needle):
+            matches = trigrams.get(gram)
+            if not matches:
+                return []
+            postings.append(matches)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        # Trigrams only narrow the candidates; confirm the full substring match
+        return [emp_id for emp_id in candidates if needle in names[emp_id]]
+
+employee_name_index = register_users_view(EmployeeNameIndex())
+
+def _profile_from_user(user):
+    """Extracts the cached display fields from a users document."""
+    image_path = user.get('image_path') or ''
+    return {
+        'full_name': user.get('full_name') or 'Unknown',
+        'department': user.get('department') or 'Not assigned',
+        'position': user.get('position') or 'Not assigned',
+        'has_photo': bool(image_path) and not image_path.startswith(('http://', 'https://')),
+        'shift_id': user.get('shift_id') # Assigned shift, if any (see services.shifts)
+    }
+
+class EmployeeProfileCache:
+    """
+    Read-through LRU cache of emp_id -> display profile (name, department, position, photo flag, shift).
+    Misses are fetched from users in one query per lookup batch. The whole cache is dropped
+    when another worker bumps the users version, and single entries on local writes.
+    """
+
+    def __init__(self, max_size=EMPLOYEE_PROFILE_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self, emp_id=None):
+        """Drops one employee's profile, or the whole cache when emp_id is None."""
+        with self._lock:
+            if emp_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(emp_id, None)
+
+    def _drop_if_stale(self):
+        if time.monotonic() - self._checked_at < USERS_VERSION_CHECK_SECONDS:
+            return
+        version = get_users_version()
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def get_many(self, emp_ids):
+        """Returns {emp_id: profile} for the given ids; unknown employees are omitted."""
+        self._drop_if_stale()
+        found = {}
+        missing = []
+        with self._lock:
+            for emp_id in set(emp_ids):
+                profile = self._entries.get(emp_id)
+                if profile is None:
+                    missing.append(emp_id)
+                else:
+                    self._entries.move_to_end(emp_id)
+                    found[emp_id] = profile
+
+        if missing:
+            fetched = mongo.users.find(
+                {"emp_id": {"$in": missing}},
+                {"emp_id": 1, "full_name": 1, "department": 1, "position": 1, "image_path": 1, "shift_id": 1}
+            )
+            with self._lock:
+                for user in fetched:
+                    profile = _profile_from_user(user)
+                    found[user['emp_id']] = profile
+                    self._entries[user['emp_id']] = profile
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+
+        return found
+
+employee_profile_cache = register_users_view(EmployeeProfileCache())
+
+def attach_full_names(records):
+    """Sets record['full_name'] from the profile cache, replacing a per-row $lookup into users."""
+    profiles = employee_profile_cache.get_many(r.get('emp_id') for r in records if r.get('emp_id'))
+    for record in records:
+        profile = profiles.get(record.get('emp_id'))
+        record['full_name'] = profile['full_name'] if profile else 'Unknown'
+    return records
+
+def resolve_employee_search(search_text):
+    """
+    Turns an admin search box value into an emp_id condition for attendance queries.
+    Returns (emp_id_condition, join_stages):
+    - a name match within NAME_SEARCH_MAX_IN_IDS gives ({"$in": [...]}, [])
+    - no name match falls back to an exact emp_id search: (search_text, [])
+    - a very broad name match gives (None, stages) where the stages join users and
+      filter on full_name inside the aggregation instead of shipping a huge $in list
+    """
+    matched_emp_ids = employee_name_index.search(search_text)
+
+    if not matched_emp_ids:
+        return search_text, []
+    if len(matched_emp_ids) <= NAME_SEARCH_MAX_IN_IDS:
+        return {"$in": matched_emp_ids}, []
+
+    return None, [
+        {"$lookup": {
+            "from": "users",
+            "localField": "emp_id",
+            "foreignField": "emp_id",
+            "as": "name_match"
+        }},
+        {"$match": {"name_match.full_name": {"$regex": re.escape(search_text), "$options": "i"}}},
+        {"$project": {"name_match": 0}}
+    ]
+
+def count_matching(collection, query, join_stages):
+    """Counts documents matching `query`, running any join stages from resolve_employee_search."""
+    if not join_stages:
+        return collection.count_documents(query)
+    result = list(collection.aggregate([{"$match": query}] + join_stages + [{"$count": "total"}]))
+    return result[0]["total"] if result else 0
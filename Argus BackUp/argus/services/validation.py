@@ -0,0 +1,26 @@
+"""Input validation shared by the signup, profile and admin routes."""
+import re
+
+from ..config import MIN_PASSWORD_LENGTH
+
+def validate_password_complexity(password):
+    """
+    Validates password against complexity rules:
+    - Minimum length
+    - At least one uppercase letter
+    - At least one number
+    - At least one special character
+    """
+    if len(password) < MIN_PASSWORD_LENGTH:
+        return False, f"Password must be at least {MIN_PASSWORD_LENGTH} characters long."
+    if not re.search(r"[A-Z]", password):
+        return False, "Password must contain at least one uppercase letter."
+    if not re.search(r"\d", password):
+        return False, "Password must contain at least one number."
+    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+        return False, "Password must contain at least one special character."
+    return True, "Password meets complexity requirements."
+
+def validate_email_format(email):
+    """Validates basic email format."""
+    return re.match(r'^[^@]+@[^@]+\.[^@]+$', email) is not None
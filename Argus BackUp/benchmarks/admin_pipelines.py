@@ -0,0 +1,155 @@
+"""
+Measures the admin attendance pipelines with and without the users $lookup.
+
+Seeds a scratch database with synthetic employees and attendance rows, then times
+the dashboard page query and the full attendance export both ways:
+
+- lookup: the previous pipelines, joining users on emp_id per row for full_name
+- cache-cold: bare attendance rows plus one users query for the distinct emp_ids
+- cache-warm: bare attendance rows enriched from an in-process dict
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/admin_pipelines.py \
+        --employees 2000 --days 60 --repeat 7
+
+The scratch database (default "argus_bench") is dropped and re-seeded with --reseed.
+
+Backends:
+    --backend mongod   a real server (MONGO_URI); these are the numbers that matter
+    --backend memory   mongomock (pip install mongomock), which runs the pipelines in
+                       Python; it shows the relative cost of the $lookup, not server timings
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import time
+
+from pymongo import MongoClient
+
+
+def seed(db, employees, days):
+    """Creates `employees` users and one attendance row per employee per day."""
+    db.users.drop()
+    db.attendance.drop()
+    db.users.insert_many([
+        {
+            "emp_id": f"E{i:05d}",
+            "full_name": f"Employee {i:05d}",
+            "department": random.choice(["Engineering", "Finance", "Operations", "Sales"]),
+            "position": "Associate",
+            "image_path": f"static/uploads/faces/E{i:05d}.jpg"
+        }
+        for i in range(employees)
+    ])
+    db.users.create_index("emp_id", unique=True)
+
+    today = datetime.date.today()
+    batch = []
+    for day in range(days):
+        date = datetime.datetime.combine(today - datetime.timedelta(days=day), datetime.time())
+        for i in range(employees):
+            punch_in = date.replace(hour=random.randint(8, 10), minute=random.randint(0, 59))
+            punch_out = date.replace(hour=random.randint(17, 19), minute=random.randint(0, 59))
+            batch.append({
+                "emp_id": f"E{i:05d}",
+                "date": date,
+                "punch_in": punch_in,
+                "punch_out": punch_out,
+                "address": "Bench Office",
+                "punch_out_address": "Bench Office",
+                "status": "Completed"
+            })
+            if len(batch) >= 10000:
+                db.attendance.insert_many(batch)
+                batch = []
+    if batch:
+        db.attendance.insert_many(batch)
+    db.attendance.create_index([("status", 1), ("date", -1)])
+
+
+PROJECTION = {
+    "emp_id": 1, "date": 1, "punch_in": 1, "punch_out": 1,
+    "punch_in_address": "$address", "punch_out_address": "$punch_out_address", "status": 1
+}
+
+LOOKUP_STAGES = [
+    {"$lookup": {"from": "users", "localField": "emp_id", "foreignField": "emp_id", "as": "user_info"}},
+    {"$unwind": {"path": "$user_info", "preserveNullAndEmptyArrays": True}},
+    {"$project": {**PROJECTION, "full_name": {"$ifNull": ["$user_info.full_name", "Unknown"]}}}
+]
+
+
+def page_stages():
+    return [{"$match": {"status": {"$ne": "Historical"}}}, {"$sort": {"date": -1}}, {"$skip": 0}, {"$limit": 10}]
+
+
+def export_stages():
+    return [{"$match": {"status": {"$ne": "Historical"}}}, {"$sort": {"date": -1, "punch_in": 1}}]
+
+
+def run_lookup(db, base):
+    return list(db.attendance.aggregate(base + LOOKUP_STAGES))
+
+
+def run_cache_cold(db, base):
+    rows = list(db.attendance.aggregate(base + [{"$project": PROJECTION}]))
+    emp_ids = list({r["emp_id"] for r in rows})
+    names = {u["emp_id"]: u.get("full_name") for u in db.users.find({"emp_id": {"$in": emp_ids}}, {"emp_id": 1, "full_name": 1})}
+    for r in rows:
+        r["full_name"] = names.get(r["emp_id"], "Unknown")
+    return rows
+
+
+def run_cache_warm(db, base, names):
+    rows = list(db.attendance.aggregate(base + [{"$project": PROJECTION}]))
+    for r in rows:
+        r["full_name"] = names.get(r["emp_id"], "Unknown")
+    return rows
+
+
+def open_database(backend, uri, db_name):
+    if backend == "memory":
+        import mongomock
+        return mongomock.MongoClient()[db_name]
+    return MongoClient(uri)[db_name]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("mongod", "memory"), default="mongod")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="argus_bench")
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--reseed", action="store_true")
+    args = parser.parse_args()
+
+    db = open_database(args.backend, args.uri, args.db)
+    if args.reseed or db.attendance.estimated_document_count() == 0:
+        print(f"Seeding {args.employees} employees x {args.days} days into {args.db}...")
+        seed(db, args.employees, args.days)
+
+    names = {u["emp_id"]: u.get("full_name") for u in db.users.find({}, {"emp_id": 1, "full_name": 1})}
+
+    print(f"{'query':<18}{'lookup ms':>12}{'cache-cold ms':>16}{'cache-warm ms':>16}{'speedup':>10}")
+    for label, stages in (("dashboard page", page_stages), ("attendance export", export_stages)):
+        lookup_ms = timed(lambda: run_lookup(db, stages()), args.repeat)
+        cold_ms = timed(lambda: run_cache_cold(db, stages()), args.repeat)
+        warm_ms = timed(lambda: run_cache_warm(db, stages(), names), args.repeat)
+        print(f"{label:<18}{lookup_ms:>12.1f}{cold_ms:>16.1f}{warm_ms:>16.1f}{lookup_ms / warm_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
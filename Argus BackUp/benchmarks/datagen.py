@@ -0,0 +1,184 @@
+"""
+Synthetic data generator for the Argus benchmarks.
+
+Produces a reproducible dataset (fixed --seed):
+- N employees with random 128-d face encodings, shaped like dlib's output and stored
+  packed as float32 Binary (face_encoding_version 2), like the app writes them
+- M days of punches per employee, a configurable fraction of which are regularized
+  (Historical rows plus a Regularized row carrying the original punch times)
+- sample JPEG frames for the kiosk path
+
+If --faces-dir points at real face photos named <anything>.jpg, the first employees
+are enrolled with the real encodings of those photos (requires face_recognition),
+and the kiosk samples are those photos, so recognition requests actually match.
+Otherwise the samples are synthetic noise frames, which exercise decode, detection
+and the "no face" path.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/datagen.py --employees 1000 --days 30
+"""
+import argparse
+import base64
+import datetime
+import io
+import os
+import random
+import struct
+
+ENCODING_DIMENSIONS = 128
+ENCODING_STDDEV = 0.09 # Roughly the per-component spread of dlib face descriptors
+ENCODING_VERSION = 2 # Matches argus.config.FACE_ENCODING_VERSION
+
+
+def random_encoding(rng):
+    """Returns a random 128-d encoding as a list of floats."""
+    return [rng.gauss(0.0, ENCODING_STDDEV) for _ in range(ENCODING_DIMENSIONS)]
+
+
+def pack_encoding(encoding):
+    """Packs a list of floats the way the app stores encodings: little-endian float32 bytes."""
+    from bson import Binary
+
+    return Binary(struct.pack(f"<{ENCODING_DIMENSIONS}f", *encoding))
+
+
+def real_face_samples(faces_dir):
+    """Returns [(jpeg_bytes, encoding_list)] for every photo in faces_dir containing a face."""
+    import face_recognition
+
+    samples = []
+    for name in sorted(os.listdir(faces_dir)):
+        if not name.lower().endswith(('.jpg', '.jpeg')):
+            continue
+        path = os.path.join(faces_dir, name)
+        encodings = face_recognition.face_encodings(face_recognition.load_image_file(path))
+        if encodings:
+            with open(path, 'rb') as f:
+                samples.append((f.read(), encodings[0].tolist()))
+    return samples
+
+
+def synthetic_frames(rng, count, width=640, height=480):
+    """Returns `count` noise JPEG frames of the given size as bytes."""
+    from PIL import Image
+
+    frames = []
+    for _ in range(count):
+        image = Image.frombytes('RGB', (width, height), rng.randbytes(width * height * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=85)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def kiosk_frames(faces_dir=None, frame_count=8, seed=42):
+    """Returns base64 JPEG frames for the kiosk path without touching the database."""
+    if faces_dir:
+        jpegs = [jpeg for jpeg, _ in real_face_samples(faces_dir)]
+    else:
+        jpegs = synthetic_frames(random.Random(seed), frame_count)
+    return [base64.b64encode(jpeg).decode('ascii') for jpeg in jpegs]
+
+
+def _punch_times(rng, day):
+    punch_in = day.replace(hour=rng.randint(8, 10), minute=rng.randint(0, 59), second=rng.randint(0, 59))
+    punch_out = day.replace(hour=rng.randint(17, 19), minute=rng.randint(0, 59), second=rng.randint(0, 59))
+    return punch_in, punch_out
+
+
+def generate(db, employees=1000, days=30, regularization_rate=0.05, faces_dir=None, frame_count=8, seed=42):
+    """
+    Drops and re-populates db.users and db.attendance.
+    Returns a list of base64 JPEG strings to send as kiosk frames.
+    """
+    rng = random.Random(seed)
+    real_samples = real_face_samples(faces_dir) if faces_dir else []
+
+    db.users.drop()
+    db.attendance.drop()
+
+    users = []
+    for i in range(employees):
+        emp_id = f"B{i:06d}"
+        encoding = real_samples[i][1] if i < len(real_samples) else random_encoding(rng)
+        users.append({
+            "emp_id": emp_id,
+            "full_name": f"Bench Employee {i:06d}",
+            "email": f"{emp_id.lower()}@innovasolutions.com",
+            "personal_email": "",
+            "department": rng.choice(["Engineering", "Finance", "Operations", "Sales", "HR"]),
+            "position": "Associate",
+            "password": "",
+            "image_path": f"static/uploads/faces/{emp_id}.jpg",
+            "face_encoding": pack_encoding(encoding),
+            "face_encoding_version": ENCODING_VERSION
+        })
+    db.users.insert_many(users)
+
+    today = datetime.date.today()
+    batch = []
+    for day in range(1, days + 1):
+        date = datetime.datetime.combine(today - datetime.timedelta(days=day), datetime.time()) # Native dates, as the app stores them
+        for user in users:
+            punch_in, punch_out = _punch_times(rng, date)
+            row = {
+                "emp_id": user["emp_id"],
+                "date": date,
+                "punch_in": punch_in,
+                "punch_out": punch_out,
+                "latitude": 12.9716,
+                "longitude": 77.5946,
+                "address": "Bench Office",
+                "punch_out_latitude": 12.9716,
+                "punch_out_longitude": 77.5946,
+                "punch_out_address": "Bench Office",
+                "status": "Completed"
+            }
+            if rng.random() < regularization_rate:
+                batch.append({**row, "status": "Historical"})
+                modified_in, modified_out = _punch_times(rng, date)
+                batch.append({
+                    **row,
+                    "punch_in": modified_in,
+                    "punch_out": modified_out,
+                    "original_punch_in": punch_in,
+                    "original_punch_out": punch_out,
+                    "status": "Regularized",
+                    "regularized_reason": "Benchmark",
+                    "regularized_comments": "",
+                    "regularized_by": user["full_name"],
+                    "regularized_at": date.replace(hour=20)
+                })
+            else:
+                batch.append(row)
+            if len(batch) >= 10000:
+                db.attendance.insert_many(batch)
+                batch = []
+    if batch:
+        db.attendance.insert_many(batch)
+
+    frames = [jpeg for jpeg, _ in real_samples] or synthetic_frames(rng, frame_count)
+    return [base64.b64encode(frame).decode('ascii') for frame in frames]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="argus_bench")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--regularization-rate", type=float, default=0.05)
+    parser.add_argument("--faces-dir")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    db = MongoClient(args.uri)[args.db]
+    frames = generate(db, args.employees, args.days, args.regularization_rate, args.faces_dir, seed=args.seed)
+    print(f"Seeded {args.employees} employees, {db.attendance.estimated_document_count()} attendance rows, "
+          f"{len(frames)} kiosk frames into {args.db}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Micro-benchmarks for the individual stages of the face recognition pipeline.
+
+Each stage is timed in isolation and reported as mean latency, ops/sec and peak
+Python-tracked memory (tracemalloc, which includes NumPy buffers):
+
+    base64_decode          base64 text -> JPEG bytes
+    jpeg_decode            JPEG bytes -> RGB array (what face_recognition.load_image_file does)
+    detect[model@scale]    face_locations at several resolutions, HOG and optionally CNN
+    encode[jitters]        face_encodings for one known face location, various num_jitters
+    match_loop[N]          the per-user np.array + face_distance loop auto_signin used
+    match_vectorized[N]    one distance computation against an N x 128 float64 matrix
+    match_float32[N]       the same against a float32 matrix using the |a-b|^2 expansion
+
+Finally it estimates, per gallery size, how many continuously active kiosks one core
+can serve at the kiosk's 1.5 s cadence from decode + detect + encode + match.
+
+Usage:
+    python benchmarks/face_pipeline.py --image face.jpg
+    python benchmarks/face_pipeline.py --image face.jpg --gallery-sizes 1000,10000,100000 --cnn
+
+Without --image a synthetic frame is used; it contains no face, so the encode stage is
+skipped and detection measures the "nobody in front of the camera" case.
+"""
+import argparse
+import base64
+import io
+import time
+import tracemalloc
+
+import numpy as np
+
+KIOSK_FRAME_INTERVAL_SECONDS = 1.5
+
+
+def measure(fn, repeat, warmup=1):
+    """Returns (mean_seconds, peak_bytes) for calling fn() `repeat` times."""
+    for _ in range(warmup):
+        fn()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / repeat, peak
+
+
+def report(rows):
+    print(f"{'stage':<30}{'mean ms':>12}{'ops/sec':>12}{'peak MiB':>12}")
+    for name, mean, peak in rows:
+        print(f"{name:<30}{mean * 1000:>12.3f}{(1 / mean if mean else 0):>12.1f}{peak / 2**20:>12.2f}")
+
+
+def load_jpeg(args):
+    if args.image:
+        with open(args.image, 'rb') as f:
+            return f.read()
+    from PIL import Image
+
+    rng = np.random.default_rng(args.seed)
+    image = Image.fromarray(rng.integers(0, 256, size=(720, 1280, 3), dtype=np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def decode_jpeg(jpeg_bytes):
+    from PIL import Image
+
+    return np.array(Image.open(io.BytesIO(jpeg_bytes)).convert('RGB'))
+
+
+def downscale(image, scale):
+    if scale == 1.0:
+        return image
+    from PIL import Image
+
+    height, width = image.shape[:2]
+    return np.array(Image.fromarray(image).resize((int(width * scale), int(height * scale))))
+
+
+def random_gallery(size, rng):
+    return rng.normal(0.0, 0.09, size=(size, 128))
+
+
+def match_loop(gallery_rows, probe):
+    """The original auto_signin approach: one face_distance call per stored user."""
+    import face_recognition
+
+    best = 0.0
+    for row in gallery_rows:
+        distance = face_recognition.face_distance([np.array(row)], probe)[0]
+        best = max(best, 1 - distance)
+    return best
+
+
+def match_vectorized(gallery, probe):
+    return 1 - np.linalg.norm(gallery - probe, axis=1).min()
+
+
+def match_float32(gallery32, gallery_sq_norms, probe):
+    probe32 = probe.astype(np.float32)
+    squared = gallery_sq_norms - 2.0 * (gallery32 @ probe32) + probe32 @ probe32
+    return 1 - np.sqrt(max(float(squared.min()), 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="JPEG containing one face")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--scales", default="1.0,0.5,0.25", help="Detection resolutions as fractions of the frame")
+    parser.add_argument("--upsample", type=int, default=1, help="number_of_times_to_upsample for detection")
+    parser.add_argument("--cnn", action="store_true", help="Also time the CNN detector (slow without CUDA)")
+    parser.add_argument("--jitters", default="1,5,10")
+    parser.add_argument("--gallery-sizes", default="1000,10000,100000")
+    parser.add_argument("--loop-max", type=int, default=10000, help="Skip the per-user loop above this gallery size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import face_recognition
+
+    rng = np.random.default_rng(args.seed)
+    rows = []
+
+    jpeg_bytes = load_jpeg(args)
+    encoded = base64.b64encode(jpeg_bytes).decode('ascii')
+    mean, peak = measure(lambda: base64.b64decode(encoded), args.repeat)
+    rows.append(("base64_decode", mean, peak))
+    stage_costs = {"base64_decode": mean}
+
+    mean, peak = measure(lambda: decode_jpeg(jpeg_bytes), args.repeat)
+    rows.append(("jpeg_decode", mean, peak))
+    stage_costs["jpeg_decode"] = mean
+    image = decode_jpeg(jpeg_bytes)
+
+    models = ["hog", "cnn"] if args.cnn else ["hog"]
+    scales = [float(s) for s in args.scales.split(",")]
+    locations = []
+    for model in models:
+        for scale in scales:
+            scaled = downscale(image, scale)
+            mean, peak = measure(
+                lambda: face_recognition.face_locations(scaled, number_of_times_to_upsample=args.upsample, model=model),
+                max(1, args.repeat // (5 if model == "cnn" else 1))
+            )
+            rows.append((f"detect[{model}@{scale:g}]", mean, peak))
+            if model == "hog" and scale == 1.0:
+                stage_costs["detect"] = mean
+                locations = face_recognition.face_locations(scaled, number_of_times_to_upsample=args.upsample)
+
+    probe = rng.normal(0.0, 0.09, size=128)
+    if locations:
+        for jitters in [int(j) for j in args.jitters.split(",")]:
+            mean, peak = measure(
+                lambda: face_recognition.face_encodings(image, known_face_locations=locations[:1], num_jitters=jitters),
+                args.repeat
+            )
+            rows.append((f"encode[jitters={jitters}]", mean, peak))
+            if jitters == 1:
+                stage_costs["encode"] = mean
+        probe = face_recognition.face_encodings(image, known_face_locations=locations[:1])[0]
+    else:
+        print("No face found in the frame; skipping the encode stage (pass --image with a face photo).\n")
+
+    for size in [int(s) for s in args.gallery_sizes.split(",")]:
+        gallery = random_gallery(size, rng)
+        if size <= args.loop_max:
+            gallery_rows = gallery.tolist() # Stored as BSON arrays, so the loop starts from Python lists
+            mean, peak = measure(lambda: match_loop(gallery_rows, probe), max(1, args.repeat // 5))
+            rows.append((f"match_loop[{size}]", mean, peak))
+        mean, peak = measure(lambda: match_vectorized(gallery, probe), args.repeat)
+        rows.append((f"match_vectorized[{size}]", mean, peak))
+        gallery32 = gallery.astype(np.float32)
+        sq_norms = np.einsum('ij,ij->i', gallery32, gallery32)
+        mean, peak = measure(lambda: match_float32(gallery32, sq_norms, probe), args.repeat)
+        rows.append((f"match_float32[{size}]", mean, peak))
+        stage_costs[f"match[{size}]"] = mean
+
+    report(rows)
+
+    fixed_cost = sum(v for k, v in stage_costs.items() if not k.startswith("match["))
+    print(f"\nKiosk sizing at a {KIOSK_FRAME_INTERVAL_SECONDS}s frame cadence (decode + detect + encode + float32 match):")
+    for key, match_cost in stage_costs.items():
+        if not key.startswith("match["):
+            continue
+        per_frame = fixed_cost + match_cost
+        frames_per_core = 1 / per_frame
+        print(f"  gallery {key[6:-1]:>7}: {per_frame * 1000:8.1f} ms/frame, {frames_per_core:6.1f} frames/sec/core, "
+              f"~{frames_per_core * KIOSK_FRAME_INTERVAL_SECONDS:5.1f} continuously active kiosks per core")
+
+
+if __name__ == "__main__":
+    main()
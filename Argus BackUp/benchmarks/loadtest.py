@@ -0,0 +1,290 @@
+"""
+Load test for the kiosk and admin paths.
+
+Seeds a dataset with benchmarks/datagen.py, then drives the Flask app with concurrent
+clients and reports p50/p95/p99 latency and throughput for each scenario:
+
+    kiosk                  POST /auto_signin with sample frames (--kiosk-upload jpeg sends the raw
+                           image/jpeg body current kiosks use, json the legacy base64 contract)
+    admin_dashboard        GET  /admin/dashboard, random pages and name searches
+    export_attendance      GET  /admin/export_attendance?format=csv
+    export_regularization  GET  /admin/export_regularization?format=csv
+
+Backends:
+    --backend mongod   seed and query a real server (MONGO_URI, scratch db --db)
+    --backend memory   use mongomock as an in-memory stand-in (pip install mongomock);
+                       handy for comparing Python-side costs, not Mongo-side ones
+
+By default requests go through Flask's test client in this process. With --base-url
+they are sent over HTTP to a running server instead (seed its database first with
+datagen.py; admin requests log in with ADMIN_USERNAME / ADMIN_PASSWORD).
+
+Baselines:
+    python benchmarks/loadtest.py --save bench_output/baseline.json
+    ...change code...
+    python benchmarks/loadtest.py --compare bench_output/baseline.json
+"""
+import argparse
+import base64
+import concurrent.futures
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen
+
+SCENARIOS = ("kiosk", "admin_dashboard", "export_attendance", "export_regularization")
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100.0 * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+def open_database(backend, uri, db_name):
+    if backend == "memory":
+        import mongomock
+        return mongomock.MongoClient()[db_name]
+    from pymongo import MongoClient
+    return MongoClient(uri)[db_name]
+
+
+def bind_app_to(db):
+    """Builds the Flask app and points its collections at the benchmark database."""
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    from argus import create_app
+    from argus.extensions import mongo
+
+    mongo.use_database(db)
+    flask_app = create_app("all")
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+class InProcessClient:
+    """One Flask test client per worker thread, with an admin session already set."""
+
+    def __init__(self, flask_app):
+        self._app = flask_app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._app.test_client()
+            with client.session_transaction() as sess:
+                sess["admin_logged_in"] = True
+                sess["admin_username"] = "benchmark"
+            self._local.client = client
+        return client
+
+    def get(self, path, params):
+        response = self._client().get(path, query_string=params)
+        response.get_data()
+        return response.status_code
+
+    def post_json(self, path, payload):
+        response = self._client().post(path, json=payload)
+        response.get_data()
+        return response.status_code
+
+    def post_image(self, path, jpeg_bytes, params):
+        response = self._client().post(path, query_string=params, data=jpeg_bytes, content_type="image/jpeg")
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """One requests.Session per worker thread against a running server."""
+
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip("/")
+        self._local = threading.local()
+
+    def _session(self):
+        import requests
+
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.post(f"{self._base_url}/admin/auth", data={
+                "adminid": os.getenv("ADMIN_USERNAME", ""),
+                "adminpass": os.getenv("ADMIN_PASSWORD", "")
+            })
+            self._local.session = session
+        return session
+
+    def get(self, path, params):
+        return self._session().get(f"{self._base_url}{path}", params=params).status_code
+
+    def post_json(self, path, payload):
+        return self._session().post(f"{self._base_url}{path}", json=payload).status_code
+
+    def post_image(self, path, jpeg_bytes, params):
+        return self._session().post(f"{self._base_url}{path}", params=params, data=jpeg_bytes,
+                                    headers={"Content-Type": "image/jpeg"}).status_code
+
+
+def make_request(client, scenario, frames, rng):
+    if scenario == "kiosk":
+        fields = {"action": rng.choice(["punchin", "punchout"]), "latitude": 12.9716, "longitude": 77.5946}
+        frame = rng.choice(frames)
+        if isinstance(frame, bytes):
+            return client.post_image("/auto_signin", frame, fields)
+        return client.post_json("/auto_signin", {"capturedPhoto": frame, **fields})
+    if scenario == "admin_dashboard":
+        params = {"page": rng.randint(1, 20)}
+        if rng.random() < 0.3:
+            # A name prefix matching ten employees, resolved through the name index
+            params["emp_id"] = f"Employee {rng.randint(0, 999):06d}"[:-1]
+        return client.get("/admin/dashboard", params)
+    if scenario == "export_attendance":
+        return client.get("/admin/export_attendance", {"format": "csv"})
+    return client.get("/admin/export_regularization", {"format": "csv"})
+
+
+def run_scenario(client, scenario, frames, requests_count, concurrency, seed):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        rng = random.Random(seed * 100003 + i)
+        started = time.perf_counter()
+        try:
+            status = make_request(client, scenario, frames, rng)
+            # 4xx on the kiosk path means "not recognized / no face", which is a normal outcome
+            failed = status >= 500
+        except Exception:
+            failed = True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed_ms)
+            errors += failed
+
+    wall_started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_count)))
+    wall = time.perf_counter() - wall_started
+
+    latencies.sort()
+    return {
+        "requests": requests_count,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(requests_count / wall, 2) if wall else 0.0
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(results):
+    print(f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}")
+    for scenario, r in results.items():
+        print(f"{scenario:<24}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['throughput_rps']:>10.1f}{r['errors']:>8}")
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nChange vs {baseline_path} (commit {baseline['meta'].get('commit')}); negative latency is better:")
+    print(f"{'scenario':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'req/s':>10}")
+    for scenario, r in results.items():
+        base = baseline["results"].get(scenario)
+        if not base:
+            continue
+
+        def delta(key):
+            return f"{(r[key] - base[key]) / base[key] * 100:+.1f}%" if base[key] else "n/a"
+
+        print(f"{scenario:<24}{delta('p50_ms'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}{delta('throughput_rps'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("mongod", "memory"), default="mongod")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="argus_bench")
+    parser.add_argument("--base-url", help="Drive a running server over HTTP instead of the in-process test client")
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--regularization-rate", type=float, default=0.05)
+    parser.add_argument("--faces-dir", help="Real face photos to enroll and replay on the kiosk path")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--kiosk-upload", choices=("jpeg", "json"), default="jpeg",
+                        help="Send kiosk frames as raw image/jpeg bodies or as base64 in JSON")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-seed-data", action="store_true", help="Reuse the data already in --db")
+    parser.add_argument("--save", help="Write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Baseline JSON to diff the results against")
+    args = parser.parse_args()
+
+    db = open_database(args.backend, args.uri, args.db)
+    if args.no_seed_data:
+        frames = datagen.kiosk_frames(args.faces_dir, seed=args.seed)
+    else:
+        print(f"Seeding {args.employees} employees x {args.days} days ({args.backend})...")
+        frames = datagen.generate(db, args.employees, args.days, args.regularization_rate, args.faces_dir, seed=args.seed)
+
+    if args.kiosk_upload == "jpeg":
+        frames = [base64.b64decode(frame) for frame in frames]
+    print(f"Kiosk upload: {args.kiosk_upload}, mean body "
+          f"{sum(len(f) for f in frames) / max(1, len(frames)) / 1024:.1f} KiB per frame")
+
+    client = HttpClient(args.base_url) if args.base_url else InProcessClient(bind_app_to(db))
+
+    results = {}
+    for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        if scenario not in SCENARIOS:
+            parser.error(f"Unknown scenario '{scenario}'. Choose from: {', '.join(SCENARIOS)}")
+        requests_count = max(1, args.requests // 10) if scenario.startswith("export_") else args.requests
+        results[scenario] = run_scenario(client, scenario, frames, requests_count, args.concurrency, args.seed)
+
+    print_report(results)
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "created_at": datetime.datetime.now().isoformat(),
+                    "backend": args.backend if not args.base_url else f"http {args.base_url}",
+                    "employees": args.employees,
+                    "days": args.days,
+                    "regularization_rate": args.regularization_rate,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "seed": args.seed,
+                    "kiosk_upload": args.kiosk_upload
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
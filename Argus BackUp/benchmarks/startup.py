@@ -0,0 +1,80 @@
+"""
+Cold-start benchmark for importing the app in each process role.
+
+For every role it runs a fresh interpreter with `python -X importtime -c "import app"`
+(ARGUS_ROLE set accordingly) and reports:
+
+- wall time to import the app, median over --repeat runs
+- peak RSS of the child process
+- cumulative import time of the heaviest top-level modules, parsed from -X importtime
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --roles web,recognition --repeat 5 --top 10
+
+The "web" role is expected to start in well under a second since it never imports
+face_recognition, numpy, pandas or requests.
+"""
+import argparse
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_import(role):
+    """Imports the app once in a child interpreter. Returns (wall_seconds, importtime_stderr)."""
+    env = {**os.environ, "ARGUS_ROLE": role}
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing the app as role '{role}' failed:\n{completed.stderr[-2000:]}")
+    return wall, completed.stderr
+
+
+def heaviest_top_level(importtime_output, top):
+    """Returns [(module, cumulative_ms)] for top-level imports, heaviest first."""
+    totals = []
+    for line in importtime_output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and len(match.group(3)) <= 1: # Indentation of one space marks a top-level import
+            totals.append((match.group(4), int(match.group(2)) / 1000))
+    totals.sort(key=lambda item: item[1], reverse=True)
+    return totals[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", default="web,recognition")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    for role in [r.strip() for r in args.roles.split(",") if r.strip()]:
+        walls = []
+        output = ""
+        for _ in range(args.repeat):
+            wall, output = run_import(role)
+            walls.append(wall)
+        # ru_maxrss of children is the max over all children so far (KiB on Linux)
+        peak_rss_mib = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+        print(f"role={role}: import median {statistics.median(walls) * 1000:.0f} ms "
+              f"(min {min(walls) * 1000:.0f} ms), peak RSS so far {peak_rss_mib:.0f} MiB")
+        for module, cumulative_ms in heaviest_top_level(output, args.top):
+            print(f"    {module:<40}{cumulative_ms:>10.1f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
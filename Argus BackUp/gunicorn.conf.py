@@ -0,0 +1,78 @@
+"""
+Production gunicorn configuration.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app (and with it dlib's face models) is imported once in the master process and
+shared with the forked workers copy-on-write. bootstrap() (admin user, indexes) and
+warm_up() (model warm-up, face gallery load) also run once in the master, so workers
+start ready.
+
+The same image runs either tier; set ARGUS_ROLE per deployment:
+    ARGUS_ROLE=recognition   kiosk workers on CPU-heavy nodes ("/", "/auto_signin")
+    ARGUS_ROLE=web           admin, employee and export workers (face models never load)
+
+Environment:
+    ARGUS_ROLE         recognition, web or all (default: all)
+    GUNICORN_WORKERS   worker processes (default: CPU count)
+    GUNICORN_KIOSKS_PER_WORKER  kiosk WebSockets (/kiosk/ws) a worker should hold open
+                       (default: 8); each holds a thread for as long as it is connected
+    GUNICORN_THREADS   threads per worker (default: GUNICORN_KIOSKS_PER_WORKER plus 4 for
+                       HTTP requests); size it to the kiosks a worker actually serves
+    GUNICORN_TIMEOUT   worker timeout in seconds (default: 60)
+    PORT               listen port (default: 5000)
+    PROMETHEUS_MULTIPROC_DIR  shared metrics directory (default: /tmp/argus-metrics)
+    FACE_GALLERY_DIR   on-disk face gallery snapshot every worker maps read-only; must be
+                       local to the host (default: instance/face_gallery)
+"""
+import multiprocessing
+import os
+import shutil
+
+# Must be set before the app imports prometheus_client, which happens at preload below
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/argus-metrics")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True) # Drop samples from a previous run
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+HTTP_THREADS = 4 # Headroom per worker for HTTP requests beside the kiosk WebSockets
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+preload_app = True
+# Recognition is CPU-bound, so one process per core; threads cover Mongo/geocoding waits
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+# Each kiosk WebSocket holds a thread for its lifetime; the rest serve HTTP requests
+kiosks_per_worker = int(os.getenv("GUNICORN_KIOSKS_PER_WORKER", "8"))
+threads = int(os.getenv("GUNICORN_THREADS", kiosks_per_worker + HTTP_THREADS))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+accesslog = "-"
+
+
+def on_starting(server):
+    """Runs once in the master after the app is preloaded, before any worker forks."""
+    from app import app
+    from argus.extensions import mongo
+    from argus.services import faces, maintenance
+    from argus.services.presence import presence
+
+    maintenance.bootstrap()
+    faces.warm_up(app.config["ARGUS_ROLE"])
+    presence.refresh() # Today's presence table, inherited by every worker
+    # Don't hand pooled Mongo sockets to forked children; the client reconnects lazily on next use
+    mongo.close()
+    server.log.info(f"Argus role {app.config['ARGUS_ROLE']} warm: face gallery holds {len(faces.face_gallery)} encodings")
+
+
+def post_worker_init(worker):
+    """Covers running without preload: each worker warms itself (a no-op when inherited warm)."""
+    from app import app
+    from argus.services import faces
+
+    faces.warm_up(app.config["ARGUS_ROLE"])
+
+
+def child_exit(server, worker):
+    """Lets the Prometheus multiprocess collector drop the exited worker's live gauges."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
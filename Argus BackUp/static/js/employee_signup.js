@@ -3,7 +3,8 @@ const video = document.getElementById('signupFacecam');
 const canvas = document.getElementById('signupCanvas');
 const captureBtn = document.getElementById('captureBtn');
 const photoStatus = document.getElementById('photoStatus');
-const capturedImage = document.getElementById('capturedImage');
+const capturedImage = document.getElementById('capturedImage'); // Set once a photo is captured
+let capturedBlob = null; // The captured JPEG, uploaded as a multipart file part
 const faceError = document.getElementById('faceError'); // Error for face capture
 const empIdError = document.getElementById('empIdError'); // Error for empId
 const emailError = document.getElementById('emailError'); // Error for email
@@ -180,11 +181,17 @@ function capturePhoto() {
   canvas.width = video.videoWidth;
   canvas.height = video.videoHeight;
   canvas.getContext('2d').drawImage(video, 0, 0, canvas.width, canvas.height);
-  const imageData = canvas.toDataURL('image/jpeg', 0.9); // Specify quality for smaller file size
-  capturedImage.value = imageData;
-  photoStatus.style.display = 'block';
-  faceError.textContent = '';
-  showToast('Photo captured successfully!', 'success');
+  canvas.toBlob(blob => {
+    if (!blob) {
+      faceError.textContent = 'Could not capture photo. Please try again.';
+      return;
+    }
+    capturedBlob = blob;
+    capturedImage.value = 'captured';
+    photoStatus.style.display = 'block';
+    faceError.textContent = '';
+    showToast('Photo captured successfully!', 'success');
+  }, 'image/jpeg', 0.9); // Specify quality for smaller file size
 }
 
 // Function to validate both password fields and update Bootstrap classes
@@ -303,21 +310,18 @@ async function submitForm(e) {
   submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Registering...';
 
   try {
-    const formData = {
-      fullName: fullNameInput.value.trim(),
-      empId: empIdInput.value.trim(),
-      email: emailInput.value.trim(),
-      personalEmail: personalEmailInput.value.trim(),
-      password: passwordInput.value,
-      capturedImage: capturedImage.value
-    };
+    // Multipart upload: the photo goes as raw JPEG bytes instead of base64 inside JSON
+    const formData = new FormData();
+    formData.append('fullName', fullNameInput.value.trim());
+    formData.append('empId', empIdInput.value.trim());
+    formData.append('email', emailInput.value.trim());
+    formData.append('personalEmail', personalEmailInput.value.trim());
+    formData.append('password', passwordInput.value);
+    formData.append('capturedImage', capturedBlob, 'photo.jpg');
 
     const response = await fetch('/employee_signup', {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify(formData)
+      body: formData // The browser sets the multipart Content-Type and boundary
     });
 
     const result = await response.json(); // Always parse JSON, even on errors
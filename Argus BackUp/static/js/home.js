@@ -19,16 +19,70 @@ document.addEventListener('DOMContentLoaded', function() {
         const loginMessageIn = document.getElementById('loginMessage');
         const loginMessageOut = document.getElementById('loginMessageOut');
 
+        // Pre-filter settings rendered by the server (see KIOSK_* in argus/config.py)
+        const settings = Object.assign({
+            uploadMaxSide: 480,
+            jpegQuality: 0.85,
+            uploadIntervalMs: 1500,
+            analysisIntervalMs: 250,
+            minFaceFraction: 0.12,
+            cropMargin: 0.5,
+            stableSamples: 2,
+            groupMode: false,
+            groupMaxFaces: 6,
+            groupUploadMaxSide: 960
+        }, window.KIOSK_SETTINGS || {});
+        // Group mode (everyone in view punches together) can also be switched on per kiosk with ?group=1
+        const groupMode = settings.groupMode || new URLSearchParams(window.location.search).get('group') === '1';
+
+        // Motion fallback: a tiny grayscale copy of each sample is compared with the previous
+        // sample (is the scene still?) and with a slowly updated background (is someone there?)
+        const ANALYSIS_WIDTH = 64;
+        const ANALYSIS_HEIGHT = 48;
+        const MOTION_STILL_THRESHOLD = 6;      // Mean absolute pixel change between samples
+        const FOREGROUND_THRESHOLD = 18;       // Mean absolute difference from the background
+        const BACKGROUND_LEARNING_RATE = 0.02; // Weight of each sample in the background average
+        const STATS_REPORT_INTERVAL_MS = 30000;
+        const SOCKET_RETRY_MIN_MS = 2000;  // Reconnect backoff for the recognition WebSocket
+        const SOCKET_RETRY_MAX_MS = 60000;
+
         let recognitionInterval;
+        let statsInterval;
         let isProcessing = false;
+        let isAnalyzing = false;
+        let lastSlotAt = 0;
+        let faceDetector = null;
+        let analysisState = { video: null, previous: null, background: null, lastBox: null, stableCount: 0 };
+        let skippedFrames = { no_face: 0, face_too_small: 0, unstable: 0 };
+        const analysisCanvas = document.createElement('canvas');
+        analysisCanvas.width = ANALYSIS_WIDTH;
+        analysisCanvas.height = ANALYSIS_HEIGHT;
+        const analysisContext = analysisCanvas.getContext('2d', { willReadFrequently: true });
+
+        if ('FaceDetector' in window) {
+            try {
+                faceDetector = new window.FaceDetector({ fastMode: true, maxDetectedFaces: groupMode ? settings.groupMaxFaces : 1 });
+            } catch (e) {
+                faceDetector = null; // Present but unsupported on this platform
+            }
+        }
         let currentLocation = { latitude: null, longitude: null, address: null };
         let watchId = null;
 
+        // Long-lived recognition channel; while it is down frames go over HTTP to /auto_signin
+        let socket = null;
+        let socketMode = null; // Action last announced on the socket
+        let socketRetryMs = SOCKET_RETRY_MIN_MS;
+        let socketRetryTimer = null;
+        let uploadIntervalMs = settings.uploadIntervalMs; // Adjusted by the server over the socket
+        const kioskId = getKioskId(); // Lets the server keep per-kiosk state across requests and reconnects
+
         // Initialize cameras
         initCamera(videoIn)
             .then(() => initCamera(videoOut))
             .then(() => {
                 startLocationTracking();
+                connectSocket();
                 startRecognition();
             })
             .catch(error => {
@@ -77,6 +131,8 @@ document.addEventListener('DOMContentLoaded', function() {
             // The backend will handle the conversion of lat/lon to a human-readable address.
             currentLocation.address = null; // Reset address so backend determines it.
 
+            sendControl({ type: 'location', latitude: currentLocation.latitude, longitude: currentLocation.longitude });
+
             const coords = `${currentLocation.latitude.toFixed(6)}, ${currentLocation.longitude.toFixed(6)}`;
             locationStatus.innerHTML = `<i class="bi bi-geo-alt-fill text-primary"></i> Location: ${coords} (Determining accurate address...)`;
         }
@@ -101,72 +157,310 @@ document.addEventListener('DOMContentLoaded', function() {
 
         function startRecognition() {
             clearInterval(recognitionInterval);
+            clearInterval(statsInterval);
 
-            // Changed interval from 3000ms to 1500ms for faster response
-            recognitionInterval = setInterval(() => {
-                if (isProcessing) return;
+            // Sample often to track presence and stability, but upload at most once per uploadIntervalMs
+            recognitionInterval = setInterval(analyzeFrame, settings.analysisIntervalMs);
+            statsInterval = setInterval(reportSkippedFrames, STATS_REPORT_INTERVAL_MS);
+        }
 
-                const activeTab = document.querySelector('#authTabsContent .tab-pane.active').id;
-                const isPunchIn = activeTab === 'punchin';
+        async function analyzeFrame() {
+            if (isProcessing || isAnalyzing) return;
 
-                const video = isPunchIn ? videoIn : videoOut;
-                const canvas = isPunchIn ? canvasIn : canvasOut;
-                const recognitionStatus = isPunchIn ? recognitionStatusIn : recognitionStatusOut;
-                const userInfoSection = isPunchIn ? userInfoSectionIn : userInfoSectionOut;
-                const initialMessage = isPunchIn ? initialMessageIn : initialMessageOut;
-                const loginMessage = isPunchIn ? loginMessageIn : loginMessageOut;
+            const activeTab = document.querySelector('#authTabsContent .tab-pane.active').id;
+            const isPunchIn = activeTab === 'punchin';
 
-                if (userInfoSection.style.display === 'block') return;
+            const video = isPunchIn ? videoIn : videoOut;
+            const userInfoSection = isPunchIn ? userInfoSectionIn : userInfoSectionOut;
 
-                isProcessing = true;
-                recognitionStatus.innerHTML = '<div class="spinner-border spinner-border-sm text-primary"></div> Recognizing...';
+            if (userInfoSection.style.display === 'block') return;
+            if (video.readyState < 2 || !video.videoWidth) return; // Camera not ready yet
 
-                try {
-                    // Check if video is ready
-                    if (video.readyState < 2) {
-                        throw new Error('Camera not ready');
-                    }
+            if (analysisState.video !== video) {
+                // Switching tabs switches cameras; start presence tracking afresh
+                analysisState = { video: video, previous: null, background: null, lastBox: null, stableCount: 0 };
+            }
+
+            isAnalyzing = true;
+            let verdict;
+            try {
+                verdict = faceDetector ? await detectFace(video) : detectMotion(video);
+            } catch (error) {
+                console.warn('FaceDetector failed, falling back to motion detection:', error);
+                faceDetector = null;
+                verdict = { reason: 'unstable' };
+            } finally {
+                isAnalyzing = false;
+            }
+
+            const now = Date.now();
+            if (now - lastSlotAt < uploadIntervalMs) return;
+            lastSlotAt = now;
+
+            if (verdict.reason) {
+                skippedFrames[verdict.reason] += 1; // A frame the server no longer has to decode
+                return;
+            }
+            sendFrame(video, verdict.box, isPunchIn);
+        }
+
+        async function detectFace(video) {
+            const faces = await faceDetector.detect(video);
+            if (!faces.length) {
+                analysisState.lastBox = null;
+                analysisState.stableCount = 0;
+                return { reason: 'no_face' };
+            }
 
-                    canvas.width = video.videoWidth;
-                    canvas.height = video.videoHeight;
-                    canvas.getContext('2d').drawImage(video, 0, 0);
-
-                    const imageData = canvas.toDataURL('image/jpeg');
-
-                    fetch('/auto_signin', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({
-                            capturedPhoto: imageData.split(',')[1],
-                            latitude: currentLocation.latitude,
-                            longitude: currentLocation.longitude,
-                            // Do not send address from frontend; backend will determine it for consistency.
-                            action: isPunchIn ? 'punchin' : 'punchout'
-                        })
-                    })
-                    .then(response => {
-                        if (!response.ok) {
-                            return response.json().then(err => {
-                                throw new Error(JSON.stringify(err));
-                            });
-                        }
-                        return response.json();
-                    })
-                    .then(data => handleRecognitionSuccess(data, isPunchIn, recognitionStatus, userInfoSection, initialMessage))
-                    .catch(error => {
-                        handleRecognitionError(error, recognitionStatus, loginMessage);
-                    })
-                    .finally(() => {
-                        isProcessing = false;
-                    });
+            const box = faces[0].boundingBox;
+            if (box.width < video.videoWidth * settings.minFaceFraction) {
+                analysisState.stableCount = 0;
+                return { reason: 'face_too_small' };
+            }
+
+            // Stable when the face centre moved less than a tenth of the face width since the last sample
+            const last = analysisState.lastBox;
+            const moved = last ? Math.hypot(
+                (box.x + box.width / 2) - (last.x + last.width / 2),
+                (box.y + box.height / 2) - (last.y + last.height / 2)
+            ) : Infinity;
+            analysisState.lastBox = { x: box.x, y: box.y, width: box.width, height: box.height };
+            analysisState.stableCount = moved < box.width * 0.1 ? analysisState.stableCount + 1 : 0;
+
+            if (analysisState.stableCount < settings.stableSamples) return { reason: 'unstable' };
+            // Group mode sends the whole frame once the closest face holds still
+            return { box: groupMode ? null : analysisState.lastBox };
+        }
+
+        function detectMotion(video) {
+            analysisContext.drawImage(video, 0, 0, ANALYSIS_WIDTH, ANALYSIS_HEIGHT);
+            const rgba = analysisContext.getImageData(0, 0, ANALYSIS_WIDTH, ANALYSIS_HEIGHT).data;
+            const gray = new Float32Array(ANALYSIS_WIDTH * ANALYSIS_HEIGHT);
+            for (let i = 0; i < gray.length; i++) {
+                gray[i] = 0.299 * rgba[i * 4] + 0.587 * rgba[i * 4 + 1] + 0.114 * rgba[i * 4 + 2];
+            }
+
+            const previous = analysisState.previous;
+            const background = analysisState.background || Float32Array.from(gray);
+            let motion = 0;
+            let foreground = 0;
+            for (let i = 0; i < gray.length; i++) {
+                if (previous) motion += Math.abs(gray[i] - previous[i]);
+                foreground += Math.abs(gray[i] - background[i]);
+                background[i] += BACKGROUND_LEARNING_RATE * (gray[i] - background[i]);
+            }
+            motion /= gray.length;
+            foreground /= gray.length;
+            analysisState.previous = gray;
+            analysisState.background = background;
+
+            if (!previous || foreground < FOREGROUND_THRESHOLD) {
+                analysisState.stableCount = 0;
+                return { reason: 'no_face' }; // Nothing in front of the camera but the usual scene
+            }
+            analysisState.stableCount = motion < MOTION_STILL_THRESHOLD ? analysisState.stableCount + 1 : 0;
+            if (analysisState.stableCount < settings.stableSamples) return { reason: 'unstable' };
+            return { box: null }; // No face box without a detector: send the whole (downscaled) frame
+        }
+
+        function drawUploadFrame(video, box, canvas) {
+            // Crop to the face plus a margin (or take the whole frame), then downscale so the
+            // longest side is at most uploadMaxSide
+            let sx = 0, sy = 0, sw = video.videoWidth, sh = video.videoHeight;
+            if (box) {
+                const marginX = box.width * settings.cropMargin;
+                const marginY = box.height * settings.cropMargin;
+                sx = Math.max(0, box.x - marginX);
+                sy = Math.max(0, box.y - marginY);
+                sw = Math.min(video.videoWidth, box.x + box.width + marginX) - sx;
+                sh = Math.min(video.videoHeight, box.y + box.height + marginY) - sy;
+            }
+            const maxSide = !box && groupMode ? settings.groupUploadMaxSide : settings.uploadMaxSide;
+            const scale = Math.min(1, maxSide / Math.max(sw, sh));
+            canvas.width = Math.round(sw * scale);
+            canvas.height = Math.round(sh * scale);
+            canvas.getContext('2d').drawImage(video, sx, sy, sw, sh, 0, 0, canvas.width, canvas.height);
+        }
+
+        function sendFrame(video, box, isPunchIn) {
+            const canvas = isPunchIn ? canvasIn : canvasOut;
+            const recognitionStatus = isPunchIn ? recognitionStatusIn : recognitionStatusOut;
+            const userInfoSection = isPunchIn ? userInfoSectionIn : userInfoSectionOut;
+            const initialMessage = isPunchIn ? initialMessageIn : initialMessageOut;
+            const loginMessage = isPunchIn ? loginMessageIn : loginMessageOut;
+            const action = isPunchIn ? 'punchin' : 'punchout';
+
+            if (socketReady()) {
+                // Streamed: results arrive as socket messages, and the server skips frames it can't keep up with
+                recognitionStatus.innerHTML = '<div class="spinner-border spinner-border-sm text-primary"></div> Recognizing...';
+                if (socketMode !== action) {
+                    sendControl({ type: 'mode', action: action, group: groupMode });
+                    socketMode = action;
+                }
+                try {
+                    drawUploadFrame(video, box, canvas);
+                    canvasToBlob(canvas, 'image/jpeg', settings.jpegQuality)
+                        .then(blob => { if (socketReady()) socket.send(blob); })
+                        .catch(error => handleRecognitionError(error, recognitionStatus, loginMessage));
                 } catch (error) {
                     handleRecognitionError(error, recognitionStatus, loginMessage);
+                }
+                return;
+            }
+
+            isProcessing = true;
+            recognitionStatus.innerHTML = '<div class="spinner-border spinner-border-sm text-primary"></div> Recognizing...';
+
+            try {
+                drawUploadFrame(video, box, canvas);
+
+                // Raw JPEG bytes, no base64 or JSON wrapping; the other fields travel in the query string
+                const params = new URLSearchParams({ action: action, kiosk_id: kioskId });
+                if (groupMode) params.set('group', '1');
+                if (currentLocation.latitude !== null && currentLocation.longitude !== null) {
+                    // Do not send address from frontend; backend will determine it for consistency.
+                    params.set('latitude', currentLocation.latitude);
+                    params.set('longitude', currentLocation.longitude);
+                }
+
+                canvasToBlob(canvas, 'image/jpeg', settings.jpegQuality)
+                .then(blob => fetch(`/auto_signin?${params}`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'image/jpeg' },
+                    body: blob
+                }))
+                .then(response => {
+                    if (!response.ok) {
+                        return response.json().then(err => {
+                            throw new Error(JSON.stringify(err));
+                        });
+                    }
+                    return response.json();
+                })
+                .then(data => handleRecognitionSuccess(data, isPunchIn, recognitionStatus, userInfoSection, initialMessage))
+                .catch(error => {
+                    handleRecognitionError(error, recognitionStatus, loginMessage);
+                })
+                .finally(() => {
                     isProcessing = false;
+                });
+            } catch (error) {
+                handleRecognitionError(error, recognitionStatus, loginMessage);
+                isProcessing = false;
+            }
+        }
+
+        function connectSocket() {
+            if (!('WebSocket' in window)) return; // HTTP only
+            clearTimeout(socketRetryTimer);
+            const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+            const ws = new WebSocket(`${scheme}://${window.location.host}/kiosk/ws?kiosk_id=${encodeURIComponent(kioskId)}`);
+
+            ws.addEventListener('open', () => {
+                socket = ws;
+                socketMode = null;
+                socketRetryMs = SOCKET_RETRY_MIN_MS;
+                if (currentLocation.latitude !== null && currentLocation.longitude !== null) {
+                    sendControl({ type: 'location', latitude: currentLocation.latitude, longitude: currentLocation.longitude });
+                }
+            });
+            ws.addEventListener('message', event => handleSocketMessage(event.data));
+            ws.addEventListener('close', () => {
+                if (socket === ws) socket = null;
+                uploadIntervalMs = settings.uploadIntervalMs; // Back to the HTTP cadence
+                socketRetryTimer = setTimeout(connectSocket, socketRetryMs);
+                socketRetryMs = Math.min(SOCKET_RETRY_MAX_MS, socketRetryMs * 2);
+            });
+        }
+
+        function getKioskId() {
+            let id = null;
+            // Opening the kiosk page once with ?kiosk_id=... provisions the id an admin registered to a site
+            const provisioned = new URLSearchParams(window.location.search).get('kiosk_id');
+            try {
+                if (provisioned) {
+                    window.localStorage.setItem('argusKioskId', provisioned.slice(0, 64));
+                }
+                id = window.localStorage.getItem('argusKioskId');
+                if (!id) {
+                    id = window.crypto && window.crypto.randomUUID ? window.crypto.randomUUID()
+                        : `kiosk-${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+                    window.localStorage.setItem('argusKioskId', id);
+                }
+            } catch (e) {
+                id = provisioned ? provisioned.slice(0, 64) : null; // Storage unavailable: the server falls back to the client address
+            }
+            return id || '';
+        }
+
+        function socketReady() {
+            return socket !== null && socket.readyState === WebSocket.OPEN;
+        }
+
+        function sendControl(message) {
+            if (socketReady()) socket.send(JSON.stringify(message));
+        }
+
+        function handleSocketMessage(raw) {
+            let message;
+            try {
+                message = JSON.parse(raw);
+            } catch (e) {
+                console.warn('Ignoring malformed socket message:', raw);
+                return;
+            }
+
+            if (message.type === 'rate') {
+                uploadIntervalMs = message.interval_ms;
+            } else if (message.type === 'result') {
+                const isPunchIn = socketMode !== 'punchout';
+                const recognitionStatus = isPunchIn ? recognitionStatusIn : recognitionStatusOut;
+                const userInfoSection = isPunchIn ? userInfoSectionIn : userInfoSectionOut;
+                const initialMessage = isPunchIn ? initialMessageIn : initialMessageOut;
+                const loginMessage = isPunchIn ? loginMessageIn : loginMessageOut;
+                if (userInfoSection.style.display === 'block') return; // Still showing the last punch
+                if (message.status >= 400) {
+                    handleRecognitionError(new Error(JSON.stringify(message)), recognitionStatus, loginMessage);
+                } else {
+                    handleRecognitionSuccess(message, isPunchIn, recognitionStatus, userInfoSection, initialMessage);
                 }
-            }, 1500); // Changed interval to 1.5 seconds
+            } else if (message.type === 'error') {
+                console.warn('Kiosk socket error:', message.message);
+            }
+        }
+
+        function canvasToBlob(canvas, type, quality) {
+            return new Promise((resolve, reject) => {
+                canvas.toBlob(blob => blob ? resolve(blob) : reject(new Error('Could not encode frame')), type, quality);
+            });
+        }
+
+        function reportSkippedFrames(useBeacon) {
+            const total = skippedFrames.no_face + skippedFrames.face_too_small + skippedFrames.unstable;
+            if (!total) return;
+            const body = JSON.stringify({ skipped: skippedFrames });
+            if (useBeacon !== true && socketReady()) {
+                sendControl({ type: 'stats', skipped: skippedFrames });
+                skippedFrames = { no_face: 0, face_too_small: 0, unstable: 0 };
+                return;
+            }
+            skippedFrames = { no_face: 0, face_too_small: 0, unstable: 0 };
+            if (useBeacon === true && navigator.sendBeacon) {
+                navigator.sendBeacon('/kiosk/frame_stats', new Blob([body], { type: 'application/json' }));
+                return;
+            }
+            fetch('/kiosk/frame_stats', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: body
+            }).catch(error => console.warn('Could not report skipped frames:', error));
         }
 
         function handleRecognitionSuccess(data, isPunchIn, recognitionStatus, userInfoSection, initialMessage) {
+            if (data.group) {
+                handleGroupResult(data, isPunchIn, recognitionStatus, userInfoSection, initialMessage);
+                return;
+            }
             if (data.success) {
                 recognitionStatus.innerHTML = `<span class="text-success">✓ Recognized (${(data.confidence * 100).toFixed(0)}% confidence)</span>`;
                 
@@ -194,6 +488,29 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }
 
+        function handleGroupResult(data, isPunchIn, recognitionStatus, userInfoSection, initialMessage) {
+            const loginMessage = isPunchIn ? loginMessageIn : loginMessageOut;
+            const punched = data.results.filter(result => result.success);
+            const refused = data.results.filter(result => !result.success);
+
+            // Names come from the server; set as text, never as HTML
+            const summary = document.createElement('span');
+            summary.className = 'text-success';
+            summary.textContent = `✓ ${punched.map(result => result.full_name).join(', ')}`;
+            recognitionStatus.replaceChildren(summary);
+            if (refused.length) {
+                showMessage(loginMessage, refused.map(result => `${result.full_name}: ${result.message}`).join(' · '), 'warning');
+            }
+
+            // The card shows the closest person; the status line lists everyone punched
+            showUserInfo(punched[0], isPunchIn);
+            setTimeout(() => {
+                userInfoSection.style.display = 'none';
+                initialMessage.style.display = 'block';
+                recognitionStatus.innerHTML = isPunchIn ? 'Ready for Punch In' : 'Ready for Punch Out';
+            }, 5000);
+        }
+
         function handleRecognitionError(error, recognitionStatus, loginMessage) {
             console.error('Recognition error:', error);
             
@@ -260,6 +577,14 @@ document.addEventListener('DOMContentLoaded', function() {
         // Clean up
         window.addEventListener('beforeunload', () => {
             clearInterval(recognitionInterval);
+            clearInterval(statsInterval);
+            reportSkippedFrames(true);
+            clearTimeout(socketRetryTimer);
+            if (socket) {
+                const closing = socket;
+                socket = null;
+                closing.close();
+            }
             if (watchId) {
                 navigator.geolocation.clearWatch(watchId);
             }
@@ -1,4 +1,4 @@
-const CACHE_NAME = 'faceauth-cache-v1';
+const CACHE_NAME = 'faceauth-cache-v3';
 const urlsToCache = [
   '/',
   '/static/css/home.css',
@@ -16,6 +16,15 @@ self.addEventListener('install', event => {
   );
 });
 
+// Drop caches from earlier versions so updated kiosk scripts take effect
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys().then(names => Promise.all(
+      names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))
+    ))
+  );
+});
+
 // Fetch from cache
 self.addEventListener('fetch', event => {
   event.respondWith(
@@ -0,0 +1,90 @@
+"""
+Shared fixtures (pip install pytest mongomock; run python -m pytest from the project root).
+
+Tests run against mongomock by default. Tests marked mongod need server-only features
+(update pipelines, $dateDiff, transactions, exact bulk write results) and are skipped
+unless ARGUS_TEST_MONGO_URI names a server, ideally a one-member replica set; CI runs the
+whole suite that way as well (see .github/workflows/tests.yml). Each test gets a scratch
+database, dropped afterwards.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import uuid
+
+import pytest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("FACE_GALLERY_DIR", tempfile.mkdtemp(prefix="argus-test-gallery-"))
+
+TEST_MONGO_URI = os.getenv("ARGUS_TEST_MONGO_URI")
+
+_users_versions = itertools.count(1000)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "mongod: needs a real server; runs when ARGUS_TEST_MONGO_URI is set")
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_MONGO_URI:
+        return
+    skip = pytest.mark.skip(reason="needs a real mongod (set ARGUS_TEST_MONGO_URI)")
+    for item in items:
+        if "mongod" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh database with the app's indexes, bound to argus.extensions.mongo."""
+    from argus.extensions import Mongo, mongo
+    from argus.services import users
+    from argus.services.maintenance import ensure_indexes
+    from argus.services.shifts import shift_schedule
+
+    if TEST_MONGO_URI:
+        from pymongo import MongoClient
+        client = MongoClient(TEST_MONGO_URI)
+        database = client[f"argus_test_{uuid.uuid4().hex[:12]}"]
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        database = client["argus_test"]
+        monkeypatch.setattr(Mongo, "supports_transactions", property(lambda self: False)) # mongomock has no sessions
+    mongo.use_database(database)
+    # Process-wide caches must not carry another test's employees or shifts
+    for view in users._users_views:
+        view.invalidate()
+    shift_schedule.invalidate()
+    ensure_indexes()
+    # Views rebuilt on a users version change (name index, face gallery) must see a new one
+    database.app_meta.insert_one({"_id": "users_version", "value": next(_users_versions), "changed": []})
+    yield database
+    mongo.use_database(None)
+    if TEST_MONGO_URI:
+        client.drop_database(database.name)
+    client.close()
+
+
+@pytest.fixture
+def app(db):
+    """A web-role app (no face models) over the test database, inside an app context."""
+    from argus import create_app
+
+    flask_app = create_app("web")
+    flask_app.config["TESTING"] = True
+    with flask_app.test_request_context():
+        yield flask_app
+
+
+@pytest.fixture
+def gallery_dir():
+    """The (emptied) FACE_GALLERY_DIR the face gallery snapshots are written to."""
+    from argus.config import FACE_GALLERY_DIR
+
+    shutil.rmtree(FACE_GALLERY_DIR, ignore_errors=True)
+    os.makedirs(FACE_GALLERY_DIR)
+    yield FACE_GALLERY_DIR
+    shutil.rmtree(FACE_GALLERY_DIR, ignore_errors=True)
@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+from argus.services import dates
+
+JAN_2 = datetime.datetime(2026, 1, 2)
+
+
+@pytest.fixture
+def mixed_days(db):
+    """Records dated 1-4 January, alternating native and legacy string dates."""
+    db.attendance.insert_many([
+        {'emp_id': 'E1', 'date': '2026-01-01'},
+        {'emp_id': 'E2', 'date': JAN_2},
+        {'emp_id': 'E3', 'date': '2026-01-03'},
+        {'emp_id': 'E4', 'date': datetime.datetime(2026, 1, 4)}
+    ])
+    return db
+
+
+def emp_ids(collection, query):
+    return sorted(record['emp_id'] for record in collection.find(query))
+
+
+def test_day():
+    assert dates.day('2026-01-02') == JAN_2
+    assert dates.day('2026-01-02T17:45:10') == JAN_2
+    assert dates.day(datetime.datetime(2026, 1, 2, 17, 45)) == JAN_2
+    assert dates.day(datetime.date(2026, 1, 2)) == JAN_2
+    with pytest.raises(ValueError):
+        dates.day('02/01/2026')
+
+
+def test_local_now_keeps_millisecond_precision():
+    assert dates.local_now().microsecond % 1000 == 0
+
+
+def test_as_datetime():
+    assert dates.as_datetime(JAN_2) is JAN_2
+    assert dates.as_datetime('2026-01-02T09:30:00') == datetime.datetime(2026, 1, 2, 9, 30)
+    assert dates.as_datetime('not a time') is None
+    assert dates.as_datetime(None) is None
+
+
+def test_on_days_matches_both_forms(mixed_days):
+    assert emp_ids(mixed_days.attendance, {'date': dates.on_days('2026-01-02', '2026-01-03')}) == ['E2', 'E3']
+    assert emp_ids(mixed_days.attendance, {'date': dates.on_days(datetime.datetime(2026, 1, 1, 12))}) == ['E1']
+
+
+@pytest.mark.parametrize('start, end, expected', [
+    ('2026-01-02', '2026-01-03', ['E2', 'E3']), # Inclusive at both ends, across both forms
+    ('2026-01-03', None, ['E3', 'E4']),
+    (None, '2026-01-02', ['E1', 'E2']),
+    ('2026-01-02', '2026-01-02', ['E2'])
+])
+def test_between_days_matches_both_forms(mixed_days, start, end, expected):
+    assert emp_ids(mixed_days.attendance, dates.between_days(start, end)) == expected
+
+
+def test_between_days_without_bounds_is_empty():
+    assert dates.between_days() == {}
+    assert dates.between_days('', None) == {}
+
+
+def test_between_days_rejects_a_malformed_day():
+    with pytest.raises(ValueError):
+        dates.between_days('2026-13-01')
+
+
+@pytest.mark.mongod
+def test_as_date_reads_both_forms(db):
+    db.attendance.insert_many([
+        {'n': 1, 'punch_in': datetime.datetime(2026, 1, 2, 9, 30, 15)},
+        {'n': 2, 'punch_in': '2026-01-02T09:30:15.123456'}, # Legacy strings are read to the second
+        {'n': 3, 'punch_in': None},
+        {'n': 4},
+        {'n': 5, 'punch_in': 'garbage'}
+    ])
+    rows = db.attendance.aggregate([
+        {'$sort': {'n': 1}},
+        {'$project': {'_id': 0, 'at': dates.as_date('$punch_in'), 'shown': dates.formatted('$punch_in', '%H:%M')}}
+    ])
+    nine_thirty = datetime.datetime(2026, 1, 2, 9, 30, 15)
+    assert [(row['at'], row['shown']) for row in rows] == [
+        (nine_thirty, '09:30'), (nine_thirty, '09:30'), (None, '-'), (None, '-'), (None, '-')
+    ]
+
+
+@pytest.mark.mongod
+def test_minutes_between_counts_elapsed_minutes(db):
+    db.attendance.insert_one({'punch_in': '2026-01-02T09:00:50', 'punch_out': datetime.datetime(2026, 1, 2, 9, 2, 10)})
+    [row] = db.attendance.aggregate([
+        {'$project': {'_id': 0, 'minutes': dates.minutes_between('$punch_in', '$punch_out')}}
+    ])
+    assert row['minutes'] == 1 # 80 seconds, though two minute boundaries were crossed
@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from argus.services import punches
+
+DAY = datetime.datetime(2026, 3, 2)
+
+
+@pytest.fixture
+def employee(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = {'emp_id': 'E1', 'username': 'e1', 'full_name': 'Employee E1'}
+    return client
+
+
+def regularize(client, **times):
+    return client.post('/regularize_attendance', json={'records': [
+        {'date': DAY.strftime('%d %b %Y'), 'reason': 'Forgot to punch', **times}
+    ]})
+
+
+def test_regularizing_an_open_day_leaves_it_open(db, employee):
+    db.attendance.insert_one(punches.punch_in_document('E1', DAY, DAY.replace(hour=9, minute=40), None, None, 'Gate 1'))
+    response = regularize(employee, modified_in='09:00')
+    assert response.status_code == 200, response.get_json()
+
+    historical = db.attendance.find_one({'status': 'Historical'})
+    assert 'is_active' not in historical
+    record = db.attendance.find_one({'status': 'Regularized'})
+    assert (record['punch_in'], record['original_punch_in']) == (DAY.replace(hour=9), DAY.replace(hour=9, minute=40))
+    assert record['punch_out'] is None
+    # The next kiosk punch-out closes the regularized record, and keeps it Regularized
+    assert db.attendance.find_one(punches.active_punch_filter('E1', DAY))['_id'] == record['_id']
+    [set_stage, _] = punches.punch_out_update(DAY.replace(hour=17), None, None, 'Gate 1')
+    [row] = db.attendance.aggregate([{'$match': {'_id': record['_id']}}, {'$project': {'status': set_stage['$set']['status']}}])
+    assert row['status'] == 'Regularized'
+
+
+def test_regularizing_a_closed_day_is_not_open(db, employee):
+    response = regularize(employee, modified_in='09:00', modified_out='17:00')
+    assert response.status_code == 200, response.get_json()
+    record = db.attendance.find_one({'status': 'Regularized'})
+    assert 'is_active' not in record
+    assert (record['is_late'], record['worked_minutes']) == (False, 480)
+
+
+@pytest.mark.mongod
+def test_punch_out_after_regularizing_keeps_the_record_regularized(db, employee):
+    # On a replica set this runs the transactional path, on a standalone server the plain bulk_write
+    db.attendance.insert_one(punches.punch_in_document('E1', DAY, DAY.replace(hour=9, minute=40), None, None, 'Gate 1'))
+    assert regularize(employee, modified_in='09:00').status_code == 200
+
+    closed = punches.punch_out('E1', DAY, punches.punch_out_update(DAY.replace(hour=17), None, None, 'Gate 2'))
+    record = db.attendance.find_one({'_id': closed})
+    assert record['status'] == 'Regularized'
+    assert (record['punch_out'], record['worked_minutes']) == (DAY.replace(hour=17), 480)
+    assert 'is_active' not in record
+    assert db.attendance.count_documents({'status': 'Regularized'}) == 1
@@ -0,0 +1,208 @@
+import threading
+
+import numpy as np
+import pytest
+
+from argus.services import faces, gallery_snapshots
+from argus.services.faces import FaceGallery, compact_face_gallery, pack_face_encoding
+from argus.services.users import bump_users_version
+
+
+def vector(*values):
+    """A 128-dimension encoding with the given leading values."""
+    encoding = np.zeros(128, dtype=np.float32)
+    encoding[:len(values)] = values
+    return encoding
+
+
+def axis(i, length=1.0):
+    encoding = np.zeros(128, dtype=np.float32)
+    encoding[i] = length
+    return encoding
+
+
+def enroll(db, emp_id, encoding, learned=(), **fields):
+    db.users.insert_one({
+        'emp_id': emp_id, 'full_name': f"Employee {emp_id}", 'face_encoding': pack_face_encoding(encoding),
+        'learned_face_encodings': [pack_face_encoding(e) for e in learned], **fields
+    })
+
+
+@pytest.fixture
+def gallery(db, gallery_dir, monkeypatch):
+    """A fresh gallery whose background compactions are recorded instead of run."""
+    compactions = []
+    monkeypatch.setattr(FaceGallery, '_compact_in_background', lambda self, trigger: compactions.append(trigger))
+    instance = FaceGallery()
+    instance.compactions = compactions
+    return instance
+
+
+def emp_id(match):
+    return match.user['emp_id'] if match.user else None
+
+
+def test_best_match_searches_learned_encodings(db, gallery):
+    enroll(db, 'E1', axis(0), learned=[axis(1)])
+    enroll(db, 'E2', axis(2))
+    match = gallery.best_match(axis(1, 0.9))
+    assert emp_id(match) == 'E1'
+    assert match.nearest_stored_distance == pytest.approx(0.1)
+    assert match.score == pytest.approx(0.9)
+    assert match.margin == pytest.approx(np.linalg.norm(axis(1, 0.9) - axis(2)) - 0.1)
+
+
+def test_best_match_uses_the_centroid(db, gallery):
+    enroll(db, 'E1', axis(0, 0.4), learned=[axis(0, -0.4)]) # Centroid at the origin
+    enroll(db, 'E2', axis(1, 0.35))
+    match = gallery.best_match(vector())
+    assert (emp_id(match), match.score) == ('E1', pytest.approx(1.0))
+    assert match.nearest_stored_distance == pytest.approx(0.4) # Learning looks at stored encodings only
+
+
+def test_best_match_skips_malformed_and_reads_legacy_encodings(db, gallery):
+    db.users.insert_many([
+        {'emp_id': 'E1', 'face_encoding': [0.0] * 127 + [1.0]}, # Legacy array of doubles
+        {'emp_id': 'E2', 'face_encoding': [1.0, 2.0]},
+        {'emp_id': 'E3', 'face_encoding': []}
+    ])
+    gallery.refresh()
+    assert len(gallery) == 1
+    assert emp_id(gallery.best_match(axis(127))) == 'E1'
+
+
+def test_empty_gallery(db, gallery):
+    assert gallery.best_match(axis(0)) == faces.NO_MATCH
+    assert gallery.best_matches([axis(0), axis(1)]) == [faces.NO_MATCH] * 2
+    assert gallery.find_duplicates(axis(0)) == []
+
+
+def test_site_partitions(db, gallery):
+    enroll(db, 'E1', axis(0), learned=[axis(3)], site_ids=['north'])
+    enroll(db, 'E2', axis(1), site_ids=['north', 'south'])
+    enroll(db, 'E3', axis(2))
+    gallery.refresh()
+    assert (len(gallery), gallery.site_size('north'), gallery.site_size('south'), gallery.site_size('west')) == (3, 2, 1, 0)
+    assert emp_id(gallery.best_match(axis(3), site_id='north')) == 'E1' # A learned row, copied into the partition
+    assert emp_id(gallery.best_match(axis(0), site_id='south')) == 'E2' # The only one there
+    assert gallery.best_match(axis(0), site_id='west') == faces.NO_MATCH
+    assert emp_id(gallery.best_match(axis(2))) == 'E3'
+
+
+def test_best_matches_agrees_with_best_match(db, gallery):
+    enroll(db, 'E1', axis(0), learned=[axis(1), axis(4)])
+    enroll(db, 'E2', axis(2), learned=[axis(3)])
+    enroll(db, 'E3', axis(5))
+    probes = [axis(1, 0.8), axis(3, 0.7), vector(0.5, 0.5), axis(5, 1.2)]
+    for single, batched in zip([gallery.best_match(p) for p in probes], gallery.best_matches(probes)):
+        assert emp_id(batched) == emp_id(single)
+        assert (batched.score, batched.margin, batched.nearest_stored_distance) == pytest.approx(
+            (single.score, single.margin, single.nearest_stored_distance), abs=1e-5
+        )
+
+
+def test_find_duplicates(db, gallery):
+    enroll(db, 'E1', axis(0, 0.3))
+    enroll(db, 'E2', axis(1, 0.2))
+    enroll(db, 'E3', axis(2))
+    assert gallery.find_duplicates(vector()) == ['E2', 'E1'] # Closest first
+    assert gallery.find_duplicates(vector(), exclude_emp_id='E2') == ['E1']
+    enroll(db, 'E4', vector())
+    bump_users_version('E4')
+    assert gallery.find_duplicates(vector())[0] == 'E4' # Always checks for faces enrolled elsewhere
+
+
+def test_without_a_snapshot_the_gallery_loads_in_memory(db, gallery):
+    enroll(db, 'E1', axis(0))
+    assert emp_id(gallery.best_match(axis(0))) == 'E1'
+    assert gallery.compactions == ['missing']
+    assert gallery._manifest is None
+
+
+def test_snapshot_and_overlay(db, gallery):
+    enroll(db, 'E1', axis(0), learned=[axis(1)])
+    enroll(db, 'E2', axis(2))
+    enroll(db, 'E3', axis(3))
+    manifest = compact_face_gallery()
+    gallery.refresh()
+    assert (gallery._manifest, gallery.compactions, len(gallery)) == (manifest, [], 3)
+    assert isinstance(gallery._view.base.encodings, np.memmap) # Mapped, not read from users
+    assert emp_id(gallery.best_match(axis(1))) == 'E1'
+
+    # E1 re-enrolled, E2 deleted and E4 enrolled, by other workers
+    db.users.update_one({'emp_id': 'E1'}, {'$set': {'face_encoding': pack_face_encoding(axis(4)), 'learned_face_encodings': []}})
+    db.users.delete_one({'emp_id': 'E2'})
+    enroll(db, 'E4', axis(5))
+    for changed in ('E1', 'E2', 'E4'):
+        bump_users_version(changed)
+    gallery.invalidate()
+
+    assert emp_id(gallery.best_match(axis(4))) == 'E1'
+    assert len(gallery) == 3
+    assert emp_id(gallery.best_match(axis(5))) == 'E4'
+    # E1's and E2's snapshot rows are shadowed: nobody is near them any more
+    assert [m.score for m in gallery.best_matches([axis(1), axis(2)])] == pytest.approx([1 - 2 ** 0.5] * 2)
+    assert gallery.find_duplicates(axis(2)) == []
+    assert gallery._manifest == manifest and gallery.compactions == [] # Still the same snapshot underneath
+
+
+def test_a_large_overlay_is_compacted(db, gallery, monkeypatch):
+    monkeypatch.setattr(faces, 'FACE_GALLERY_COMPACT_AFTER', 2)
+    enroll(db, 'E1', axis(0))
+    compact_face_gallery()
+    gallery.refresh()
+    enroll(db, 'E2', axis(1))
+    bump_users_version('E2')
+    gallery.invalidate()
+    gallery.refresh()
+    assert gallery.compactions == []
+    enroll(db, 'E3', axis(2))
+    bump_users_version('E3')
+    gallery.invalidate()
+    gallery.refresh()
+    assert gallery.compactions == ['delta']
+
+
+def test_unlogged_changes_load_in_memory(db, gallery):
+    enroll(db, 'E1', axis(0))
+    compact_face_gallery()
+    gallery.refresh()
+    db.users.update_one({'emp_id': 'E1'}, {'$set': {'face_encoding': pack_face_encoding(axis(1))}})
+    bump_users_version() # A bulk change names no employees
+    gallery.invalidate()
+    assert emp_id(gallery.best_match(axis(1))) == 'E1'
+    assert gallery.compactions == ['unlogged_changes']
+
+
+def test_background_compaction_is_mapped_on_the_next_lookup(db, gallery_dir):
+    enroll(db, 'E1', axis(0))
+    gallery = FaceGallery()
+    assert emp_id(gallery.best_match(axis(0))) == 'E1' # In memory, compacting in the background
+    for thread in threading.enumerate():
+        if thread.name == 'face-gallery-compaction':
+            thread.join(5)
+    manifest = gallery_snapshots.read_manifest()
+    assert manifest is not None and not gallery._compacting
+    assert emp_id(gallery.best_match(axis(0))) == 'E1'
+    assert gallery._manifest == manifest
+
+
+def test_write_snapshot_keeps_the_previous_generation(tmp_path):
+    users = [{'emp_id': 'E1', 'full_name': 'Employee E1', 'image_path': None, 'site_ids': [], 'rows': 1}]
+    encodings = axis(0)[None, :]
+    for version in (1, 2, 3):
+        gallery_snapshots.write_snapshot(version, users, encodings, encodings, directory=str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'current.json', 'gallery-2.f32', 'gallery-2.json', 'gallery-3.f32', 'gallery-3.json'
+    ]
+    assert gallery_snapshots.read_manifest(str(tmp_path)) == {'version': 3, 'name': 'gallery-3'}
+    # A worker that read the previous manifest can still map it
+    id_table, mapped, centroids = gallery_snapshots.map_snapshot({'version': 2, 'name': 'gallery-2'}, str(tmp_path))
+    assert (id_table['users'], mapped.tolist(), centroids.tolist()) == (users, encodings.tolist(), encodings.tolist())
+
+
+def test_an_empty_snapshot_maps(tmp_path):
+    empty = np.zeros((0, 128), dtype=np.float32)
+    gallery_snapshots.write_snapshot(1, [], empty, empty, directory=str(tmp_path))
+    id_table, encodings, centroids = gallery_snapshots.map_snapshot(gallery_snapshots.read_manifest(str(tmp_path)), str(tmp_path))
+    assert (id_table['users'], encodings, centroids) == ([], None, None)
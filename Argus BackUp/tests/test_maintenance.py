@@ -0,0 +1,146 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from argus.services import maintenance
+
+JAN_2 = datetime.datetime(2026, 1, 2)
+NINE = datetime.datetime(2026, 1, 2, 9, 0, 5)
+FIVE = datetime.datetime(2026, 1, 2, 17, 0)
+
+
+class CapturingAttendance:
+    """Reads from the test database and captures bulk_writes instead of applying them."""
+
+    def __init__(self, collection, error_details=None):
+        self._collection = collection
+        self._error_details = error_details
+        self.batches = []
+
+    def find(self, *args, **kwargs):
+        return self._collection.find(*args, **kwargs)
+
+    def bulk_write(self, operations, ordered):
+        self.batches.append(operations)
+        if self._error_details:
+            raise BulkWriteError(self._error_details)
+        return SimpleNamespace(modified_count=len(operations))
+
+
+@pytest.fixture
+def legacy_attendance(db):
+    """A native record, a legacy closed record, a legacy open record and a malformed one."""
+    ids = db.attendance.insert_many([
+        {'emp_id': 'E1', 'date': JAN_2, 'punch_in': NINE, 'punch_out': FIVE},
+        {'emp_id': 'E2', 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05', 'punch_out': '2026-01-02T17:00:00',
+         'updated_at': FIVE},
+        {'emp_id': 'E3', 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05', 'punch_out': None, 'is_active': True},
+        {'emp_id': 'E4', 'date': '2026-01-02', 'punch_in': 'yesterday morning'}
+    ]).inserted_ids
+    return db, ids
+
+
+def capture(monkeypatch, db, error_details=None):
+    attendance = CapturingAttendance(db.attendance, error_details)
+    monkeypatch.setattr(maintenance, 'mongo', SimpleNamespace(attendance=attendance))
+    return attendance
+
+
+def test_migration_guards_each_update_with_the_strings_it_read(legacy_attendance, monkeypatch):
+    db, ids = legacy_attendance
+    attendance = capture(monkeypatch, db)
+    assert maintenance.migrate_attendance_dates() == (2, 1) # The malformed record is skipped
+    [batch] = attendance.batches
+    assert batch == [
+        UpdateOne(
+            {'_id': ids[1], 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05', 'punch_out': '2026-01-02T17:00:00'},
+            {'$set': {'date': JAN_2, 'punch_in': NINE, 'punch_out': FIVE}}
+        ),
+        UpdateOne(
+            {'_id': ids[2], 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05'},
+            {'$set': {'date': JAN_2, 'punch_in': NINE}}
+        )
+    ]
+
+
+def test_migration_open_only(legacy_attendance, monkeypatch):
+    db, ids = legacy_attendance
+    attendance = capture(monkeypatch, db)
+    assert maintenance.migrate_attendance_dates(open_only=True) == (1, 0)
+    [[operation]] = attendance.batches
+    assert operation == UpdateOne(
+        {'_id': ids[2], 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05'}, {'$set': {'date': JAN_2, 'punch_in': NINE}}
+    )
+
+
+def test_migration_counts_refused_updates_as_skipped(legacy_attendance, monkeypatch):
+    db, _ = legacy_attendance
+    capture(monkeypatch, db, {'nModified': 1, 'writeErrors': [{'index': 1, 'code': 11000}]})
+    assert maintenance.migrate_attendance_dates() == (1, 2)
+
+
+def test_migration_batches(db, monkeypatch):
+    monkeypatch.setattr(maintenance, 'MIGRATION_BATCH_SIZE', 2)
+    db.attendance.insert_many([{'emp_id': f'E{i}', 'date': '2026-01-02'} for i in range(5)])
+    attendance = capture(monkeypatch, db)
+    assert maintenance.migrate_attendance_dates() == (5, 0)
+    assert [len(batch) for batch in attendance.batches] == [2, 2, 1]
+
+
+def test_migration_converts_mixed_records(db, legacy_attendance):
+    _, ids = legacy_attendance
+    assert maintenance.migrate_attendance_dates() == (2, 1)
+    for record_id in ids[:3]:
+        record = db.attendance.find_one({'_id': record_id})
+        assert (record['date'], record['punch_in']) == (JAN_2, NINE)
+    assert db.attendance.find_one({'_id': ids[1]})['punch_out'] == FIVE
+    assert db.attendance.find_one({'_id': ids[3]})['punch_in'] == 'yesterday morning'
+    assert maintenance.migrate_attendance_dates() == (0, 1) # Nothing left but the malformed record
+
+
+def test_migration_leaves_a_record_changed_since_it_was_read(db, monkeypatch):
+    record_id = db.attendance.insert_one({'emp_id': 'E1', 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05'}).inserted_id
+    find = db.attendance.find
+
+    def find_then_regularize(*args, **kwargs):
+        records = list(find(*args, **kwargs))
+        # A write lands between the scan and the update
+        db.attendance.update_one({'_id': record_id}, {'$set': {'punch_in': '2026-01-02T08:30:00'}})
+        return records
+
+    monkeypatch.setattr(maintenance, 'mongo', SimpleNamespace(attendance=SimpleNamespace(
+        find=find_then_regularize, bulk_write=db.attendance.bulk_write
+    )))
+    assert maintenance.migrate_attendance_dates() == (0, 0)
+    assert db.attendance.find_one({'_id': record_id})['punch_in'] == '2026-01-02T08:30:00'
+
+
+def test_migration_skips_an_open_record_superseded_by_a_native_one(db):
+    db.attendance.insert_many([
+        {'emp_id': 'E1', 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05', 'is_active': True},
+        {'emp_id': 'E1', 'date': JAN_2, 'punch_in': FIVE, 'is_active': True}
+    ])
+    assert maintenance.migrate_attendance_dates(open_only=True) == (0, 1)
+
+
+def test_bootstrap_makes_legacy_open_punches_visible_to_punches(db, monkeypatch, tmp_path):
+    from argus.services import punches
+
+    monkeypatch.setenv('ADMIN_USERNAME', 'admin')
+    monkeypatch.setenv('ADMIN_PASSWORD', 'secret')
+    monkeypatch.setattr(maintenance, 'UPLOAD_FOLDER', str(tmp_path))
+    record_id = db.attendance.insert_one(
+        {'emp_id': 'E1', 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05', 'punch_out': None, 'status': 'Present'}
+    ).inserted_id
+    db.attendance.insert_one({'emp_id': 'E2', 'date': '2026-01-02', 'punch_in': '2026-01-02T09:00:05', 'punch_out': FIVE})
+
+    maintenance.bootstrap()
+    record = db.attendance.find_one({'_id': record_id})
+    assert (record['is_active'], record['date'], record['punch_in']) == (True, JAN_2, NINE)
+    assert 'is_active' not in db.attendance.find_one({'emp_id': 'E2'}) # Closed records are left alone
+    # The open record is now the one a punch-in upsert and a punch-out match
+    assert db.attendance.find_one(punches.active_punch_filter('E1', JAN_2))['_id'] == record_id
+    assert not punches.punch_in(punches.punch_in_document('E1', JAN_2, FIVE, None, None, 'Gate 1'))
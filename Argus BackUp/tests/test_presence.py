@@ -0,0 +1,97 @@
+import datetime
+
+import pytest
+
+from argus.services import dates
+from argus.services import presence as presence_module
+from argus.services.presence import PresenceEntry, PresenceTable
+
+TODAY = datetime.datetime(2026, 3, 2)
+
+
+def at(hour, minute=0):
+    return TODAY.replace(hour=hour, minute=minute)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """It is 10:00 on 2 March 2026, and every lookup is due a sync."""
+    now = {'at': at(10)}
+    monkeypatch.setattr(presence_module, 'day', lambda value=None: dates.day(now['at'] if value is None else value))
+    monkeypatch.setattr(presence_module, 'local_now', lambda: now['at'])
+    monkeypatch.setattr(presence_module, 'PRESENCE_SYNC_SECONDS', 0)
+    return now
+
+
+@pytest.fixture
+def attendance(db):
+    db.attendance.insert_many([
+        {'emp_id': 'E1', 'date': TODAY, 'punch_in': at(9), 'is_active': True, 'kiosk_id': 'K1', 'updated_at': at(9)},
+        {'emp_id': 'E2', 'date': TODAY, 'punch_in': at(8), 'punch_out': at(9, 30), 'punch_out_kiosk_id': 'K2',
+         'updated_at': at(9, 30)},
+        # Out, then back in at another kiosk
+        {'emp_id': 'E3', 'date': TODAY, 'punch_in': at(8), 'punch_out': at(8, 30), 'updated_at': at(8, 30)},
+        {'emp_id': 'E3', 'date': '2026-03-02', 'punch_in': '2026-03-02T09:15:00', 'is_active': True, 'kiosk_id': 'K2'},
+        {'emp_id': 'E4', 'date': TODAY, 'punch_in': at(8), 'punch_out': at(9), 'status': 'Historical'},
+        {'emp_id': 'E5', 'date': TODAY - datetime.timedelta(days=1), 'punch_in': at(9), 'is_active': True}
+    ])
+    return db
+
+
+def test_build_from_todays_attendance(attendance, clock):
+    table = PresenceTable()
+    assert table.get('E1') == PresenceEntry('in', at(9), 'K1')
+    assert table.get('E2') == PresenceEntry('out', at(9, 30), 'K2')
+    assert table.get('E3') == PresenceEntry('in', at(9, 15), 'K2')
+    assert table.get('E4') is None # Only a superseded record
+    assert table.get('E5') is None # Yesterday
+    assert (table.present_count(), sorted(emp_id for emp_id, _ in table.punched_in())) == (3, ['E1', 'E3'])
+
+
+def test_sync_picks_up_other_workers_punches(attendance, clock):
+    table = PresenceTable()
+    assert not table.is_in('E6')
+    clock['at'] = at(10, 5)
+    attendance.attendance.insert_one({'emp_id': 'E6', 'date': TODAY, 'punch_in': at(10, 4), 'is_active': True, 'updated_at': at(10, 4)})
+    attendance.attendance.update_one({'emp_id': 'E1'}, {'$set': {'punch_out': at(10, 4), 'updated_at': at(10, 4)}, '$unset': {'is_active': ''}})
+    assert table.is_in('E6')
+    assert table.get('E1') == PresenceEntry('out', at(10, 4), None)
+
+
+def test_sync_reads_only_recent_changes_until_invalidated(attendance, clock):
+    table = PresenceTable()
+    table.refresh()
+    # Changed without updated_at (as a direct database edit would): the sync can't see it
+    attendance.attendance.delete_many({'emp_id': 'E1'})
+    assert table.is_in('E1')
+    table.invalidate('E1')
+    assert table.get('E1') is None
+
+
+def test_record_applies_a_local_punch(attendance, clock):
+    table = PresenceTable()
+    table.refresh()
+    table.record('E2', 'in', at(10), 'K1')
+    assert table.get('E2') == PresenceEntry('in', at(10), 'K1')
+    table.record('E7', 'in', at(9) - datetime.timedelta(days=1)) # Not the table's day: left to its rebuild
+    assert table.get('E7') is None
+
+
+def test_rebuild(attendance, clock, monkeypatch):
+    table = PresenceTable()
+    table.refresh()
+    attendance.attendance.delete_many({'emp_id': 'E2'})
+    assert table.get('E2') is not None
+    table.invalidate()
+    assert table.get('E2') is None
+
+    attendance.attendance.delete_many({'emp_id': 'E3'})
+    monkeypatch.setattr(presence_module, 'PRESENCE_REBUILD_SECONDS', 0)
+    assert table.get('E3') is None
+
+
+def test_a_new_day_starts_empty(attendance, clock):
+    table = PresenceTable()
+    assert table.present_count() == 3
+    clock['at'] = at(0, 5) + datetime.timedelta(days=1)
+    assert table.present_count() == 0
@@ -0,0 +1,108 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from argus.services import punches
+
+DAY = datetime.datetime(2026, 3, 2)
+NINE = datetime.datetime(2026, 3, 2, 9, 0)
+FIVE = datetime.datetime(2026, 3, 2, 17, 30, 45)
+
+
+def open_record(emp_id='E1', now=NINE, **arrival):
+    return punches.punch_in_document(emp_id, DAY, now, 12.9, 77.6, 'Gate 1', 'K1', arrival or None)
+
+
+def test_punch_in_opens_one_record(db):
+    assert punches.punch_in(open_record(is_late=False))
+    record = db.attendance.find_one({'emp_id': 'E1'})
+    assert record['is_active'] is True
+    assert record['punch_in'] == NINE
+    assert record['is_late'] is False
+
+
+def test_punch_in_with_an_open_record_is_refused(db):
+    assert punches.punch_in(open_record())
+    assert not punches.punch_in(open_record(now=NINE + datetime.timedelta(minutes=5)))
+    assert db.attendance.count_documents({'emp_id': 'E1'}) == 1
+
+
+def test_punch_in_after_punch_out_opens_another_record(db):
+    db.attendance.insert_one({'emp_id': 'E1', 'date': DAY, 'punch_in': NINE, 'punch_out': FIVE, 'status': 'Completed'})
+    assert punches.punch_in(open_record(now=FIVE + datetime.timedelta(minutes=1)))
+    assert db.attendance.count_documents({'emp_id': 'E1'}) == 2
+
+
+def test_punch_in_losing_the_unique_index_race_is_refused(monkeypatch):
+    def update_one(*args, **kwargs):
+        raise DuplicateKeyError('E11000 duplicate key error index: active_punch')
+
+    monkeypatch.setattr(punches, 'mongo', SimpleNamespace(attendance=SimpleNamespace(update_one=update_one)))
+    assert punches.punch_in(open_record()) is False
+
+
+def test_punch_in_operation_is_the_same_upsert():
+    document = open_record()
+    fields = {k: v for k, v in document.items() if k not in ('emp_id', 'date', 'is_active')}
+    assert punches.punch_in_operation(document) == UpdateOne(
+        {'emp_id': 'E1', 'date': DAY, 'is_active': True}, {'$setOnInsert': fields}, upsert=True
+    )
+
+
+def test_punch_out_update_is_a_literal_pipeline():
+    set_stage, unset_stage = punches.punch_out_update(FIVE, 12.9, 77.6, '$5 Main Road', 'K2')
+    fields = set_stage['$set']
+    # Values that could read as field paths or operators stay literal
+    assert fields['punch_out'] == {'$literal': FIVE}
+    assert fields['punch_out_address'] == {'$literal': '$5 Main Road'}
+    assert fields['punch_out_kiosk_id'] == {'$literal': 'K2'}
+    assert fields['updated_at'] == {'$literal': FIVE}
+    assert 'worked_minutes' in fields
+    assert unset_stage == {'$unset': 'is_active'}
+
+
+@pytest.mark.parametrize('status, expected', [
+    ('Present', 'Completed'),
+    ('Regularized', 'Regularized') # An open regularized day stays in the regularization views
+])
+def test_punch_out_status(db, status, expected):
+    db.attendance.insert_one({'emp_id': 'E1', 'date': DAY, 'punch_in': NINE, 'status': status, 'is_active': True})
+    [set_stage, _] = punches.punch_out_update(FIVE, None, None, 'Gate 1')
+    [row] = db.attendance.aggregate([{'$project': {'_id': 0, 'status': set_stage['$set']['status']}}])
+    assert row['status'] == expected
+
+
+def test_punch_out_without_an_open_record(db):
+    db.attendance.insert_one({'emp_id': 'E1', 'date': DAY, 'punch_in': NINE, 'punch_out': FIVE, 'status': 'Completed'})
+    assert punches.punch_out('E1', DAY, punches.punch_out_update(FIVE, None, None, 'Gate 1')) is None
+
+
+@pytest.mark.mongod
+def test_punch_out_closes_the_open_record(db):
+    punches.punch_in(open_record())
+    record_id = db.attendance.find_one({'emp_id': 'E1'})['_id']
+    assert punches.punch_out('E1', DAY, punches.punch_out_update(FIVE, 12.9, 77.6, '$5 Main Road', 'K2')) == record_id
+    record = db.attendance.find_one({'_id': record_id})
+    assert 'is_active' not in record
+    assert record['punch_out'] == FIVE
+    assert record['punch_out_address'] == '$5 Main Road'
+    assert record['status'] == 'Completed'
+    assert record['worked_minutes'] == 510
+    # Closed, so the next punch-out finds nothing and the next punch-in opens a new record
+    assert punches.punch_out('E1', DAY, punches.punch_out_update(FIVE, None, None, 'Gate 1')) is None
+    assert punches.punch_in(open_record(now=FIVE))
+
+
+@pytest.mark.parametrize('punch_in, expected', [
+    (None, None), # Like shifts.worked_minutes(): no punch-in, no worked time
+    ('2026-03-02T09:00:00', 510), # Legacy string punch-in
+    (FIVE + datetime.timedelta(minutes=1), 0) # Clock skew never gives negative time
+])
+@pytest.mark.mongod
+def test_punch_out_worked_minutes(db, punch_in, expected):
+    db.attendance.insert_one({'emp_id': 'E1', 'date': DAY, 'punch_in': punch_in, 'is_active': True})
+    punches.punch_out('E1', DAY, punches.punch_out_update(FIVE, None, None, 'Gate 1'))
+    assert db.attendance.find_one({'emp_id': 'E1'})['worked_minutes'] == expected
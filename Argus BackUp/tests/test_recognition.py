@@ -0,0 +1,256 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from argus.services import recognition
+from argus.services.faces import FaceMatch
+from argus.services.shifts import DEFAULT_SHIFT
+
+
+class FakePresence:
+    """Records what recognition tells the presence table; knows nobody."""
+
+    def __init__(self):
+        self.recorded, self.invalidated = [], []
+
+    def get(self, emp_id):
+        return None
+
+    def record(self, emp_id, state, since, kiosk_id=None):
+        self.recorded.append((emp_id, state))
+
+    def invalidate(self, emp_id=None):
+        self.invalidated.append(emp_id)
+
+
+class FakeShifts:
+    def for_employee(self, emp_id):
+        return DEFAULT_SHIFT
+
+    def for_employees(self, emp_ids):
+        return {emp_id: DEFAULT_SHIFT for emp_id in emp_ids}
+
+
+@pytest.fixture
+def presence(app, monkeypatch):
+    fake = FakePresence()
+    monkeypatch.setattr(recognition, 'presence', fake)
+    monkeypatch.setattr(recognition, 'shift_schedule', FakeShifts())
+    monkeypatch.setattr(recognition, '_learn', lambda match, encoding: None)
+    return fake
+
+
+def match(emp_id):
+    return FaceMatch({'emp_id': emp_id, 'full_name': f"Employee {emp_id}", 'image_path': f"faces/{emp_id}.jpg"}, 0.8, 0.2, 0.3)
+
+
+def punch(action, *emp_ids):
+    matches = [match(emp_id) for emp_id in emp_ids]
+    return recognition.record_group_punches(matches, [None] * len(matches), action, None, None, address='Gate 1', kiosk_id='K1')
+
+
+@pytest.fixture
+def ten_am(monkeypatch):
+    """Punches happen at 10:00 on 2 March 2026, an hour into DEFAULT_SHIFT (09:00, no grace)."""
+    today = datetime.datetime(2026, 3, 2)
+    monkeypatch.setattr(recognition, 'day', lambda: today)
+    monkeypatch.setattr(recognition, 'local_now', lambda: today.replace(hour=10))
+    return today
+
+
+def test_record_punch_in_then_already_in(db, presence):
+    body, status = recognition.record_punch(match('E1'), None, 'punchin', None, None, address='Gate 1')
+    assert status == 200 and body['status'] == 'Punched In Successfully'
+    assert presence.recorded == [('E1', 'in')]
+
+    body, status = recognition.record_punch(match('E1'), None, 'punchin', None, None, address='Gate 1')
+    assert (status, body['message']) == (400, recognition.ALREADY_PUNCHED_IN)
+    assert presence.invalidated == ['E1']
+    assert db.attendance.count_documents({'emp_id': 'E1'}) == 1
+
+
+def test_record_punch_in_losing_the_race_is_already_in(presence, monkeypatch):
+    monkeypatch.setattr(recognition, 'punch_in', lambda document: False) # punches.punch_in's DuplicateKeyError result
+    body, status = recognition.record_punch(match('E1'), None, 'punchin', None, None, address='Gate 1')
+    assert (status, body['message']) == (400, recognition.ALREADY_PUNCHED_IN)
+    assert presence.recorded == []
+
+
+def test_record_punch_out_without_punch_in(db, presence):
+    body, status = recognition.record_punch(match('E1'), None, 'punchout', None, None, address='Gate 1')
+    assert (status, body['message']) == (400, recognition.NO_ACTIVE_PUNCH_IN)
+
+
+@pytest.mark.mongod
+def test_group_punch_in_refuses_only_those_already_in(db, presence):
+    assert punch('punchin', 'E2')[0][1] == 200
+    results = punch('punchin', 'E1', 'E2', 'E3')
+    assert [status for _, status in results] == [200, 400, 200]
+    assert results[1][0]['message'] == recognition.ALREADY_PUNCHED_IN
+    assert [body['emp_id'] for body, _ in results] == ['E1', 'E2', 'E3']
+    assert presence.invalidated == ['E2']
+    assert db.attendance.count_documents({'is_active': True}) == 3
+
+
+def test_group_punch_in_maps_bulk_write_errors_to_matches(presence, monkeypatch):
+    details = {
+        'upserted': [{'index': 0, '_id': 'a'}, {'index': 3, '_id': 'b'}],
+        'writeErrors': [
+            {'index': 1, 'code': 11000, 'errmsg': 'E11000 duplicate key error index: active_punch'},
+            {'index': 2, 'code': 121, 'errmsg': 'Document failed validation'}
+        ],
+        'nModified': 0
+    }
+
+    def bulk_write(operations, ordered):
+        assert len(operations) == 4 and not ordered
+        raise BulkWriteError(details)
+
+    monkeypatch.setattr(recognition, 'mongo', SimpleNamespace(attendance=SimpleNamespace(bulk_write=bulk_write)))
+    results = punch('punchin', 'E1', 'E2', 'E3', 'E4')
+    assert [status for _, status in results] == [200, 400, 500, 200]
+    assert results[1][0]['message'] == recognition.ALREADY_PUNCHED_IN
+    assert [body['emp_id'] for body, _ in results] == ['E1', 'E2', 'E3', 'E4']
+    assert presence.recorded == [('E1', 'in'), ('E4', 'in')]
+    assert presence.invalidated == ['E2']
+
+
+def test_group_punch_out_reads_back_who_was_closed(presence, monkeypatch):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    queries = []
+
+    class Attendance:
+        def bulk_write(self, operations, ordered):
+            return SimpleNamespace(bulk_api_result={'nModified': 1, 'writeErrors': []})
+
+        def find(self, query, projection):
+            queries.append(query)
+            return [{'emp_id': 'E2'}]
+
+    monkeypatch.setattr(recognition, 'mongo', SimpleNamespace(attendance=Attendance()))
+    results = punch('punchout', 'E1', 'E2')
+    assert [status for _, status in results] == [400, 200]
+    assert results[0][0]['message'] == recognition.NO_ACTIVE_PUNCH_IN
+    assert queries[0]['emp_id'] == {'$in': ['E1', 'E2']} and queries[0]['date'] == today
+    assert presence.recorded == [('E2', 'out')]
+
+
+def test_group_punch_invalid_action(presence):
+    assert [status for _, status in punch('lunch', 'E1', 'E2')] == [400, 400]
+
+
+def test_record_punch_in_stamps_only_the_first_of_the_day(db, presence, ten_am):
+    # E1 punched in and out earlier at another worker, whose presence table this one hasn't seen
+    db.attendance.insert_one({'emp_id': 'E1', 'date': ten_am, 'punch_in': ten_am.replace(hour=9, minute=30),
+                              'punch_out': ten_am.replace(hour=9, minute=45), 'status': 'Completed'})
+    for emp_id in ('E1', 'E2'):
+        assert recognition.record_punch(match(emp_id), None, 'punchin', None, None, address='Gate 1')[1] == 200
+    stamped = {r['emp_id']: (r['is_late'], r['late_minutes']) for r in db.attendance.find({'is_active': True})}
+    assert stamped == {'E1': (False, 0), 'E2': (True, 60)}
+
+
+def test_record_punch_in_reads_legacy_string_dates(db, presence, ten_am):
+    db.attendance.insert_one({'emp_id': 'E1', 'date': '2026-03-02', 'punch_in': '2026-03-02T09:30:00',
+                              'punch_out': '2026-03-02T09:45:00', 'status': 'Completed'})
+    recognition.record_punch(match('E1'), None, 'punchin', None, None, address='Gate 1')
+    assert db.attendance.find_one({'is_active': True})['is_late'] is False
+
+
+def test_group_punch_in_stamps_only_the_first_of_the_day(db, presence, ten_am):
+    db.attendance.insert_one({'emp_id': 'E1', 'date': ten_am, 'punch_in': ten_am.replace(hour=9, minute=30),
+                              'punch_out': ten_am.replace(hour=9, minute=45), 'status': 'Completed'})
+    assert [status for _, status in punch('punchin', 'E1', 'E2')] == [200, 200]
+    stamped = {r['emp_id']: (r['is_late'], r['late_minutes']) for r in db.attendance.find({'is_active': True})}
+    assert stamped == {'E1': (False, 0), 'E2': (True, 60)}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test moves by hand."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(recognition.time, 'monotonic', lambda: now.value)
+    return now
+
+
+def face(*values):
+    return [*values] + [0.0] * (128 - len(values))
+
+
+def test_memo_lookup_returns_the_closest_live_entry(clock):
+    memo = recognition.RecognitionMemo(ttl=5, size=8, distance=0.3)
+    assert memo.lookup(face(0.0)) is None
+    memo.remember(face(0.0), match('E1'))
+    memo.remember(face(0.25), match('E2'))
+    assert memo.lookup(face(0.2)).match.user['emp_id'] == 'E2'
+    assert memo.lookup(face(-0.2)).match.user['emp_id'] == 'E1'
+    assert memo.lookup(face(0.6)) is None # Beyond the memo distance of both
+
+    clock.value += 6
+    assert memo.lookup(face(0.0)) is None # Expired
+
+
+def test_memo_keeps_the_most_recent_people(clock):
+    memo = recognition.RecognitionMemo(ttl=5, size=2, distance=0.3)
+    memo.remember(face(0.0), match('E1'))
+    memo.remember(face(1.0), match('E2'))
+    memo.remember(face(0.05), match('E1')) # Replaces E1's entry and makes it the newest
+    memo.remember(face(2.0), match('E3'))
+    assert memo.lookup(face(1.0)) is None
+    assert memo.lookup(face(0.0)).encoding[0] == pytest.approx(0.05)
+
+    memo.forget('E1')
+    assert memo.lookup(face(0.0)) is None
+    assert memo.lookup(face(2.0)) is not None
+
+
+@pytest.mark.parametrize('recorded, status, repeated', [
+    ('punchin', 200, {'punchin': True, 'punchout': False}),
+    ('punchin', 400, {'punchin': True, 'punchout': False}), # Refused as already in
+    ('punchout', 200, {'punchin': False, 'punchout': True}),
+    ('punchin', 500, {'punchin': False, 'punchout': False}) # A failed write tells nothing
+])
+def test_memo_entry_repeats(recorded, status, repeated):
+    entry = recognition.RecognitionMemo().remember(face(0.0), match('E1'))
+    assert not entry.repeats('punchin') and not entry.repeats('punchout')
+    entry.punch_recorded(recorded, status)
+    assert {action: entry.repeats(action) for action in recognition.PUNCH_ACTIONS} == repeated
+
+
+def test_kiosk_memos(clock):
+    memos = recognition.KioskMemos(max_kiosks=2)
+    first = memos.for_kiosk('K1')
+    assert memos.for_kiosk('K1') is first
+    memos.for_kiosk('K2')
+    memos.for_kiosk('K1')
+    memos.for_kiosk('K3') # Evicts K2, the least recently used
+    assert memos.for_kiosk('K1') is first
+
+    first.remember(face(0.0), match('E1'))
+    first.remember(face(1.0), match('E2'))
+    memos.invalidate('E1')
+    assert first.lookup(face(0.0)) is None
+    assert first.lookup(face(1.0)) is not None
+
+
+def test_recognize_and_punch_uses_the_memo(clock, monkeypatch):
+    scans, punches = [], []
+    monkeypatch.setattr(recognition, 'encode_frame', lambda image_bytes: (face(0.1), None))
+    monkeypatch.setattr(recognition, 'identify', lambda encoding, site_id: scans.append(encoding) or (match('E1'), None))
+
+    def record_punch(match, encoding, action, latitude, longitude, address, kiosk_id):
+        punches.append(action)
+        return {'success': True}, 200
+    monkeypatch.setattr(recognition, 'record_punch', record_punch)
+
+    memo = recognition.RecognitionMemo()
+    assert recognition.recognize_and_punch(b'frame', 'punchin', None, None, memo=memo)[1] == 200
+    body, status = recognition.recognize_and_punch(b'frame', 'punchin', None, None, memo=memo)
+    assert (status, body['message']) == (400, recognition.ALREADY_PUNCHED_IN) # Refused without a write
+    assert recognition.recognize_and_punch(b'frame', 'punchout', None, None, memo=memo)[1] == 200
+    assert (len(scans), punches) == (1, ['punchin', 'punchout']) # One gallery scan for all three frames
+
+    clock.value += recognition.KIOSK_MEMO_TTL_SECONDS + 1
+    recognition.recognize_and_punch(b'frame', 'punchout', None, None, memo=memo)
+    assert len(scans) == 2
@@ -0,0 +1,118 @@
+import datetime
+
+import pytest
+
+from argus.services import shifts
+from argus.services.maintenance import recompute_attendance_shifts
+from argus.services.shifts import DEFAULT_SHIFT, Shift
+
+DAY = datetime.datetime(2026, 3, 2)
+EARLY = Shift('early', 'Early', '07:00', '15:00', 10)
+
+
+def at(hour, minute=0, days=0):
+    return DAY.replace(hour=hour, minute=minute) + datetime.timedelta(days=days)
+
+
+def test_parse_shift():
+    assert shifts.parse_shift({
+        'shiftId': ' early ', 'start': ' 07:00:00', 'end': '15:00', 'graceMinutes': '10', 'departments': 'Stores, Packing,Stores,'
+    }) == {
+        'shift_id': 'early', 'name': 'early', 'start': '07:00', 'end': '15:00', 'grace_minutes': 10,
+        'departments': ['Packing', 'Stores']
+    }
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'start': '09:00', 'end': '17:00'}, 'Shift ID is required'),
+    ({'shiftId': 'night', 'start': '22:00', 'end': '06:00'}, 'overnight'),
+    ({'shiftId': 'x', 'start': '9am', 'end': '17:00'}, 'Start must be a time of day'),
+    ({'shiftId': 'x', 'start': '09:00', 'end': '17:00', 'graceMinutes': -5}, "can't be negative"),
+    ({'shiftId': 'x', 'start': '09:00', 'end': '17:00', 'departments': 7}, 'Departments must be')
+])
+def test_parse_shift_rejects(data, message):
+    with pytest.raises(ValueError, match=message):
+        shifts.parse_shift(data)
+
+
+def test_schedule_precedence(db):
+    db.shifts.insert_many([
+        shifts.parse_shift({'shiftId': 'early', 'start': '07:00', 'end': '15:00', 'departments': ['Stores']}),
+        shifts.parse_shift({'shiftId': 'late', 'start': '13:00', 'end': '21:00', 'departments': ['Stores', 'Packing']})
+    ])
+    db.users.insert_many([
+        {'emp_id': 'E1', 'department': 'Stores'},
+        {'emp_id': 'E2', 'department': 'Stores', 'shift_id': 'late'},  # Assigned: over the department's
+        {'emp_id': 'E3', 'department': 'Packing'},
+        {'emp_id': 'E4', 'department': 'Office', 'shift_id': 'gone'}  # Unknown shift, uncovered department
+    ])
+    by_employee = shifts.shift_schedule.for_employees(['E1', 'E2', 'E3', 'E4', 'E5'])
+    assert {emp_id: shift.shift_id for emp_id, shift in by_employee.items()} == {
+        'E1': 'early', # Stores is claimed twice; the first shift_id wins
+        'E2': 'late',
+        'E3': 'late',
+        'E4': None,
+        'E5': None # Not an employee
+    }
+
+
+@pytest.mark.parametrize('punch_in, first_of_day, expected', [
+    (at(7, 10), True, (False, 0)),  # Within the grace
+    (at(7, 11), True, (True, 11)),  # Past it: late by every minute since the start
+    (at(6, 50), True, (False, 0)),
+    (at(9, 0), False, (False, 0)),  # A later punch-in the same day
+    (None, True, (False, 0))
+])
+def test_arrival_fields(punch_in, first_of_day, expected):
+    fields = shifts.arrival_fields(EARLY, punch_in, first_of_day)
+    assert (fields['shift_id'], (fields['is_late'], fields['late_minutes'])) == ('early', expected)
+
+
+def test_worked_minutes():
+    assert shifts.worked_minutes(at(9), at(17, 30)) == 510
+    assert shifts.worked_minutes(at(9), None) is None
+    assert shifts.worked_minutes(at(9), at(8)) == 0
+    assert shifts.record_fields(DEFAULT_SHIFT, at(9, 5), at(17)) == {
+        'shift_id': None, 'is_late': True, 'late_minutes': 5, 'worked_minutes': 475
+    }
+
+
+@pytest.fixture
+def unstamped(db):
+    """Two days of E1's attendance, written before any shift stamps; E2 has a legacy string record."""
+    db.users.insert_many([{'emp_id': 'E1', 'shift_id': 'early'}, {'emp_id': 'E2'}])
+    db.shifts.insert_one(EARLY._asdict())
+    db.attendance.insert_many([
+        {'emp_id': 'E1', 'date': DAY, 'punch_in': at(13), 'punch_out': at(15)},  # Back after lunch
+        {'emp_id': 'E1', 'date': DAY, 'punch_in': at(7, 30), 'punch_out': at(12)},
+        {'emp_id': 'E1', 'date': DAY, 'punch_in': at(7), 'punch_out': at(15), 'status': 'Historical'},
+        {'emp_id': 'E1', 'date': at(0, days=1), 'punch_in': at(7, 20, days=1), 'punch_out': None},
+        {'emp_id': 'E2', 'date': '2026-03-02', 'punch_in': '2026-03-02T09:20:00', 'punch_out': '2026-03-02T17:00:00'}
+    ])
+    return db
+
+
+def stamps(db, query):
+    return [
+        (record['is_late'], record['late_minutes'], record['worked_minutes'])
+        for record in db.attendance.find(query).sort('punch_in', 1)
+    ]
+
+
+def test_recompute_attendance_shifts(unstamped):
+    assert recompute_attendance_shifts() == 4
+    assert stamps(unstamped, {'emp_id': 'E1', 'date': DAY, 'status': {'$ne': 'Historical'}}) == [
+        (True, 30, 270), (False, 0, 120) # Only the first punch-in of the day can be late
+    ]
+    assert stamps(unstamped, {'emp_id': 'E1', 'date': at(0, days=1)}) == [(True, 20, None)]
+    assert stamps(unstamped, {'emp_id': 'E2'}) == [(True, 20, 460)]
+    assert 'is_late' not in unstamped.attendance.find_one({'status': 'Historical'})
+    assert recompute_attendance_shifts() == 0 # Already up to date
+
+
+def test_recompute_attendance_shifts_after_a_shift_change(unstamped):
+    recompute_attendance_shifts()
+    unstamped.shifts.update_one({'shift_id': 'early'}, {'$set': {'start': '07:45'}})
+    assert recompute_attendance_shifts('2026-03-02', '2026-03-02', emp_id='E1') == 1
+    assert stamps(unstamped, {'emp_id': 'E1', 'date': DAY, 'status': {'$ne': 'Historical'}})[0] == (False, 0, 270)
+    assert stamps(unstamped, {'emp_id': 'E1', 'date': at(0, days=1)}) == [(True, 20, None)] # Outside the range
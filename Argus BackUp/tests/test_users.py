@@ -0,0 +1,79 @@
+import pytest
+
+from argus.services import users
+
+
+@pytest.fixture
+def staff(db):
+    db.users.insert_many([
+        {'emp_id': 'E1', 'full_name': 'Asha Kumar'},
+        {'emp_id': 'E2', 'full_name': 'Ravi Kumaran'},
+        {'emp_id': 'E3', 'full_name': 'Meera Shah'},
+        {'emp_id': 'E4'} # No name yet
+    ])
+    return db
+
+
+@pytest.fixture
+def name_index(monkeypatch):
+    index = users.EmployeeNameIndex()
+    monkeypatch.setattr(users, 'employee_name_index', index)
+    return index
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('kumar', ['E1', 'E2']),
+    ('KUMARAN', ['E2']),
+    ('a k', ['E1']),        # Spans the space between names
+    ('sh', ['E1', 'E3']),   # Shorter than a trigram: scanned
+    ('zzz', [])
+])
+def test_name_index_search(staff, name_index, text, expected):
+    assert sorted(name_index.search(text)) == expected
+
+
+def test_name_index_confirms_the_substring(staff, name_index):
+    staff.users.insert_one({'emp_id': 'E5', 'full_name': 'Anna Banana'})
+    assert name_index.search('anana') == ['E5']
+    assert name_index.search('ananan') == [] # Both its trigrams are in 'banana', the substring is not
+
+
+def test_name_index_rebuilds_when_the_users_version_changes(staff, name_index):
+    assert name_index.search('patel') == []
+    staff.users.insert_one({'emp_id': 'E5', 'full_name': 'Nisha Patel'})
+    assert name_index.search('patel') == [] # Unchanged version: the index is not rebuilt
+
+    users.bump_users_version('E5') # As another worker's profile write would
+    name_index.invalidate()        # and this worker's next version check
+    assert name_index.search('patel') == ['E5']
+
+
+def test_users_changes(db):
+    since = users.get_users_version()
+    users.bump_users_version('E1')
+    users.bump_users_version('E2')
+    assert users.get_users_changes(since) == (since + 2, {'E1', 'E2'})
+    assert users.get_users_changes(since + 2) == (since + 2, set())
+    users.bump_users_version()
+    assert users.get_users_changes(since) == (since + 3, None) # A bulk change names no employees
+
+
+def test_users_changes_beyond_the_log(db, monkeypatch):
+    monkeypatch.setattr(users, 'USERS_CHANGE_LOG_SIZE', 2)
+    since = users.get_users_version()
+    for emp_id in ('E1', 'E2', 'E3'):
+        users.bump_users_version(emp_id)
+    assert users.get_users_changes(since) == (since + 3, None)
+    assert users.get_users_changes(since + 1) == (since + 3, {'E2', 'E3'})
+
+
+def test_resolve_employee_search(staff, name_index, monkeypatch):
+    condition, stages = users.resolve_employee_search('kumar')
+    assert (sorted(condition['$in']), stages) == (['E1', 'E2'], [])
+    assert users.resolve_employee_search('E4') == ('E4', []) # No name match: an exact emp_id
+
+    monkeypatch.setattr(users, 'NAME_SEARCH_MAX_IN_IDS', 1)
+    condition, stages = users.resolve_employee_search('kumar')
+    assert condition is None
+    staff.attendance.insert_many([{'emp_id': emp_id} for emp_id in ('E1', 'E2', 'E3', 'E3')])
+    assert users.count_matching(staff.attendance, {}, stages) == 2 # Joined and filtered on full_name instead